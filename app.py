@@ -1,21 +1,34 @@
 from flask import Flask, jsonify
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
+import atexit
 import logging
 import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-# Configure production logging
+# Configure production logging. Records are enqueued by a QueueHandler and
+# written by a background listener so request threads never block on I/O.
+_log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+_log_handlers = [
+    logging.StreamHandler(),
+    logging.FileHandler('app.log') if os.getenv('FLASK_ENV') == 'production' else logging.NullHandler()
+]
+for _handler in _log_handlers:
+    _handler.setFormatter(_log_formatter)
+
+_log_queue = queue.SimpleQueue()
+_log_listener = QueueListener(_log_queue, *_log_handlers, respect_handler_level=True)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('app.log') if os.getenv('FLASK_ENV') == 'production' else logging.NullHandler()
-    ]
+    handlers=[QueueHandler(_log_queue)]
 )
 
 def create_app():
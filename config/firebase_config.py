@@ -3,6 +3,7 @@ Firebase configuration and initialization
 """
 import os
 import json
+import threading
 import firebase_admin
 from firebase_admin import credentials, firestore
 
@@ -10,12 +11,20 @@ from firebase_admin import credentials, firestore
 _firebase_app = None
 _firestore_db = None
 _firebase_initialized = False
+# Guards one-time app/client creation; re-entrant because get_firestore_db initializes the app
+_init_lock = threading.RLock()
 
 def get_firebase_app():
     """Get the Firebase app instance, initializing if needed"""
     global _firebase_app, _firebase_initialized
     
-    if _firebase_app is None and not _firebase_initialized:
+    if _firebase_app is not None or _firebase_initialized:
+        return _firebase_app
+    
+    with _init_lock:
+        if _firebase_app is not None or _firebase_initialized:
+            return _firebase_app
+        
         try:
             # Check if we have a service account file path
             service_account_path = os.getenv('FIREBASE_SERVICE_ACCOUNT_PATH')
@@ -50,21 +59,30 @@ def get_firebase_app():
     return _firebase_app
 
 def get_firestore_db():
-    """Get the Firestore database instance"""
+    """
+    Get the process-wide Firestore client.
+    
+    The client is thread-safe and pools its own gRPC channels, so every service
+    shares this single instance instead of paying channel/TLS setup per call.
+    """
     global _firestore_db
     
-    if _firestore_db is None:
-        # Try to get Firebase app
-        app = get_firebase_app()
-        if app is None:
-            print("⚠️  Warning: Firebase not initialized, Firestore unavailable")
-            return None
-        
-        try:
-            _firestore_db = firestore.client()
-        except Exception as e:
-            print(f"❌ Firestore client initialization failed: {e}")
-            return None
+    if _firestore_db is not None:
+        return _firestore_db
+    
+    with _init_lock:
+        if _firestore_db is None:
+            # Try to get Firebase app
+            app = get_firebase_app()
+            if app is None:
+                print("⚠️  Warning: Firebase not initialized, Firestore unavailable")
+                return None
+            
+            try:
+                _firestore_db = firestore.client()
+            except Exception as e:
+                print(f"❌ Firestore client initialization failed: {e}")
+                return None
     
     return _firestore_db
 
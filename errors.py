@@ -2,6 +2,7 @@
 """
 Centralized error codes, status constants, and messages for backend pipeline
 """
+import time
 
 # Pipeline Status Constants
 class PipelineStatus:
@@ -78,11 +79,13 @@ def get_error(code, details=None):
     return err
 
 
-def log_stage_timing(stage_name, start_time, end_time=None):
-    """Log timing for pipeline stages"""
-    import time
-    if end_time is None:
-        end_time = time.time()
-    duration = end_time - start_time
+def log_stage_timing(stage_name, start_ns, end_ns=None):
+    """
+    Log timing for pipeline stages.
+    Takes time.monotonic_ns() readings, which NTP adjustments can't skew; returns the duration in seconds.
+    """
+    if end_ns is None:
+        end_ns = time.monotonic_ns()
+    duration = (end_ns - start_ns) / 1e9
     print(f"[TIMING] {stage_name}: {duration:.2f}s")
     return duration 
\ No newline at end of file
@@ -84,12 +84,13 @@ class FirestoreRecipeService:
             True if update was successful, False otherwise
         """
         try:
+            now = datetime.now(timezone.utc).isoformat()
             llm_failure_data = {
                 "status": PipelineStatus.LLM_FAILED_BUT_CONTINUED,
-                "updatedAt": datetime.now(timezone.utc).isoformat(),
+                "updatedAt": now,
                 "error_code": "LLM_FAILED",
                 "llm_error_message": error_message,
-                "llm_processing_completed_at": datetime.now(timezone.utc).isoformat()
+                "llm_processing_completed_at": now
             }
             
             success = self._update_both_collections(job_id, recipe_id, llm_failure_data)
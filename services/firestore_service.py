@@ -538,6 +538,23 @@ class RecipeService(FirestoreService):
             return self._clean_recipe_data(recipe_data)
         return None
     
+    def get_recipes_by_ids(self, recipe_ids: List[str]) -> List[Dict]:
+        """Get several recipes in one round-trip, in the order given (missing IDs are skipped)"""
+        if not recipe_ids:
+            return []
+        if not is_firebase_available():
+            recipes = (self.get_recipe_by_id(recipe_id) for recipe_id in recipe_ids)
+            return [recipe for recipe in recipes if recipe]
+        
+        refs = [self.db.collection(self.COLLECTION_NAME).document(recipe_id) for recipe_id in dict.fromkeys(recipe_ids)]
+        found = {}
+        for doc in self.db.get_all(refs):
+            if doc.exists:
+                recipe_data = doc.to_dict()
+                recipe_data['id'] = doc.id
+                found[doc.id] = self._clean_recipe_data(recipe_data)
+        return [found[recipe_id] for recipe_id in recipe_ids if recipe_id in found]
+    
     def get_recipes(self, limit: int = 50, **filters) -> List[Dict]:
         """Get recipes with optional filtering"""
         if not is_firebase_available():
@@ -607,7 +624,11 @@ class RecipeService(FirestoreService):
             return True
         
         try:
-            self.db.collection(self.COLLECTION_NAME).document(recipe_id).delete()
+            batch = self.db.batch()
+            batch.delete(self.db.collection(self.COLLECTION_NAME).document(recipe_id))
+            # Drop the denormalized likes counter along with the recipe
+            batch.delete(self.db.collection('recipe_counts').document(recipe_id))
+            batch.commit()
             return True
         except Exception as e:
             print(f"Error deleting recipe: {e}")
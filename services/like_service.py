@@ -2,14 +2,24 @@
 Like service for handling recipe like/unlike operations with Firestore transactions
 """
 
-import re
+import logging
+import string
+import threading
+import time
 from datetime import datetime, timezone
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Set, Tuple
+from google.api_core.exceptions import AlreadyExists, NotFound
 from google.cloud.firestore_v1 import Transaction
 from google.cloud import firestore
 
 from config.firebase_config import get_firestore_db, is_firebase_available
 
+# Allowed characters for document IDs used in like operations
+_RECIPE_ID_CHARS = frozenset(string.ascii_letters + string.digits + '_-')
+_USER_ID_CHARS = _RECIPE_ID_CHARS | {'.'}
+
+logger = logging.getLogger(__name__)
+
 
 class LikeServiceError(Exception):
     """Base exception for like service errors"""
@@ -47,109 +57,133 @@ class LikeService:
     # Constants for validation
     MAX_RECIPE_ID_LENGTH = 100
     MAX_USER_ID_LENGTH = 100
-    RECIPE_ID_PATTERN = re.compile(r'^[a-zA-Z0-9_-]+$')
-    USER_ID_PATTERN = re.compile(r'^[a-zA-Z0-9_.-]+$')
+    
+    # Denormalized per-recipe counters, kept in sync by toggle_like
+    COUNTS_COLLECTION = 'recipe_counts'
+    LIKES_COUNT_CACHE_TTL_SECONDS = 5.0
     
     def __init__(self):
         self.db = get_firestore_db()
+        # recipe_id -> (expires_at, likes_count)
+        self._likes_count_cache: Dict[str, Tuple[float, int]] = {}
+        self._likes_count_cache_lock = threading.Lock()
+    
+    def _cache_likes_count(self, recipe_id: str, likes_count: int) -> None:
+        """Store a likes count in the in-process cache"""
+        expires_at = time.monotonic() + self.LIKES_COUNT_CACHE_TTL_SECONDS
+        with self._likes_count_cache_lock:
+            self._likes_count_cache[recipe_id] = (expires_at, likes_count)
     
-    def _validate_recipe_id(self, recipe_id: str) -> None:
+    @staticmethod
+    def _validate_id(value: str, name: str, max_length: int, allowed_chars: frozenset,
+                     invalid_chars_message: str) -> str:
         """
-        Validate recipe ID format and constraints
+        Validate an ID in a single pass and return it with surrounding whitespace removed
         
         Args:
-            recipe_id: Recipe ID to validate
+            value: ID to validate
+            name: Human-readable ID name used in error messages
+            max_length: Maximum allowed length after stripping
+            allowed_chars: Set of characters the ID may contain
+            invalid_chars_message: Error message for disallowed characters
+            
+        Returns:
+            The cleaned ID
             
         Raises:
-            InvalidInputError: If recipe ID is invalid
+            InvalidInputError: If the ID is invalid
         """
-        if not recipe_id:
-            raise InvalidInputError("Recipe ID is required")
+        if not value:
+            raise InvalidInputError(f"{name} is required")
         
-        if not isinstance(recipe_id, str):
-            raise InvalidInputError("Recipe ID must be a string")
+        if not isinstance(value, str):
+            raise InvalidInputError(f"{name} must be a string")
         
-        recipe_id = recipe_id.strip()
-        if not recipe_id:
-            raise InvalidInputError("Recipe ID cannot be empty or whitespace")
+        # Only pay for strip() when there is whitespace at either end
+        if value[0].isspace() or value[-1].isspace():
+            value = value.strip()
+            if not value:
+                raise InvalidInputError(f"{name} cannot be empty or whitespace")
         
-        if len(recipe_id) > self.MAX_RECIPE_ID_LENGTH:
-            raise InvalidInputError(f"Recipe ID too long (max {self.MAX_RECIPE_ID_LENGTH} characters)")
+        if len(value) > max_length:
+            raise InvalidInputError(f"{name} too long (max {max_length} characters)")
         
-        if not self.RECIPE_ID_PATTERN.match(recipe_id):
-            raise InvalidInputError("Recipe ID contains invalid characters (only alphanumeric, underscore, hyphen allowed)")
+        if not allowed_chars.issuperset(value):
+            raise InvalidInputError(invalid_chars_message)
+        
+        return value
     
-    def _validate_user_id(self, user_id: str) -> None:
+    def _validate_recipe_id(self, recipe_id: str) -> str:
+        """
+        Validate recipe ID format and constraints
+        
+        Args:
+            recipe_id: Recipe ID to validate
+            
+        Returns:
+            The cleaned recipe ID
+            
+        Raises:
+            InvalidInputError: If recipe ID is invalid
+        """
+        return self._validate_id(
+            recipe_id, "Recipe ID", self.MAX_RECIPE_ID_LENGTH, _RECIPE_ID_CHARS,
+            "Recipe ID contains invalid characters (only alphanumeric, underscore, hyphen allowed)"
+        )
+    
+    def _validate_user_id(self, user_id: str) -> str:
         """
         Validate user ID format and constraints
         
         Args:
             user_id: User ID to validate
             
+        Returns:
+            The cleaned user ID
+            
         Raises:
             InvalidInputError: If user ID is invalid
         """
-        if not user_id:
-            raise InvalidInputError("User ID is required")
-        
-        if not isinstance(user_id, str):
-            raise InvalidInputError("User ID must be a string")
-        
-        user_id = user_id.strip()
-        if not user_id:
-            raise InvalidInputError("User ID cannot be empty or whitespace")
-        
-        if len(user_id) > self.MAX_USER_ID_LENGTH:
-            raise InvalidInputError(f"User ID too long (max {self.MAX_USER_ID_LENGTH} characters)")
-        
-        if not self.USER_ID_PATTERN.match(user_id):
-            raise InvalidInputError("User ID contains invalid characters")
+        return self._validate_id(
+            user_id, "User ID", self.MAX_USER_ID_LENGTH, _USER_ID_CHARS,
+            "User ID contains invalid characters"
+        )
     
-    def _validate_user_exists_and_active(self, user_id: str) -> None:
+    def _check_user_active(self, user_id: str, user_doc) -> None:
         """
-        Validate that user exists and is in good standing
+        Check that a fetched user snapshot exists and is in good standing
         
         Args:
-            user_id: User ID to validate
+            user_id: User ID being checked
+            user_doc: User document snapshot
             
         Raises:
             UserNotFoundError: If user doesn't exist
             PermissionDeniedError: If user is banned/suspended
         """
-        try:
-            user_ref = self.db.collection('users').document(user_id)
-            user_doc = user_ref.get()
-            
-            if not user_doc.exists:
-                raise UserNotFoundError(f"User {user_id} does not exist")
-            
-            user_data = user_doc.to_dict()
-            
-            # Check user status
-            user_status = user_data.get('status', 'active')
-            if user_status == 'deleted':
-                raise UserNotFoundError(f"User {user_id} has been deleted")
-            elif user_status == 'banned':
-                raise PermissionDeniedError(f"User {user_id} is banned")
-            elif user_status == 'suspended':
-                raise PermissionDeniedError(f"User {user_id} is suspended")
-            elif user_status != 'active':
-                raise PermissionDeniedError(f"User {user_id} account is not active")
-            
-        except (UserNotFoundError, PermissionDeniedError):
-            raise
-        except Exception as e:
-            print(f"[LikeService] Error validating user {user_id}: {e}")
-            # Default to allowing operation if we can't verify user status
-            # This prevents false negatives due to temporary database issues
-            pass
+        if not user_doc.exists:
+            raise UserNotFoundError(f"User {user_id} does not exist")
+        
+        user_data = user_doc.to_dict()
+        
+        # Check user status
+        user_status = user_data.get('status', 'active')
+        if user_status == 'deleted':
+            raise UserNotFoundError(f"User {user_id} has been deleted")
+        elif user_status == 'banned':
+            raise PermissionDeniedError(f"User {user_id} is banned")
+        elif user_status == 'suspended':
+            raise PermissionDeniedError(f"User {user_id} is suspended")
+        elif user_status != 'active':
+            raise PermissionDeniedError(f"User {user_id} account is not active")
     
-    def _validate_recipe_exists_and_available(self, recipe_id: str, user_id: str) -> Dict[str, Any]:
+    def _check_recipe_available(self, recipe_id: str, recipe_doc, user_id: str) -> Dict[str, Any]:
         """
-        Validate that recipe exists and is available for liking
+        Check that a fetched recipe snapshot exists and is available for liking
         
         Args:
-            recipe_id: Recipe ID to validate
+            recipe_id: Recipe ID being checked
+            recipe_doc: Recipe document snapshot
             user_id: User ID attempting to like
             
         Returns:
@@ -160,37 +194,27 @@ class LikeService:
             RecipeNotAvailableError: If recipe is not available for liking
             PermissionDeniedError: If user cannot like this recipe
         """
-        try:
-            recipe_ref = self.db.collection('recipes').document(recipe_id)
-            recipe_doc = recipe_ref.get()
-            
-            if not recipe_doc.exists:
-                raise RecipeNotFoundError(f"Recipe {recipe_id} does not exist")
-            
-            recipe_data = recipe_doc.to_dict()
-            
-            # Check recipe status
-            recipe_status = recipe_data.get('status', 'active')
-            if recipe_status == 'deleted':
-                raise RecipeNotFoundError(f"Recipe {recipe_id} has been deleted")
-            elif recipe_status == 'draft':
-                raise RecipeNotAvailableError(f"Recipe {recipe_id} is still in draft")
-            elif recipe_status == 'processing':
-                raise RecipeNotAvailableError(f"Recipe {recipe_id} is still processing")
-            elif recipe_status == 'private' and recipe_data.get('user_id') != user_id:
-                raise PermissionDeniedError(f"Recipe {recipe_id} is private")
-            elif recipe_status not in ['active', 'public']:
-                # Check explicit public flag for backwards compatibility
-                if not recipe_data.get('is_public', False) and recipe_data.get('user_id') != user_id:
-                    raise PermissionDeniedError(f"Cannot like a private recipe you don't own")
-            
-            return recipe_data
-            
-        except (RecipeNotFoundError, RecipeNotAvailableError, PermissionDeniedError):
-            raise
-        except Exception as e:
-            print(f"[LikeService] Error validating recipe {recipe_id}: {e}")
-            raise RecipeNotFoundError(f"Could not verify recipe {recipe_id} exists")
+        if not recipe_doc.exists:
+            raise RecipeNotFoundError(f"Recipe {recipe_id} does not exist")
+        
+        recipe_data = recipe_doc.to_dict()
+        
+        # Check recipe status
+        recipe_status = recipe_data.get('status', 'active')
+        if recipe_status == 'deleted':
+            raise RecipeNotFoundError(f"Recipe {recipe_id} has been deleted")
+        elif recipe_status == 'draft':
+            raise RecipeNotAvailableError(f"Recipe {recipe_id} is still in draft")
+        elif recipe_status == 'processing':
+            raise RecipeNotAvailableError(f"Recipe {recipe_id} is still processing")
+        elif recipe_status == 'private' and recipe_data.get('user_id') != user_id:
+            raise PermissionDeniedError(f"Recipe {recipe_id} is private")
+        elif recipe_status not in ['active', 'public']:
+            # Check explicit public flag for backwards compatibility
+            if not recipe_data.get('is_public', False) and recipe_data.get('user_id') != user_id:
+                raise PermissionDeniedError(f"Cannot like a private recipe you don't own")
+        
+        return recipe_data
     
     def toggle_like(self, recipe_id: str, user_id: str, like: bool) -> Optional[Dict[str, Any]]:
         """
@@ -220,49 +244,32 @@ class LikeService:
         if not self.db:
             raise LikeServiceError("Firestore database not available")
         
-        # Validate inputs
-        self._validate_recipe_id(recipe_id)
-        self._validate_user_id(user_id)
-        
-        # Clean up inputs
-        recipe_id = recipe_id.strip()
-        user_id = user_id.strip()
-        
-        # Validate user exists and is active (optional check for performance)
-        # self._validate_user_exists_and_active(user_id)
+        # Validate and clean up inputs
+        recipe_id = self._validate_recipe_id(recipe_id)
+        user_id = self._validate_user_id(user_id)
         
         # Use a transaction to ensure atomicity
         @firestore.transactional
         def _toggle_like_transaction(transaction: Transaction) -> Dict[str, Any]:
-            # Validate recipe exists and is available within transaction
-            try:
-                recipe_data = self._validate_recipe_exists_and_available(recipe_id, user_id)
-            except (RecipeNotFoundError, RecipeNotAvailableError, PermissionDeniedError):
-                raise
-            except Exception as e:
-                raise LikeServiceError(f"Failed to validate recipe: {e}")
-            
-            # Get recipe document reference
             recipe_ref = self.db.collection('recipes').document(recipe_id)
-            
-            # Read recipe within transaction (double-check for race conditions)
-            recipe_doc = recipe_ref.get(transaction=transaction)
-            
-            if not recipe_doc.exists:
-                raise RecipeNotFoundError(f"Recipe {recipe_id} was deleted during operation")
-            
-            current_recipe_data = recipe_doc.to_dict()
-            
-            # Re-validate recipe status within transaction
-            recipe_status = current_recipe_data.get('status', 'active')
-            if recipe_status in ['deleted', 'draft', 'processing']:
-                raise RecipeNotAvailableError(f"Recipe {recipe_id} is not available (status: {recipe_status})")
+            counts_ref = self.db.collection(self.COUNTS_COLLECTION).document(recipe_id)
             
             # Get like document reference (user can only have one like per recipe)
             like_ref = recipe_ref.collection('likes').document(user_id)
             
-            # Read like document within transaction
-            like_doc = like_ref.get(transaction=transaction)
+            user_ref = self.db.collection('users').document(user_id)
+            
+            # Read recipe, like and user documents in a single round-trip within
+            # the transaction; this snapshot also serves as the availability checks
+            snapshots = {
+                doc.reference.path: doc
+                for doc in transaction.get_all([recipe_ref, like_ref, user_ref])
+            }
+            recipe_doc = snapshots[recipe_ref.path]
+            like_doc = snapshots[like_ref.path]
+            
+            self._check_user_active(user_id, snapshots[user_ref.path])
+            current_recipe_data = self._check_recipe_available(recipe_id, recipe_doc, user_id)
             
             # Current state
             currently_liked = like_doc.exists
@@ -270,7 +277,7 @@ class LikeService:
             
             # Ensure likes_count is non-negative (data integrity check)
             if current_likes_count < 0:
-                print(f"[LikeService] Warning: Recipe {recipe_id} has negative likes_count: {current_likes_count}")
+                logger.warning(f"Recipe {recipe_id} has negative likes_count: {current_likes_count}")
                 current_likes_count = 0
             
             # Determine new state and actions
@@ -285,7 +292,9 @@ class LikeService:
                     'created_at': timestamp.isoformat() + 'Z',
                     'updated_at': timestamp.isoformat() + 'Z'
                 }
-                transaction.set(like_ref, like_data)
+                # create() fails the commit if a concurrent request already
+                # created the like, instead of silently overwriting it
+                transaction.create(like_ref, like_data)
                 
                 # Update recipe likes_count and last_liked_by
                 new_likes_count = current_likes_count + 1
@@ -295,6 +304,10 @@ class LikeService:
                     'updated_at': timestamp.isoformat() + 'Z'
                 }
                 transaction.update(recipe_ref, recipe_updates)
+                transaction.set(counts_ref, {
+                    'likes_count': new_likes_count,
+                    'updated_at': recipe_updates['updated_at']
+                })
                 
                 return {
                     'liked': True,
@@ -305,7 +318,8 @@ class LikeService:
             elif not like and currently_liked:
                 # Unlike the recipe
                 # Delete like document
-                transaction.delete(like_ref)
+                # Precondition fails the commit if the like was already removed
+                transaction.delete(like_ref, option=self.db.write_option(exists=True))
                 
                 # Update recipe likes_count (ensure it doesn't go below 0)
                 new_likes_count = max(0, current_likes_count - 1)
@@ -321,6 +335,10 @@ class LikeService:
                     recipe_updates['last_liked_by'] = None
                 
                 transaction.update(recipe_ref, recipe_updates)
+                transaction.set(counts_ref, {
+                    'likes_count': new_likes_count,
+                    'updated_at': recipe_updates['updated_at']
+                })
                 
                 return {
                     'liked': False,
@@ -338,8 +356,16 @@ class LikeService:
         
         # Execute transaction with retry logic
         try:
-            transaction = self.db.transaction()
-            result = _toggle_like_transaction(transaction)
+            try:
+                transaction = self.db.transaction()
+                result = _toggle_like_transaction(transaction)
+            except (AlreadyExists, NotFound):
+                # A concurrent toggle changed the like document before our commit;
+                # re-run once against fresh state, which resolves idempotently
+                transaction = self.db.transaction()
+                result = _toggle_like_transaction(transaction)
+            
+            self._cache_likes_count(recipe_id, result['likes_count'])
             return result
             
         except (InvalidInputError, UserNotFoundError, RecipeNotFoundError, 
@@ -351,7 +377,7 @@ class LikeService:
         except firestore.DeadlineExceeded as e:
             raise LikeServiceError(f"Database operation timed out: {e}")
         except Exception as e:
-            print(f"[LikeService] Unexpected error in toggle_like: {e}")
+            logger.error(f"Unexpected error in toggle_like: {e}")
             raise LikeServiceError(f"Failed to update like status: {e}")
     
     def has_liked(self, recipe_id: str, user_id: str) -> Optional[bool]:
@@ -372,22 +398,25 @@ class LikeService:
             return None
         
         try:
-            # Validate inputs
-            self._validate_recipe_id(recipe_id)
-            self._validate_user_id(user_id)
-            
-            # Clean up inputs
-            recipe_id = recipe_id.strip()
-            user_id = user_id.strip()
+            # Validate and clean up inputs
+            recipe_id = self._validate_recipe_id(recipe_id)
+            user_id = self._validate_user_id(user_id)
             
         except InvalidInputError:
             # For has_liked, we can return None for invalid inputs
             return None
         
-        try:
-            # Check if recipe exists first
+        @firestore.transactional
+        def _has_liked_transaction(transaction: Transaction) -> Optional[bool]:
             recipe_ref = self.db.collection('recipes').document(recipe_id)
-            recipe_doc = recipe_ref.get()
+            like_ref = recipe_ref.collection('likes').document(user_id)
+            
+            # Read recipe and like documents from the same snapshot in one round-trip
+            snapshots = {
+                doc.reference.path: doc
+                for doc in transaction.get_all([recipe_ref, like_ref])
+            }
+            recipe_doc = snapshots[recipe_ref.path]
             
             if not recipe_doc.exists:
                 return None  # Recipe not found
@@ -399,16 +428,62 @@ class LikeService:
             if recipe_status in ['deleted', 'draft', 'processing']:
                 return None  # Recipe not available
             
-            # Check if like document exists
-            like_ref = recipe_ref.collection('likes').document(user_id)
-            like_doc = like_ref.get()
-            
-            return like_doc.exists
+            return snapshots[like_ref.path].exists
+        
+        try:
+            # Read-only transactions take no locks, so they never contend with toggles
+            transaction = self.db.transaction(read_only=True)
+            return _has_liked_transaction(transaction)
             
         except Exception as e:
-            print(f"[LikeService] Error checking like status: {e}")
+            logger.error(f"Error checking like status: {e}")
             return None
     
+    def get_liked_recipe_ids(self, recipe_ids: List[str], user_id: str) -> Set[str]:
+        """
+        Check which of the given recipes a user has liked, in one round-trip
+        
+        Args:
+            recipe_ids: Recipe document IDs to check
+            user_id: The user ID to check
+            
+        Returns:
+            Set of recipe IDs the user has liked (empty on invalid input or error)
+        """
+        if not self.db or not recipe_ids:
+            return set()
+        
+        try:
+            user_id = self._validate_user_id(user_id)
+        except InvalidInputError:
+            return set()
+        
+        valid_ids = []
+        for recipe_id in recipe_ids:
+            try:
+                valid_ids.append(self._validate_recipe_id(recipe_id))
+            except InvalidInputError:
+                continue  # Invalid IDs can't have likes
+        
+        if not valid_ids:
+            return set()
+        
+        try:
+            # Like documents are keyed by user ID, so their paths are known up front
+            like_refs = [
+                self.db.collection('recipes').document(recipe_id).collection('likes').document(user_id)
+                for recipe_id in dict.fromkeys(valid_ids)
+            ]
+            return {
+                like_doc.reference.parent.parent.id
+                for like_doc in self.db.get_all(like_refs)
+                if like_doc.exists
+            }
+            
+        except Exception as e:
+            logger.error(f"Error checking like status for {len(valid_ids)} recipes: {e}")
+            return set()
+    
     def get_recipe_likes_count(self, recipe_id: str) -> Optional[int]:
         """
         Get the total likes count for a recipe
@@ -427,13 +502,27 @@ class LikeService:
         
         try:
             # Validate input
-            self._validate_recipe_id(recipe_id)
-            recipe_id = recipe_id.strip()
+            recipe_id = self._validate_recipe_id(recipe_id)
             
         except InvalidInputError:
             return None
         
+        with self._likes_count_cache_lock:
+            cached = self._likes_count_cache.get(recipe_id)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        
         try:
+            # Prefer the small counter document over fetching the whole recipe
+            counts_doc = self.db.collection(self.COUNTS_COLLECTION).document(recipe_id).get()
+            
+            if counts_doc.exists:
+                likes_count = max(0, counts_doc.to_dict().get('likes_count', 0))
+                self._cache_likes_count(recipe_id, likes_count)
+                return likes_count
+            
+            # Fall back to the recipe document for recipes never liked since
+            # the counter collection was introduced
             recipe_ref = self.db.collection('recipes').document(recipe_id)
             recipe_doc = recipe_ref.get()
             
@@ -447,11 +536,12 @@ class LikeService:
             if recipe_status in ['deleted']:
                 return None  # Recipe deleted
             
-            likes_count = recipe_data.get('likes_count', 0)
-            return max(0, likes_count)  # Ensure non-negative
+            likes_count = max(0, recipe_data.get('likes_count', 0))  # Ensure non-negative
+            self._cache_likes_count(recipe_id, likes_count)
+            return likes_count
             
         except Exception as e:
-            print(f"[LikeService] Error getting likes count: {e}")
+            logger.error(f"Error getting likes count: {e}")
             return None
     
     def get_user_likes(self, user_id: str, limit: int = 50) -> List[str]:
@@ -473,8 +563,7 @@ class LikeService:
         
         try:
             # Validate inputs
-            self._validate_user_id(user_id)
-            user_id = user_id.strip()
+            user_id = self._validate_user_id(user_id)
             
             if not isinstance(limit, int) or limit <= 0 or limit > 1000:
                 raise InvalidInputError("Limit must be a positive integer between 1 and 1000")
@@ -496,7 +585,7 @@ class LikeService:
             return liked_recipe_ids
             
         except Exception as e:
-            print(f"[LikeService] Error getting user likes: {e}")
+            logger.error(f"Error getting user likes: {e}")
             return []
 
 
@@ -0,0 +1,122 @@
+"""
+Rate-limited parallel refinement for backfills and bulk re-refinement.
+
+Plain asyncio.gather over hundreds of jobs fires every request at once and
+runs straight into 429s. Here each request first reserves capacity from a
+Throttler that tracks both requests-per-minute and tokens-per-minute budgets,
+refilled continuously.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.llm_refine_service import LLMRefineService
+
+logger = logging.getLogger(__name__)
+
+# Rough characters-per-token ratio for English text
+CHARS_PER_TOKEN = 4
+
+
+class Throttler:
+    """Continuous token-bucket limiter over requests and tokens per minute"""
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        if requests_per_minute <= 0 or tokens_per_minute <= 0:
+            raise ValueError("Rate limits must be positive")
+        self.max_requests_per_minute = requests_per_minute
+        self.max_tokens_per_minute = tokens_per_minute
+        self.available_request_capacity = requests_per_minute
+        self.available_token_capacity = tokens_per_minute
+        self._last_update = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _replenish(self) -> None:
+        now = time.monotonic()
+        elapsed_minutes = (now - self._last_update) / 60.0
+        self._last_update = now
+        self.available_request_capacity = min(
+            self.max_requests_per_minute,
+            self.available_request_capacity + self.max_requests_per_minute * elapsed_minutes
+        )
+        self.available_token_capacity = min(
+            self.max_tokens_per_minute,
+            self.available_token_capacity + self.max_tokens_per_minute * elapsed_minutes
+        )
+
+    async def acquire(self, tokens: int) -> None:
+        """
+        Wait until one request and the given number of tokens are available, then reserve them
+        Args:
+            tokens: Estimated tokens the request will consume (prompt + completion)
+        """
+        # A request larger than the whole budget would otherwise wait forever
+        tokens = min(tokens, self.max_tokens_per_minute)
+        while True:
+            async with self._lock:
+                self._replenish()
+                if self.available_request_capacity >= 1 and self.available_token_capacity >= tokens:
+                    self.available_request_capacity -= 1
+                    self.available_token_capacity -= tokens
+                    return
+                wait_seconds = 60.0 * max(
+                    (1 - self.available_request_capacity) / self.max_requests_per_minute,
+                    (tokens - self.available_token_capacity) / self.max_tokens_per_minute
+                )
+            await asyncio.sleep(wait_seconds)
+
+
+def estimate_tokens(service: LLMRefineService, job: Dict[str, Any]) -> int:
+    """
+    Estimate tokens for one refinement job without a tokenizer dependency
+    Args:
+        service: Service whose prompt template and completion budget apply
+        job: Keyword-argument dict accepted by refine_recipe
+    Returns:
+        Approximate prompt tokens plus the completion budget
+    """
+    prompt_chars = (
+        len(service.prompt_template)
+        + len(job.get("title") or "")
+        + len(job.get("transcript") or "")
+        + len(service._prepare_ocr_text(job.get("ocr_results") or []))
+    )
+    return prompt_chars // CHARS_PER_TOKEN + service.MAX_COMPLETION_TOKENS
+
+
+async def arefine_many(jobs: List[Dict[str, Any]], requests_per_minute: float, tokens_per_minute: float,
+                       service: Optional[LLMRefineService] = None) -> List[Tuple[Dict[str, Any], Optional[str]]]:
+    """
+    Refine many recipes concurrently while staying under RPM and TPM limits
+    Args:
+        jobs: List of keyword-argument dicts accepted by refine_recipe
+        requests_per_minute: Request budget per minute
+        tokens_per_minute: Token budget per minute
+        service: Service to use (a new one is created if omitted)
+    Returns:
+        List of (recipe_json, parse_error) tuples in the same order as jobs
+    """
+    if not jobs:
+        return []
+    
+    service = service or LLMRefineService()
+    throttler = Throttler(requests_per_minute, tokens_per_minute)
+    
+    async with service._create_async_client() as aclient:
+        async def _refine(job: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[str]]:
+            await throttler.acquire(estimate_tokens(service, job))
+            return await service.arefine_recipe(**job, aclient=aclient)
+        
+        results = await asyncio.gather(*(_refine(job) for job in jobs))
+    
+    failed = sum(1 for recipe_json, _ in results if recipe_json is None)
+    logger.info(f"Refined {len(jobs) - failed}/{len(jobs)} recipes")
+    return results
+
+
+def refine_many(jobs: List[Dict[str, Any]], requests_per_minute: float, tokens_per_minute: float,
+                service: Optional[LLMRefineService] = None) -> List[Tuple[Dict[str, Any], Optional[str]]]:
+    """Synchronous wrapper around arefine_many for scripts without an event loop"""
+    return asyncio.run(arefine_many(jobs, requests_per_minute, tokens_per_minute, service))
@@ -1,24 +1,85 @@
+import asyncio
 import json
 import os
+import random
+import re
 import time
 import hashlib
-from typing import Dict, Any, Tuple, Optional
-from openai import OpenAI
+from typing import Dict, Any, Tuple, Optional, List
+import httpx
+from openai import OpenAI, AsyncOpenAI, RateLimitError
 import logging
+from collections import Counter
 from functools import lru_cache
+from utils.disk_cache import DiskCache
 
 logger = logging.getLogger(__name__)
 
+_JSON_PAYLOAD_RE = re.compile(r"```json[^\n]*\n?(.*?)(?:```|\Z)|(\{.*\})", re.S)
+
 class LLMRefineError(Exception):
     """Custom exception for LLM refinement errors"""
     pass
 
+class _JsonObjectEndDetector:
+    """Track brace depth across streamed text to spot the end of the top-level JSON object"""
+
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+
+    def feed(self, text: str) -> int:
+        """
+        Consume a chunk of text
+        Returns:
+            Offset just past the closing brace of the outermost object, or -1 if still open
+        """
+        for index, char in enumerate(text):
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == '\\':
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = self.depth > 0
+            elif char == '{':
+                self.depth += 1
+            elif char == '}' and self.depth > 0:
+                self.depth -= 1
+                if self.depth == 0:
+                    return index + 1
+        return -1
+
 class LLMRefineService:
-    def __init__(self, api_key: Optional[str] = None):
+    # Completion budget per refinement request
+    MAX_COMPLETION_TOKENS = 2000
+    # Upper bound on simultaneous OpenAI connections for batched async refinement
+    MAX_CONCURRENT_REQUESTS = 100
+    # OpenAI Batch API settings for non-interactive bulk refinement
+    BATCH_ENDPOINT = "/v1/chat/completions"
+    BATCH_COMPLETION_WINDOW = "24h"
+    BATCH_TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+    # Exponential backoff between failed API calls (seconds)
+    RETRY_BACKOFF_BASE = 0.5
+    RETRY_BACKOFF_CAP = 20.0
+    # How long refined responses stay in the persistent response cache
+    RESPONSE_CACHE_TTL_SECONDS = 30 * 86400
+    # With no transcript or OCR text, a title shorter than this can't describe a recipe
+    MIN_TITLE_ONLY_CHARS = 40
+    # Budget for OCR text in the prompt; past it only the highest-confidence blocks are sent
+    MAX_OCR_PROMPT_CHARS = 4000
+    INSUFFICIENT_CONTENT_ERROR = "insufficient_content"
+
+    def __init__(self, api_key: Optional[str] = None, cache_dir: Optional[str] = None):
         """
         Initialize LLM service with OpenAI client
         Args:
             api_key: OpenAI API key (optional, will use env var if not provided)
+            cache_dir: Directory for the persistent response cache (optional, uses LLM_CACHE_DIR;
+                       caching is disabled when neither is set)
         """
         self.api_key = api_key or os.getenv('OPENAI_API_KEY')
         if not self.api_key:
@@ -28,6 +89,12 @@ class LLMRefineService:
         self.model = "gpt-4o-mini"  # Use faster model for production
         self.prompt_template = self._load_prompt_template()
         
+        cache_dir = cache_dir or os.getenv('LLM_CACHE_DIR')
+        self.cache = DiskCache(cache_dir) if cache_dir else None
+        
+        # Requests refined vs skipped for lack of content, for tuning MIN_TITLE_ONLY_CHARS
+        self.request_counts = Counter()
+        
         logger.info(f"LLMRefineService initialized with model: {self.model}")
 
     @lru_cache(maxsize=1)
@@ -40,10 +107,83 @@ class LLMRefineService:
             logger.error("Prompt template file not found: prompts/recipe_refine_prompt.txt")
             raise LLMRefineError("Prompt template file not found")
 
+    def _create_async_client(self) -> AsyncOpenAI:
+        """
+        Create an async OpenAI client with an explicitly sized connection pool.
+        A fresh client is created per event loop since httpx pools are loop-bound.
+        """
+        return AsyncOpenAI(
+            api_key=self.api_key,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=self.MAX_CONCURRENT_REQUESTS)
+            )
+        )
+
     def _create_content_hash(self, title: str, transcript: str, ocr_results: list) -> str:
-        """Create hash of input content for caching"""
-        content = f"{title}:{transcript}:{str(ocr_results)}"
-        return hashlib.md5(content.encode()).hexdigest()
+        """Create hash of input content for caching, streaming OCR text instead of stringifying it"""
+        h = hashlib.blake2b(digest_size=16)
+        h.update((title or "").encode())
+        h.update(b"\x00")
+        h.update((transcript or "").encode())
+        for frame_result in ocr_results or ():
+            h.update(b"\x01")
+            h.update(str(frame_result.get("timestamp", 0)).encode())
+            for block in frame_result.get("text_blocks", ()):
+                h.update(b"\x00")
+                h.update(block["text"].encode())
+        return h.hexdigest()
+
+    def _response_cache_key(self, title: str, transcript: str, ocr_results: list) -> Optional[str]:
+        """Cache key for a refinement request, or None when caching is disabled"""
+        if self.cache is None:
+            return None
+        return f"{self._create_content_hash(title, transcript, ocr_results)}:{self.model}"
+
+    def _cached_recipe(self, cache_key: Optional[str], source_url: str, tiktok_author: str,
+                       video_thumbnail: str) -> Optional[Tuple[Dict[str, Any], Optional[str]]]:
+        """Re-parse a cached model response, or return None on a cache miss"""
+        if cache_key is None:
+            return None
+        try:
+            response = self.cache.get(cache_key)
+        except Exception as e:
+            logger.warning(f"LLM response cache read failed: {e}")
+            return None
+        if response is None:
+            return None
+        logger.info("LLM response cache hit")
+        return self._parse_recipe_response(response, source_url, tiktok_author, video_thumbnail)
+
+    def _store_response(self, cache_key: Optional[str], response: str) -> None:
+        """Persist a model response that parsed into a valid recipe"""
+        if cache_key is None:
+            return
+        try:
+            self.cache.set(cache_key, response, expire=self.RESPONSE_CACHE_TTL_SECONDS)
+        except Exception as e:
+            logger.warning(f"LLM response cache write failed: {e}")
+
+    def _has_refinable_content(self, title: str, transcript: str, ocr_results: list) -> bool:
+        """Whether the inputs carry enough text for the LLM to produce a real recipe"""
+        if transcript and transcript.strip():
+            return True
+        if ocr_results and any(
+            block["text"].strip()
+            for frame_result in ocr_results
+            for block in frame_result.get("text_blocks") or ()
+        ):
+            return True
+        return len((title or "").strip()) >= self.MIN_TITLE_ONLY_CHARS
+
+    def _skip_insufficient_content(self, title: str, transcript: str, ocr_results: list) -> bool:
+        """Count the request and report whether it should skip the LLM call"""
+        if self._has_refinable_content(title, transcript, ocr_results):
+            self.request_counts["refined"] += 1
+            return False
+        self.request_counts["skipped_insufficient_content"] += 1
+        logger.info(f"Skipping LLM refinement: no transcript or OCR text "
+                    f"({self.request_counts['skipped_insufficient_content']} skipped, {self.request_counts['refined']} refined)")
+        return True
 
     def _prepare_ocr_text(self, ocr_results: list) -> str:
         """
@@ -56,16 +196,44 @@ class LLMRefineService:
         if not ocr_results:
             return "No OCR text detected."
         
-        # Optimize OCR text processing
-        ocr_text_parts = []
+        # Text already shown for an earlier frame (a persistent overlay) adds tokens, not information
+        seen = set()
+        frames = []  # (timestamp, [(text, score), ...]) for frames with new text
+        total_chars = 0
         for frame_result in ocr_results:
-            if frame_result.get("text_blocks"):
-                # Filter out empty or whitespace-only text
-                frame_texts = [block["text"].strip() for block in frame_result["text_blocks"] if block["text"].strip()]
-                if frame_texts:
-                    ocr_text_parts.append(f"Frame at {frame_result.get('timestamp', 0)}s: {' | '.join(frame_texts)}")
+            new_blocks = []
+            for block in frame_result.get("text_blocks") or ():
+                text = block["text"].strip()
+                key = " ".join(text.lower().split())
+                if text and key not in seen:
+                    seen.add(key)
+                    new_blocks.append((text, block.get("score", 1.0)))
+                    total_chars += len(text)
+            if new_blocks:
+                frames.append((frame_result.get('timestamp', 0), new_blocks))
+        
+        if total_chars > self.MAX_OCR_PROMPT_CHARS:
+            # Keep the most confident blocks that fit the budget, still in frame order
+            ranked = sorted(
+                ((text, score) for _, blocks in frames for text, score in blocks),
+                key=lambda entry: entry[1], reverse=True
+            )
+            kept, budget = set(), self.MAX_OCR_PROMPT_CHARS
+            for text, _ in ranked:
+                if len(text) <= budget:
+                    kept.add(text)
+                    budget -= len(text)
+            frames = [
+                (timestamp, [entry for entry in blocks if entry[0] in kept])
+                for timestamp, blocks in frames
+            ]
         
-        return "\n".join(ocr_text_parts) if ocr_text_parts else "No readable text detected."
+        lines = (
+            f"Frame at {timestamp}s: {' | '.join(text for text, _ in blocks)}"
+            for timestamp, blocks in frames
+            if blocks
+        )
+        return "\n".join(lines) or "No readable text detected."
 
     def _extract_json_from_response(self, response: str) -> Tuple[Optional[Dict], Optional[str]]:
         """
@@ -76,17 +244,11 @@ class LLMRefineService:
             Tuple of (parsed_json, error_message)
         """
         try:
-            # Try to find JSON block
-            json_start = response.find('```json')
-            if json_start != -1:
-                json_start = response.find('\n', json_start) + 1
-                json_end = response.find('```', json_start)
-                if json_end != -1:
-                    json_str = response[json_start:json_end].strip()
-                else:
-                    json_str = response[json_start:].strip()
+            # One pass: a ```json fenced block (closing fence optional), else the outermost braces
+            match = _JSON_PAYLOAD_RE.search(response)
+            if match:
+                json_str = (match.group(1) if match.group(1) is not None else match.group(2)).strip()
             else:
-                # Try to find plain JSON
                 json_str = response.strip()
             
             # Parse JSON
@@ -100,6 +262,82 @@ class LLMRefineService:
             logger.error(f"Unexpected error parsing JSON: {e}")
             return None, f"Unexpected error: {str(e)}"
 
+    def _completion_params(self, messages: list) -> Dict[str, Any]:
+        """Build chat completion parameters shared by direct and batched requests"""
+        return {
+            "model": self.model,
+            "messages": messages,
+            "temperature": 0.1,  # Lower temperature for more consistent output
+            "max_tokens": self.MAX_COMPLETION_TOKENS,  # Limit tokens for faster response
+            # JSON mode: the model can only emit a syntactically valid object, so
+            # validation reprompts are left for schema problems (missing fields)
+            "response_format": {"type": "json_object"}
+        }
+
+    def _read_stream(self, stream) -> str:
+        """
+        Collect streamed completion text, stopping as soon as the JSON object is complete
+        Args:
+            stream: Streamed chat completion
+        Returns:
+            Response content received so far
+        """
+        parts = []
+        detector = _JsonObjectEndDetector()
+        try:
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                content = chunk.choices[0].delta.content
+                if content:
+                    end = detector.feed(content)
+                    if end != -1:
+                        parts.append(content[:end])
+                        break
+                    parts.append(content)
+        finally:
+            # Closing early stops generation of trailing tokens we would discard
+            stream.close()
+        return "".join(parts)
+
+    async def _aread_stream(self, stream) -> str:
+        """Async variant of _read_stream"""
+        parts = []
+        detector = _JsonObjectEndDetector()
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                content = chunk.choices[0].delta.content
+                if content:
+                    end = detector.feed(content)
+                    if end != -1:
+                        parts.append(content[:end])
+                        break
+                    parts.append(content)
+        finally:
+            await stream.close()
+        return "".join(parts)
+
+    def _retry_delay(self, attempt: int, error: Exception) -> float:
+        """
+        Compute how long to wait before the next API call attempt
+        Args:
+            attempt: Zero-based index of the attempt that just failed
+            error: Exception raised by that attempt
+        Returns:
+            Delay in seconds, honoring Retry-After on rate limits, otherwise capped exponential with jitter
+        """
+        if isinstance(error, RateLimitError):
+            retry_after = error.response.headers.get("retry-after") if error.response is not None else None
+            if retry_after:
+                try:
+                    return max(0.0, float(retry_after))
+                except ValueError:
+                    pass
+        backoff = min(self.RETRY_BACKOFF_CAP, self.RETRY_BACKOFF_BASE * 2 ** attempt)
+        return backoff * (0.5 + random.random())
+
     def _call_openai(self, messages: list, max_retries: int = 3) -> str:
         """
         Call OpenAI API with retry logic and optimized settings
@@ -111,20 +349,43 @@ class LLMRefineService:
         """
         for attempt in range(max_retries):
             try:
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=messages,
-                    temperature=0.1,  # Lower temperature for more consistent output
-                    max_tokens=2000,  # Limit tokens for faster response
+                stream = self.client.chat.completions.create(
+                    **self._completion_params(messages),
+                    stream=True,  # Stream so generation can be cut off after the JSON closes
                     timeout=30  # Add timeout
                 )
-                return response.choices[0].message.content
+                return self._read_stream(stream)
+                
+            except Exception as e:
+                logger.warning(f"OpenAI API call attempt {attempt + 1} failed: {e}")
+                if attempt == max_retries - 1:
+                    raise LLMRefineError(f"OpenAI API call failed after {max_retries} attempts: {e}")
+                time.sleep(self._retry_delay(attempt, e))
+
+    async def _acall_openai(self, aclient: AsyncOpenAI, messages: list, max_retries: int = 3) -> str:
+        """
+        Async variant of _call_openai so many refinements can share one event loop
+        Args:
+            aclient: Async OpenAI client bound to the running event loop
+            messages: List of message dictionaries
+            max_retries: Maximum number of retry attempts
+        Returns:
+            Response content from OpenAI
+        """
+        for attempt in range(max_retries):
+            try:
+                stream = await aclient.chat.completions.create(
+                    **self._completion_params(messages),
+                    stream=True,
+                    timeout=30
+                )
+                return await self._aread_stream(stream)
                 
             except Exception as e:
                 logger.warning(f"OpenAI API call attempt {attempt + 1} failed: {e}")
                 if attempt == max_retries - 1:
                     raise LLMRefineError(f"OpenAI API call failed after {max_retries} attempts: {e}")
-                time.sleep(1 * (attempt + 1))  # Exponential backoff
+                await asyncio.sleep(self._retry_delay(attempt, e))
 
     def _validate_recipe_data(self, recipe_data: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
         """
@@ -166,6 +427,67 @@ Original response:
 
 Please fix the error and provide a valid JSON response that matches the schema exactly."""
 
+    def _build_messages(self, title: str, transcript: str, ocr_results: list,
+                        source_url: str, tiktok_author: str, video_thumbnail: str) -> list:
+        """
+        Build the system and user messages for a refinement request
+        Returns:
+            List of message dictionaries
+        """
+        ocr_text = self._prepare_ocr_text(ocr_results)
+        
+        system_message = {
+            "role": "system",
+            "content": self.prompt_template
+        }
+        
+        user_message = {
+            "role": "user",
+            "content": f"""Title: {title}
+Transcript: {transcript}
+OCR Text: {ocr_text}
+Source URL: {source_url}
+TikTok Author: {tiktok_author}
+Video Thumbnail: {video_thumbnail}"""
+        }
+        
+        return [system_message, user_message]
+
+    def _add_source_metadata(self, recipe_json: Dict[str, Any], source_url: str,
+                             tiktok_author: str, video_thumbnail: str) -> None:
+        """Attach source metadata to a validated recipe in place"""
+        recipe_json["source_url"] = source_url
+        recipe_json["tiktok_author"] = tiktok_author
+        recipe_json["is_public"] = True
+        recipe_json["created_at"] = None
+        recipe_json["updated_at"] = None
+        recipe_json["video_thumbnail"] = video_thumbnail
+        recipe_json["saved_by"] = []
+        recipe_json["source_platform"] = "tiktok"
+        recipe_json["original_job_id"] = ""
+
+    def _parse_recipe_response(self, response: str, source_url: str, tiktok_author: str,
+                               video_thumbnail: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Parse and validate an LLM response, attaching source metadata on success
+        Returns:
+            Tuple of (recipe_json, parse_error)
+        """
+        recipe_json, parse_error = self._extract_json_from_response(response)
+        
+        if recipe_json:
+            # Validate recipe data
+            is_valid, validation_error = self._validate_recipe_data(recipe_json)
+            if not is_valid:
+                parse_error = validation_error
+                recipe_json = None
+        
+        # Add source metadata
+        if recipe_json:
+            self._add_source_metadata(recipe_json, source_url, tiktok_author, video_thumbnail)
+        
+        return recipe_json, parse_error
+
     def refine_recipe(self, title: str, transcript: str, ocr_results: list, 
                      source_url: str = "", tiktok_author: str = "", video_thumbnail: str = "") -> Tuple[Dict[str, Any], Optional[str]]:
         """
@@ -180,58 +502,181 @@ Please fix the error and provide a valid JSON response that matches the schema e
         Returns:
             Tuple of (recipe_json, parse_error)
         """
+        if self._skip_insufficient_content(title, transcript, ocr_results):
+            return None, self.INSUFFICIENT_CONTENT_ERROR
+        
         try:
-            # Prepare inputs
-            ocr_text = self._prepare_ocr_text(ocr_results)
+            cache_key = self._response_cache_key(title, transcript, ocr_results)
+            cached = self._cached_recipe(cache_key, source_url, tiktok_author, video_thumbnail)
+            if cached is not None and cached[1] is None:
+                return cached
             
-            # Create system message
-            system_message = {
-                "role": "system",
-                "content": self.prompt_template
-            }
-            
-            # Create user message
-            user_message = {
-                "role": "user",
-                "content": f"""Title: {title}
-Transcript: {transcript}
-OCR Text: {ocr_text}
-Source URL: {source_url}
-TikTok Author: {tiktok_author}
-Video Thumbnail: {video_thumbnail}"""
-            }
+            messages = self._build_messages(title, transcript, ocr_results, source_url, tiktok_author, video_thumbnail)
             
             # Call OpenAI
-            response = self._call_openai([system_message, user_message])
+            response = self._call_openai(messages)
+            
+            recipe_json, parse_error = self._parse_recipe_response(response, source_url, tiktok_author, video_thumbnail)
+            if parse_error is None:
+                self._store_response(cache_key, response)
+            return recipe_json, parse_error
             
-            # Parse response
-            recipe_json, parse_error = self._extract_json_from_response(response)
+        except Exception as e:
+            logger.error(f"Error in refine_recipe: {e}")
+            return None, f"LLM processing error: {str(e)}"
+
+    async def arefine_recipe(self, title: str, transcript: str, ocr_results: list,
+                             source_url: str = "", tiktok_author: str = "", video_thumbnail: str = "",
+                             aclient: Optional[AsyncOpenAI] = None) -> Tuple[Dict[str, Any], Optional[str]]:
+        """
+        Async variant of refine_recipe
+        Args:
+            title: Recipe title
+            transcript: Audio transcript
+            ocr_results: OCR results from video frames
+            source_url: Source URL
+            tiktok_author: TikTok author username
+            video_thumbnail: Video thumbnail URL
+            aclient: Async client to reuse (a temporary one is created if omitted)
+        Returns:
+            Tuple of (recipe_json, parse_error)
+        """
+        if self._skip_insufficient_content(title, transcript, ocr_results):
+            return None, self.INSUFFICIENT_CONTENT_ERROR
+        
+        try:
+            cache_key = self._response_cache_key(title, transcript, ocr_results)
+            cached = self._cached_recipe(cache_key, source_url, tiktok_author, video_thumbnail)
+            if cached is not None and cached[1] is None:
+                return cached
             
-            if recipe_json:
-                # Validate recipe data
-                is_valid, validation_error = self._validate_recipe_data(recipe_json)
-                if not is_valid:
-                    parse_error = validation_error
-                    recipe_json = None
+            messages = self._build_messages(title, transcript, ocr_results, source_url, tiktok_author, video_thumbnail)
             
-            # Add source metadata
-            if recipe_json:
-                recipe_json["source_url"] = source_url
-                recipe_json["tiktok_author"] = tiktok_author
-                recipe_json["is_public"] = True
-                recipe_json["created_at"] = None
-                recipe_json["updated_at"] = None
-                recipe_json["video_thumbnail"] = video_thumbnail
-                recipe_json["saved_by"] = []
-                recipe_json["source_platform"] = "tiktok"
-                recipe_json["original_job_id"] = ""
+            if aclient is None:
+                async with self._create_async_client() as temp_client:
+                    response = await self._acall_openai(temp_client, messages)
+            else:
+                response = await self._acall_openai(aclient, messages)
             
+            recipe_json, parse_error = self._parse_recipe_response(response, source_url, tiktok_author, video_thumbnail)
+            if parse_error is None:
+                self._store_response(cache_key, response)
             return recipe_json, parse_error
             
         except Exception as e:
-            logger.error(f"Error in refine_recipe: {e}")
+            logger.error(f"Error in arefine_recipe: {e}")
             return None, f"LLM processing error: {str(e)}"
 
+    async def arefine_batch(self, jobs: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], Optional[str]]]:
+        """
+        Refine many recipes concurrently over a shared connection pool
+        Args:
+            jobs: List of keyword-argument dicts accepted by refine_recipe
+        Returns:
+            List of (recipe_json, parse_error) tuples in the same order as jobs
+        """
+        if not jobs:
+            return []
+        
+        async with self._create_async_client() as aclient:
+            return await asyncio.gather(*(self.arefine_recipe(**job, aclient=aclient) for job in jobs))
+
+    def refine_batch(self, jobs: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], Optional[str]]]:
+        """
+        Synchronous wrapper around arefine_batch for callers without an event loop
+        Args:
+            jobs: List of keyword-argument dicts accepted by refine_recipe
+        Returns:
+            List of (recipe_json, parse_error) tuples in the same order as jobs
+        """
+        return asyncio.run(self.arefine_batch(jobs))
+
+    def submit_batch(self, jobs: List[Dict[str, Any]]) -> str:
+        """
+        Submit recipes to the OpenAI Batch API for non-interactive refinement.
+        Batched requests are billed at a discount and have separate rate limits.
+        Args:
+            jobs: List of keyword-argument dicts accepted by refine_recipe
+        Returns:
+            Batch ID to pass to poll_batch
+        """
+        lines = []
+        for index, job in enumerate(jobs):
+            messages = self._build_messages(
+                job.get("title"), job.get("transcript"), job.get("ocr_results"),
+                job.get("source_url", ""), job.get("tiktok_author", ""), job.get("video_thumbnail", "")
+            )
+            lines.append(json.dumps({
+                "custom_id": str(index),
+                "method": "POST",
+                "url": self.BATCH_ENDPOINT,
+                "body": self._completion_params(messages)
+            }))
+        
+        try:
+            batch_file = self.client.files.create(
+                file=("recipe_refine_batch.jsonl", "\n".join(lines).encode("utf-8")),
+                purpose="batch"
+            )
+            batch = self.client.batches.create(
+                input_file_id=batch_file.id,
+                endpoint=self.BATCH_ENDPOINT,
+                completion_window=self.BATCH_COMPLETION_WINDOW
+            )
+        except Exception as e:
+            raise LLMRefineError(f"Failed to submit refinement batch: {e}")
+        
+        logger.info(f"Submitted refinement batch {batch.id} with {len(jobs)} recipes")
+        return batch.id
+
+    def poll_batch(self, batch_id: str, jobs: List[Dict[str, Any]], poll_interval: float = 30.0,
+                   timeout: Optional[float] = None) -> List[Tuple[Dict[str, Any], Optional[str]]]:
+        """
+        Wait for a refinement batch to finish and parse its results
+        Args:
+            batch_id: Batch ID returned by submit_batch
+            jobs: The same job list that was submitted (used for source metadata)
+            poll_interval: Seconds between status checks
+            timeout: Maximum seconds to wait (None waits for the completion window)
+        Returns:
+            List of (recipe_json, parse_error) tuples in the same order as jobs
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        
+        while True:
+            batch = self.client.batches.retrieve(batch_id)
+            if batch.status in self.BATCH_TERMINAL_STATUSES:
+                break
+            if deadline is not None and time.monotonic() >= deadline:
+                raise LLMRefineError(f"Timed out waiting for batch {batch_id} (status: {batch.status})")
+            time.sleep(poll_interval)
+        
+        results: List[Tuple[Optional[Dict[str, Any]], Optional[str]]] = [
+            (None, f"Batch {batch_id} ended with status: {batch.status}") for _ in jobs
+        ]
+        if not batch.output_file_id:
+            return results
+        
+        output = self.client.files.content(batch.output_file_id).text
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            index = int(item["custom_id"])
+            job = jobs[index]
+            
+            response = item.get("response") or {}
+            if item.get("error") or response.get("status_code") != 200:
+                results[index] = (None, f"LLM processing error: {item.get('error') or response.get('body')}")
+                continue
+            
+            content = response["body"]["choices"][0]["message"]["content"]
+            results[index] = self._parse_recipe_response(
+                content, job.get("source_url", ""), job.get("tiktok_author", ""), job.get("video_thumbnail", "")
+            )
+        
+        return results
+
     def refine_with_validation_retry(self, title: str, transcript: str, ocr_results: list,
                                    source_url: str = "", tiktok_author: str = "", video_thumbnail: str = "",
                                    max_validation_retries: int = 2) -> Tuple[Dict[str, Any], Optional[str]]:
@@ -250,6 +695,9 @@ Video Thumbnail: {video_thumbnail}"""
         """
         recipe_json, parse_error = self.refine_recipe(title, transcript, ocr_results, source_url, tiktok_author, video_thumbnail)
         
+        # Built on the first retry and shared by later ones; the inputs don't change between attempts
+        base_messages = None
+        
         # Retry on validation errors
         for attempt in range(max_validation_retries):
             if parse_error and "JSON" in parse_error:
@@ -259,13 +707,12 @@ Video Thumbnail: {video_thumbnail}"""
                 reprompt_content = self._create_reprompt_message(parse_error, "")
                 
                 try:
+                    if base_messages is None:
+                        base_messages = self._build_messages(title, transcript, ocr_results, source_url, tiktok_author, video_thumbnail)
+                        base_messages.append({"role": "assistant", "content": "I'll provide a valid JSON response."})
+                    
                     # Call OpenAI with reprompt
-                    response = self._call_openai([
-                        {"role": "system", "content": self.prompt_template},
-                        {"role": "user", "content": f"Title: {title}\nTranscript: {transcript}\nOCR Text: {self._prepare_ocr_text(ocr_results)}\nSource URL: {source_url}\nTikTok Author: {tiktok_author}\nVideo Thumbnail: {video_thumbnail}"},
-                        {"role": "assistant", "content": "I'll provide a valid JSON response."},
-                        {"role": "user", "content": reprompt_content}
-                    ])
+                    response = self._call_openai(base_messages + [{"role": "user", "content": reprompt_content}])
                     
                     # Parse new response
                     recipe_json, parse_error = self._extract_json_from_response(response)
@@ -278,15 +725,7 @@ Video Thumbnail: {video_thumbnail}"""
                             recipe_json = None
                         else:
                             # Add metadata to successful response
-                            recipe_json["source_url"] = source_url
-                            recipe_json["tiktok_author"] = tiktok_author
-                            recipe_json["is_public"] = True
-                            recipe_json["created_at"] = None
-                            recipe_json["updated_at"] = None
-                            recipe_json["video_thumbnail"] = video_thumbnail
-                            recipe_json["saved_by"] = []
-                            recipe_json["source_platform"] = "tiktok"
-                            recipe_json["original_job_id"] = ""
+                            self._add_source_metadata(recipe_json, source_url, tiktok_author, video_thumbnail)
                             break
                             
                 except Exception as e:
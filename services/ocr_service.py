@@ -1,42 +1,259 @@
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional, Tuple
 
+import paddleocr
 from paddleocr import PaddleOCR
+import logging
 import re
+import threading
 from difflib import SequenceMatcher
+from utils.disk_cache import DiskCache
+from utils.frame_extractor import frame_hash
+
+try:
+    from rapidfuzz import fuzz, process
+except ImportError:  # Optional: fall back to difflib for fuzzy dedupe
+    fuzz = process = None
+
+logger = logging.getLogger(__name__)
+
+# Quantity followed by a unit, e.g. "1 cup", "1/2 tsp", "200g"
+INGREDIENT_RE = re.compile(r"\b(\d+\s?(?:[\/\.]\d+)?\s?(?:cup|tbsp|tsp|g|kg|ml|l|oz|lb|teaspoon|tablespoon|gram|pound|ounce|pinch|clove|slice|can|package|stick|dash|handful|bunch|piece|quart|pint|liter|milliliter|milligram|mg|cm|mm|inch|drop)s?\b)", re.I)
+
+def _gpu_available() -> bool:
+    """Whether Paddle was built with CUDA and can see a device"""
+    try:
+        import paddle
+        return paddle.device.is_compiled_with_cuda() and paddle.device.cuda.device_count() > 0
+    except Exception:
+        return False
+
+def _paddleocr_major_version() -> int:
+    """Major version of the installed PaddleOCR (3 when it doesn't report one)"""
+    return int(str(getattr(paddleocr, '__version__', '3')).split('.')[0] or 3)
+
+def _paddleocr_options(lang: str) -> Dict[str, Any]:
+    """
+    Build PaddleOCR constructor arguments for the available hardware.
+    GPU runs in FP16; CPU runs with MKLDNN (oneDNN) kernels on half the cores.
+    OCR_DEVICE (cpu/gpu) and OCR_CPU_THREADS override the detected defaults.
+    """
+    device = os.getenv('OCR_DEVICE', '').lower() or ('gpu' if _gpu_available() else 'cpu')
+    use_gpu = device.startswith('gpu')
+    cpu_threads = int(os.getenv('OCR_CPU_THREADS', 0)) or max(1, (os.cpu_count() or 2) // 2)
+    options = {
+        "lang": lang,
+        "precision": "fp16" if use_gpu else "fp32",
+        "enable_mkldnn": not use_gpu,
+        "cpu_threads": cpu_threads,
+    }
+    if _paddleocr_major_version() >= 3:
+        options.update(
+            device=device,
+            use_textline_orientation=False,  # Disable angle classification for speed
+            text_recognition_batch_size=16,
+        )
+    else:
+        options.update(
+            use_gpu=use_gpu,
+            use_angle_cls=False,  # Disable angle classification for speed
+            rec_batch_num=16,
+        )
+    return options
 
 class OCRService:
     _instance = None
     _ocr_instance = None
+    # Guards the one-time PaddleOCR setup when several jobs start at once on the worker's threads
+    _init_lock = threading.Lock()
+    # The shared PaddleOCR predictor isn't thread-safe, so concurrent jobs take turns running inference
+    _inference_lock = threading.Lock()
+    # How long per-frame OCR results stay in the persistent OCR cache
+    OCR_CACHE_TTL_SECONDS = 30 * 86400
     
     def __new__(cls, lang: str = 'en'):
-        if cls._instance is None:
-            cls._instance = super(OCRService, cls).__new__(cls)
-            cls._instance._initialized = False
+        with cls._init_lock:
+            if cls._instance is None:
+                cls._instance = super(OCRService, cls).__new__(cls)
+                cls._instance._initialized = False
         return cls._instance
     
     def __init__(self, lang: str = 'en'):
-        if not self._initialized:
-            # Create singleton PaddleOCR instance
-            if OCRService._ocr_instance is None:
-                print("[OCRService] Initializing PaddleOCR (this may take a moment on first run)...")
-                try:
-                    OCRService._ocr_instance = PaddleOCR(
-                        use_angle_cls=False,  # Disable angle classification for speed
-                        lang=lang
-                    )
-                    print("[OCRService] PaddleOCR initialization complete!")
-                except Exception as e:
-                    print(f"[OCRService] Failed to initialize PaddleOCR: {e}")
-                    raise
-            self.ocr = OCRService._ocr_instance
-            self._initialized = True
+        with OCRService._init_lock:
+            if not self._initialized:
+                # Create singleton PaddleOCR instance
+                if OCRService._ocr_instance is None:
+                    logger.info("Initializing PaddleOCR (this may take a moment on first run)...")
+                    try:
+                        options = _paddleocr_options(lang)
+                        OCRService._ocr_instance = PaddleOCR(**options)
+                        logger.info(f"PaddleOCR initialization complete (precision={options['precision']}, mkldnn={options['enable_mkldnn']})")
+                    except Exception as e:
+                        logger.error(f"Failed to initialize PaddleOCR: {e}")
+                        raise
+                    self._warmup(OCRService._ocr_instance)
+                self.ocr = OCRService._ocr_instance
+                # Parsed text blocks keyed by frame content, so re-extracted frames (job retries,
+                # reposted videos) skip inference; OCR_CACHE_DIR unset disables it
+                cache_dir = os.getenv("OCR_CACHE_DIR")
+                self.cache = DiskCache(cache_dir) if cache_dir else None
+                self._initialized = True
+    
+    @staticmethod
+    def _warmup(ocr) -> None:
+        """Run one inference on a blank image so graph setup isn't paid by the first real job"""
+        try:
+            import numpy as np
+            ocr.ocr(np.zeros((640, 640, 3), dtype=np.uint8))
+        except Exception as e:
+            logger.warning(f"PaddleOCR warmup skipped: {e}")
     
     @classmethod
     def get_instance(cls, lang: str = 'en'):
         """Get singleton instance of OCRService"""
         return cls(lang)
 
+    def _ocr_frames(self, frame_paths: List[str]) -> List[Any]:
+        """
+        Run OCR over all frames in one batched call on PaddleOCR 3.x.
+        Falls back to one call per frame if the batch fails; PaddleOCR 2.x goes straight to
+        per-frame calls, since its ocr() exits the process on list input.
+        Args:
+            frame_paths: Image paths to process.
+        Returns:
+            Per-frame raw OCR results in single-image format, or None for frames that failed.
+        """
+        if _paddleocr_major_version() >= 3:
+            try:
+                batch = self.ocr.ocr(frame_paths)
+                if batch is not None and len(batch) == len(frame_paths):
+                    # Batched output has one page result per image; wrap each to match single-image output
+                    return [[page] for page in batch]
+                logger.warning(f"Batched OCR returned {len(batch) if batch is not None else 0} results for {len(frame_paths)} frames, retrying per frame")
+            except Exception as e:
+                logger.warning(f"Batched OCR failed, retrying per frame: {e}")
+        
+        results = []
+        for frame_path in frame_paths:
+            try:
+                results.append(self.ocr.ocr(frame_path))
+            except Exception as e:
+                logger.error(f"Error processing frame {frame_path}: {e}")
+                results.append(None)
+        return results
+
+    def _group_duplicate_frames(self, frames: List[Tuple[Path, float]]) -> List[int]:
+        """
+        Map each frame to the index of the frame whose OCR it can reuse: the last kept frame
+        when their perceptual hashes are equal, otherwise itself. Any tolerance would also group
+        same-layout ingredient cards whose text differs, since those hash only a few bits apart.
+        Only consecutive frames are grouped, so a scene that returns later is OCR'd again rather
+        than matched to an old one. Frames that can't be hashed are their own representative.
+        Args:
+            frames: List of (frame_path, timestamp) tuples.
+        Returns:
+            Representative frame index for every frame.
+        """
+        with ThreadPoolExecutor(max_workers=min(8, len(frames))) as executor:
+            hashes: List[Optional[int]] = list(executor.map(frame_hash, (frame_path for frame_path, _ in frames)))
+        
+        representative_of = []
+        last_kept = None  # (hash, index) of the most recent representative
+        for index, frame_hash_value in enumerate(hashes):
+            representative = index
+            if frame_hash_value is not None and last_kept is not None and frame_hash_value == last_kept[0]:
+                representative = last_kept[1]
+            else:
+                last_kept = (frame_hash_value, index) if frame_hash_value is not None else None
+            representative_of.append(representative)
+        
+        duplicates = len(frames) - len(set(representative_of))
+        if duplicates:
+            logger.info(f"Skipping OCR on {duplicates} repeated frames")
+        return representative_of
+
+    @staticmethod
+    def _parse_ocr_result(ocr_result: Any) -> List[Dict[str, Any]]:
+        """
+        Convert a raw single-image OCR result into filtered text blocks.
+        Args:
+            ocr_result: PaddleOCR output for one image (new dict format or old line format).
+        Returns:
+            List of {text, bbox, score} for high-confidence text.
+        """
+        text_blocks = []
+        
+        # Handle new PaddleOCR format (dictionary with rec_texts and rec_scores)
+        if ocr_result and isinstance(ocr_result[0], dict):
+            ocr_data = ocr_result[0]
+            rec_texts = ocr_data.get('rec_texts', [])
+            rec_scores = ocr_data.get('rec_scores', [])
+            rec_polys = ocr_data.get('rec_polys', [])
+            
+            for i, (text, confidence) in enumerate(zip(rec_texts, rec_scores)):
+                confidence = float(confidence)  # numpy scalar; stored results must be JSON-serializable
+                # Only include high-confidence text (score > 0.5) - lowered for better detection
+                if confidence > 0.5 and len(text.strip()) > 1:  # Minimum 2 characters
+                    # Get bounding box if available
+                    bbox = rec_polys[i] if i < len(rec_polys) else [[0, 0], [1, 0], [1, 1], [0, 1]]
+                    text_blocks.append({"text": text, "bbox": tolist_recursive(bbox), "score": confidence})
+        
+        # Handle old PaddleOCR format (list of [bbox, (text, confidence)] tuples)
+        elif ocr_result and ocr_result[0] and isinstance(ocr_result[0], list):
+            for line in ocr_result[0]:  # Each line contains [bbox, (text, confidence)]
+                if len(line) < 2 or len(line[1]) < 2:
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug(f"Skipping malformed OCR line: {line}")
+                    continue
+                bbox = line[0]  # Bounding box coordinates
+                text = line[1][0]
+                confidence = float(line[1][1])
+                # Only include high-confidence text (score > 0.5) - lowered for better detection
+                if confidence > 0.5 and len(text.strip()) > 1:  # Minimum 2 characters
+                    text_blocks.append({"text": text, "bbox": tolist_recursive(bbox), "score": confidence})
+        
+        return text_blocks
+
+    def _frame_cache_keys(self, frames: List[Tuple[Path, float]], indices: List[int]) -> Dict[int, str]:
+        """Content-addressed cache key per frame index (empty when caching is disabled)"""
+        if self.cache is None:
+            return {}
+        keys = {}
+        for i in indices:
+            try:
+                digest = hashlib.blake2b(Path(frames[i][0]).read_bytes(), digest_size=16).hexdigest()
+            except OSError as e:
+                logger.warning(f"Could not hash frame {frames[i][0]} for the OCR cache: {e}")
+                continue
+            keys[i] = f"ocr:v1:{digest}"
+        return keys
+
+    def _cached_blocks(self, cache_keys: Dict[int, str]) -> Dict[int, List[Dict[str, Any]]]:
+        """Text blocks already cached for these frames, by frame index"""
+        cached = {}
+        for i, key in cache_keys.items():
+            try:
+                blocks = self.cache.get(key)
+            except Exception as e:
+                logger.warning(f"OCR cache read failed: {e}")
+                return cached
+            if blocks is not None:
+                cached[i] = blocks
+        if cached:
+            logger.info(f"OCR cache hit for {len(cached)} of {len(cache_keys)} frames")
+        return cached
+
+    def _store_blocks(self, cache_key: Optional[str], text_blocks: List[Dict[str, Any]]) -> None:
+        if cache_key is None:
+            return
+        try:
+            self.cache.set(cache_key, text_blocks, expire=self.OCR_CACHE_TTL_SECONDS)
+        except Exception as e:
+            logger.warning(f"OCR cache write failed: {e}")
+
     def run_ocr_on_frames(self, frames: List[Tuple[Path, float]]) -> List[Dict[str, Any]]:
         """
         Run OCR on a list of frames.
@@ -46,69 +263,31 @@ class OCRService:
             List of dicts: {timestamp, text_blocks: [{text, bbox}]}
         """
         results = []
-        print(f"[OCRService] Starting OCR on {len(frames)} frames")
-        for frame_path, timestamp in frames:
-            print(f"[OCRService] Processing frame: {frame_path}")
-            try:
-                ocr_result = self.ocr.ocr(str(frame_path))
-                print(f"[OCRService] Raw OCR result type: {type(ocr_result)}")
-                print(f"[OCRService] Raw OCR result: {ocr_result}")
-            except Exception as e:
-                print(f"[OCRService] Error processing frame {frame_path}: {e}")
+        logger.info(f"Starting OCR on {len(frames)} frames")
+        if not frames:
+            return results
+        
+        # OCR one representative per run of identical consecutive frames
+        representative_of = self._group_duplicate_frames(frames)
+        representatives = sorted(set(representative_of))
+        cache_keys = self._frame_cache_keys(frames, representatives)
+        blocks_by_representative = self._cached_blocks(cache_keys)
+        misses = [i for i in representatives if i not in blocks_by_representative]
+        if misses:
+            with OCRService._inference_lock:
+                raw_results = self._ocr_frames([str(frames[i][0]) for i in misses])
+            for i, ocr_result in zip(misses, raw_results):
+                if ocr_result is None:
+                    continue
+                blocks_by_representative[i] = self._parse_ocr_result(ocr_result)
+                self._store_blocks(cache_keys.get(i), blocks_by_representative[i])
+        
+        for index, ((frame_path, timestamp), representative) in enumerate(zip(frames, representative_of)):
+            if representative not in blocks_by_representative:
                 continue
-            
-            # Filter out low-confidence results
-            text_blocks = []
-            print(f"[OCRService] Processing OCR result: {type(ocr_result)}")
-            
-            # Handle new PaddleOCR format (dictionary with rec_texts and rec_scores)
-            if ocr_result and isinstance(ocr_result[0], dict):
-                ocr_data = ocr_result[0]
-                rec_texts = ocr_data.get('rec_texts', [])
-                rec_scores = ocr_data.get('rec_scores', [])
-                rec_polys = ocr_data.get('rec_polys', [])
-                
-                print(f"[OCRService] Found {len(rec_texts)} text items in new format")
-                
-                for i, (text, confidence) in enumerate(zip(rec_texts, rec_scores)):
-                    print(f"[OCRService] Processing text {i}: '{text}' (confidence: {confidence})")
-                    
-                    # Only include high-confidence text (score > 0.5) - lowered for better detection
-                    if confidence > 0.5 and len(text.strip()) > 1:  # Minimum 2 characters
-                        # Get bounding box if available
-                        bbox = rec_polys[i] if i < len(rec_polys) else [[0, 0], [1, 0], [1, 1], [0, 1]]
-                        block = {"text": text, "bbox": tolist_recursive(bbox), "score": confidence}
-                        text_blocks.append(block)
-                        print(f"[OCRService] Added text block: {block}")
-                    else:
-                        print(f"[OCRService] Skipped text due to low confidence or short length")
-            
-            # Handle old PaddleOCR format (list of [bbox, (text, confidence)] tuples)
-            elif ocr_result and ocr_result[0] and isinstance(ocr_result[0], list):
-                print(f"[OCRService] Found {len(ocr_result[0])} text lines in old format")
-                for line in ocr_result[0]:  # Each line contains [bbox, (text, confidence)]
-                    print(f"[OCRService] Processing line: {line}")
-                    if len(line) >= 2:
-                        bbox = line[0]  # Bounding box coordinates
-                        text_info = line[1]  # (text, confidence) tuple
-                        print(f"[OCRService] Bbox: {bbox}, Text info: {text_info}")
-                        if len(text_info) >= 2:
-                            text = text_info[0]
-                            confidence = float(text_info[1])
-                            print(f"[OCRService] Text: '{text}', Confidence: {confidence}")
-                            # Only include high-confidence text (score > 0.5) - lowered for better detection
-                            if confidence > 0.5 and len(text.strip()) > 1:  # Minimum 2 characters
-                                block = {"text": text, "bbox": tolist_recursive(bbox), "score": confidence}
-                                text_blocks.append(block)
-                                print(f"[OCRService] Added text block: {block}")
-                            else:
-                                print(f"[OCRService] Skipped text due to low confidence or short length")
-                        else:
-                            print(f"[OCRService] Invalid text_info format: {text_info}")
-                    else:
-                        print(f"[OCRService] Invalid line format: {line}")
-            else:
-                print(f"[OCRService] No OCR result or empty result")
+            text_blocks = blocks_by_representative[representative]
+            if representative != index:
+                text_blocks = [dict(block) for block in text_blocks]  # Don't share dicts between frames
             
             if text_blocks:  # Only add frames with detected text
                 results.append({
@@ -116,13 +295,9 @@ class OCRService:
                     "text_blocks": text_blocks,
                     "frame_path": str(frame_path)
                 })
-                print(f"[OCRService] Found {len(text_blocks)} text blocks in {frame_path}")
-            else:
-                print(f"[OCRService] No text detected in {frame_path}")
+                logger.debug("Found %d text blocks in %s", len(text_blocks), frame_path)
         
-        print(f"[OCRService] Final results: {len(results)} frames with text")
-        for i, result in enumerate(results):
-            print(f"[OCRService] Frame {i}: {len(result['text_blocks'])} text blocks")
+        logger.info(f"OCR complete: {len(results)} of {len(frames)} frames with text")
         return results
 
     def extract_text(self, frames: List[Tuple[Path, float]]) -> List[Dict[str, Any]]:
@@ -145,11 +320,31 @@ class OCRService:
         Returns:
             Deduplicated list of text_blocks
         """
+        texts = [block["text"].strip().lower() for block in text_blocks]
+        if not texts:
+            return []
+        
+        if process is not None:
+            # Score every pair in one vectorized call; entries below the cutoff come back as 0
+            cutoff = threshold * 100
+            scores = process.cdist(texts, texts, scorer=fuzz.ratio, score_cutoff=cutoff, workers=-1)
+            kept = []
+            for i in range(len(texts)):
+                if not kept or not (scores[i, kept] > cutoff).any():
+                    kept.append(i)
+            return [text_blocks[i] for i in kept]
+        
         deduped = []
         seen = []
-        for block in text_blocks:
-            text = block["text"].strip().lower()
-            if any(SequenceMatcher(None, text, s).ratio() > threshold for s in seen):
+        for block, text in zip(text_blocks, texts):
+            is_duplicate = False
+            for s in seen:
+                matcher = SequenceMatcher(None, text, s)
+                # Cheap upper bounds rule out most pairs before the full ratio
+                if matcher.real_quick_ratio() > threshold and matcher.quick_ratio() > threshold and matcher.ratio() > threshold:
+                    is_duplicate = True
+                    break
+            if is_duplicate:
                 continue
             seen.append(text)
             deduped.append(block)
@@ -164,17 +359,17 @@ class OCRService:
         Returns:
             List of ingredient candidate strings
         """
-        ingredient_regex = re.compile(r"\b(\d+\s?(?:[\/\.]\d+)?\s?(?:cup|tbsp|tsp|g|kg|ml|l|oz|lb|teaspoon|tablespoon|gram|pound|ounce|pinch|clove|slice|can|package|stick|dash|handful|bunch|piece|quart|pint|liter|milliliter|milligram|mg|cm|mm|inch|drop)s?\b)", re.I)
         candidates = []
         for block in text_blocks:
             text = block["text"]
-            if ingredient_regex.search(text):
+            if INGREDIENT_RE.search(text):
                 candidates.append(text)
         return candidates 
 
 def tolist_recursive(x):
     if hasattr(x, 'tolist'):
-        return tolist_recursive(x.tolist())
+        # numpy converts nested arrays and unboxes scalars in C
+        return x.tolist()
     elif isinstance(x, (list, tuple)):
         return [tolist_recursive(i) for i in x]
     elif hasattr(x, 'item'):
@@ -4,6 +4,10 @@ Recipe Enrichment Service for adding user-specific data to recipe responses
 
 from typing import List, Dict, Any, Optional
 from services.like_service import like_service
+from services.firestore_service import recipe_service
+
+# Recipes in these states never report a like (matches LikeService.has_liked)
+UNAVAILABLE_STATUSES = frozenset({'deleted', 'draft', 'processing'})
 
 
 class RecipeEnrichmentService:
@@ -24,14 +28,19 @@ class RecipeEnrichmentService:
             Recipe dictionary with added user-specific fields
         """
         # Add liked status
+        liked = False  # Unauthenticated users haven't liked anything
         if user_id:
             try:
-                recipe['liked'] = self.like_service.has_liked(recipe['id'], user_id) or False
+                liked = self.like_service.has_liked(recipe['id'], user_id) or False
             except Exception as e:
                 print(f"[RecipeEnrichment] Error checking like status: {e}")
-                recipe['liked'] = False
-        else:
-            recipe['liked'] = False  # Unauthenticated users haven't liked anything
+        
+        return self._apply_user_data(recipe, user_id, liked)
+    
+    @staticmethod
+    def _apply_user_data(recipe: Dict[str, Any], user_id: Optional[str], liked: bool) -> Dict[str, Any]:
+        """Set the user-specific boolean fields on a recipe"""
+        recipe['liked'] = liked
         
         # Add created_by_me status
         recipe['created_by_me'] = recipe.get('user_id') == user_id if user_id else False
@@ -59,14 +68,18 @@ class RecipeEnrichmentService:
         if not recipes:
             return []
         
-        # For performance, we could batch the like status checks
-        # But for now, we'll enrich each recipe individually
-        enriched_recipes = []
-        for recipe in recipes:
-            enriched_recipe = self.enrich_recipe_with_user_data(recipe, user_id)
-            enriched_recipes.append(enriched_recipe)
+        # Fetch like status for the whole page in one round-trip
+        liked_ids = set()
+        if user_id:
+            try:
+                liked_ids = self.like_service.get_liked_recipe_ids(
+                    [recipe['id'] for recipe in recipes if recipe.get('status', 'active') not in UNAVAILABLE_STATUSES],
+                    user_id
+                )
+            except Exception as e:
+                print(f"[RecipeEnrichment] Error checking like status: {e}")
         
-        return enriched_recipes
+        return [self._apply_user_data(recipe, user_id, recipe['id'] in liked_ids) for recipe in recipes]
     
     def get_user_recipes(self, user_id: str, page: int = 1, limit: int = 10) -> List[Dict[str, Any]]:
         """
@@ -81,21 +94,18 @@ class RecipeEnrichmentService:
             List of recipes (created + liked by user)
         """
         try:
-            # Import here to avoid circular imports
-            from services.firestore_service import recipe_service
-            
             # 1. Get recipes created by user
             created_recipes = recipe_service.get_recipes(user_id=user_id, limit=limit)
+            created_ids = {recipe['id'] for recipe in created_recipes}
             
-            # 2. Get recipe IDs that user liked
-            liked_recipe_ids = self.like_service.get_user_likes(user_id, limit=limit)
+            # 2. Get recipe IDs that user liked, skipping ones they also created
+            liked_recipe_ids = [
+                recipe_id for recipe_id in self.like_service.get_user_likes(user_id, limit=limit)
+                if recipe_id not in created_ids
+            ]
             
-            # 3. Fetch the actual liked recipe documents
-            liked_recipes = []
-            for recipe_id in liked_recipe_ids:
-                recipe = recipe_service.get_recipe_by_id(recipe_id)
-                if recipe and recipe not in created_recipes:  # Avoid duplicates
-                    liked_recipes.append(recipe)
+            # 3. Fetch the actual liked recipe documents in one round-trip
+            liked_recipes = recipe_service.get_recipes_by_ids(liked_recipe_ids)
             
             # 4. Combine and sort by updated_at or created_at
             all_recipes = created_recipes + liked_recipes
@@ -130,8 +140,6 @@ class RecipeEnrichmentService:
             List of liked recipes
         """
         try:
-            from services.firestore_service import recipe_service
-            
             # Get recipe IDs that user liked
             all_liked_recipe_ids = self.like_service.get_user_likes(user_id, limit=1000)
             
@@ -140,12 +148,8 @@ class RecipeEnrichmentService:
             end_index = start_index + limit
             paginated_recipe_ids = all_liked_recipe_ids[start_index:end_index]
             
-            # Fetch the actual recipe documents
-            liked_recipes = []
-            for recipe_id in paginated_recipe_ids:
-                recipe = recipe_service.get_recipe_by_id(recipe_id)
-                if recipe:
-                    liked_recipes.append(recipe)
+            # Fetch the actual recipe documents in one round-trip
+            liked_recipes = recipe_service.get_recipes_by_ids(paginated_recipe_ids)
             
             # Enrich with user data (will have liked=True for all)
             enriched_recipes = self.enrich_recipes_with_user_data(liked_recipes, user_id)
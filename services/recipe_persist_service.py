@@ -2,21 +2,89 @@
 """
 Service for persisting recipe data from ingest_jobs to recipes collection
 """
-import uuid
+import logging
 from datetime import datetime, timezone
 from typing import Dict, Any, Optional
 from firebase_admin import firestore
+from google.api_core.exceptions import NotFound
 
 from config.firebase_config import get_firestore_db
 from errors import PipelineStatus
 
+logger = logging.getLogger(__name__)
+
 
 class RecipePersistService:
     """Service for persisting recipe data to Firestore recipes collection"""
     
+    # Fields already written to the stub recipe by TikTokIngestService.mock_create_job;
+    # updates leave them alone so the stub's original createdAt is preserved
+    STUB_FIELDS = frozenset({"owner_uid", "user_id", "createdAt"})
+    
+    # (field, default) pairs copied straight from the LLM recipe into the recipes document.
+    # Defaults are immutable so no fresh list is allocated per missing field; Firestore
+    # stores tuples as arrays.
+    RECIPE_FIELD_SPEC = (
+        ("title", ""),
+        ("description", ""),
+        ("ingredients", ()),
+        ("instructions", ()),
+        ("prep_time", None),
+        ("cook_time", None),
+        ("servings", None),
+        ("difficulty", None),
+        ("tags", ()),
+        ("is_public", True),
+        ("video_thumbnail", ""),
+        ("saved_by", ()),
+        ("tiktok_author", ""),
+        # Likes fields - initialize for new recipes
+        ("likes_count", 0),
+        ("last_liked_by", None),
+    )
+    
     def __init__(self):
         self.db = get_firestore_db()
     
+    @classmethod
+    def _build_recipe_doc(cls, recipe_json: Dict[str, Any], owner_uid: str, source_url: str,
+                          original_job_id: str, now: str) -> Dict[str, Any]:
+        """Flatten LLM recipe data plus ownership/source metadata into a recipes document"""
+        # Flatten recipe data directly into document (not nested under recipe_json)
+        recipe_doc = {field: recipe_json.get(field, default) for field, default in cls.RECIPE_FIELD_SPEC}
+        recipe_doc.update({
+            "nutrition": recipe_json.get("nutrition", {}),
+            "user_id": owner_uid,  # Use owner_uid as user_id for frontend ownership validation
+            "created_at": recipe_json.get("created_at") or now,  # Use current time if not provided
+            "updated_at": recipe_json.get("updated_at") or now,  # Use current time if not provided
+            
+            # Metadata fields
+            "owner_uid": owner_uid,
+            "createdAt": now,
+            "updatedAt": now,
+            "source_url": source_url,
+            "original_job_id": original_job_id,
+            "status": PipelineStatus.ACTIVE  # Recipe is ready for use
+        })
+        return recipe_doc
+    
+    @classmethod
+    def _build_recipe_update(cls, recipe_doc: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Narrow a full recipe document to the fields an update of the stub recipe must write
+        
+        Like counters are written as no-op transforms so a concurrent like is never clobbered
+        by the ingest pipeline, while a stub without them still gets initialised. saved_by is
+        merged in only when non-empty: Firestore rejects an ArrayUnion with no values.
+        """
+        update = {k: v for k, v in recipe_doc.items() if k not in cls.STUB_FIELDS}
+        update["likes_count"] = firestore.Increment(0)
+        saved_by = update.pop("saved_by", None)
+        if saved_by:
+            update["saved_by"] = firestore.ArrayUnion(list(saved_by))
+        del update["last_liked_by"]
+        return update
+    
     def save_recipe(self, 
                    recipe_json: Dict[str, Any], 
                    owner_uid: str,
@@ -37,60 +105,32 @@ class RecipePersistService:
             recipe_id if successful, None if failed
         """
         if not self.db:
-            print("[RecipePersistService] No Firestore connection available")
+            logger.warning("No Firestore connection available")
             return None
         
         if not existing_recipe_id:
-            print(f"[RecipePersistService] ERROR: No existing_recipe_id provided for TikTok ingestion")
+            logger.error("No existing_recipe_id provided for TikTok ingestion")
             return None
         
         try:
             recipe_id = existing_recipe_id
             now = datetime.now(timezone.utc).isoformat()
             
-            # Flatten recipe data directly into document (not nested under recipe_json)
-            recipe_doc = {
-                # Recipe fields from LLM
-                "title": recipe_json.get("title", ""),
-                "description": recipe_json.get("description", ""),
-                "ingredients": recipe_json.get("ingredients", []),
-                "instructions": recipe_json.get("instructions", []),
-                "prep_time": recipe_json.get("prep_time"),
-                "cook_time": recipe_json.get("cook_time"),
-                "servings": recipe_json.get("servings"),
-                "difficulty": recipe_json.get("difficulty"),
-                "tags": recipe_json.get("tags", []),
-                "nutrition": recipe_json.get("nutrition", {}),
-                "is_public": recipe_json.get("is_public", True),
-                "user_id": owner_uid,  # Use owner_uid as user_id for frontend ownership validation
-                "created_at": recipe_json.get("created_at") or now,  # Use current time if not provided
-                "updated_at": recipe_json.get("updated_at") or now,  # Use current time if not provided
-                "video_thumbnail": recipe_json.get("video_thumbnail", ""),
-                "saved_by": recipe_json.get("saved_by", []),
-                "tiktok_author": recipe_json.get("tiktok_author", ""),
-                
-                # Likes fields - initialize for new recipes
-                "likes_count": recipe_json.get("likes_count", 0),
-                "last_liked_by": recipe_json.get("last_liked_by", None),
-                
-                # Metadata fields
-                "owner_uid": owner_uid,
-                "createdAt": now,
-                "updatedAt": now,
-                "source_url": source_url,
-                "original_job_id": original_job_id,
-                "status": PipelineStatus.ACTIVE  # Recipe is ready for use
-            }
+            recipe_doc = self._build_recipe_doc(recipe_json, owner_uid, source_url, original_job_id, now)
             
             # Always update the existing document (never create new one for TikTok ingestion)
             doc_ref = self.db.collection("recipes").document(recipe_id)
-            doc_ref.set(recipe_doc)  # Use set to overwrite completely with flattened structure
+            try:
+                doc_ref.update(self._build_recipe_update(recipe_doc))
+            except NotFound:
+                # No stub to update: write the full flattened document instead
+                doc_ref.set(recipe_doc)
             
-            print(f"[RecipePersistService] Successfully updated recipe: {recipe_id}")
+            logger.debug("Successfully updated recipe: %s", recipe_id)
             return recipe_id
             
         except Exception as e:
-            print(f"[RecipePersistService] Error saving recipe: {e}")
+            logger.error("Error saving recipe: %s", e)
             return None
     
     def update_job_with_recipe_id(self, job_id: str, recipe_id: str) -> bool:
@@ -105,7 +145,7 @@ class RecipePersistService:
             True if successful, False otherwise
         """
         if not self.db:
-            print("[RecipePersistService] No Firestore connection available")
+            logger.warning("No Firestore connection available")
             return False
         
         try:
@@ -120,11 +160,11 @@ class RecipePersistService:
             # Update ingest_jobs collection
             self.db.collection("ingest_jobs").document(job_id).update(update_data)
             
-            print(f"[RecipePersistService] Successfully updated job {job_id}")
+            logger.debug("Successfully updated job %s", job_id)
             return True
             
         except Exception as e:
-            print(f"[RecipePersistService] Error updating job: {e}")
+            logger.error("Error updating job: %s", e)
             return False
     
     def save_recipe_and_update_job(self, 
@@ -146,29 +186,47 @@ class RecipePersistService:
         Returns:
             recipe_id if successful, None if failed
         """
-        print(f"[RecipePersistService] Starting recipe persistence workflow for job: {job_id}")
+        logger.debug("Starting recipe persistence workflow for job: %s", job_id)
         
-        # Step 1: Save recipe to recipes collection
-        recipe_id = self.save_recipe(
-            recipe_json=recipe_json,
-            owner_uid=owner_uid,
-            source_url=source_url,
-            original_job_id=job_id,
-            existing_recipe_id=existing_recipe_id
-        )
-        
-        if not recipe_id:
-            print(f"[RecipePersistService] Failed to save recipe for job {job_id}")
+        if not self.db:
+            logger.warning("No Firestore connection available")
             return None
         
-        # Step 2: Update job with recipe_id
-        success = self.update_job_with_recipe_id(job_id, recipe_id)
+        if not existing_recipe_id:
+            logger.error("No existing_recipe_id provided for TikTok ingestion")
+            return None
         
-        if not success:
-            print(f"[RecipePersistService] Failed to update job {job_id} with recipe_id {recipe_id}")
+        try:
+            recipe_id = existing_recipe_id
+            now = datetime.now(timezone.utc).isoformat()
+            
+            recipe_ref = self.db.collection("recipes").document(recipe_id)
+            recipe_doc = self._build_recipe_doc(recipe_json, owner_uid, source_url, job_id, now)
+            job_ref = self.db.collection("ingest_jobs").document(job_id)
+            job_update = {
+                "status": PipelineStatus.COMPLETED,
+                "recipe_id": recipe_id,
+                "updatedAt": now
+            }
+            
+            # Write the recipe and complete the job in one atomic commit: either both land or neither does
+            batch = self.db.batch()
+            batch.update(recipe_ref, self._build_recipe_update(recipe_doc))
+            batch.update(job_ref, job_update)
+            try:
+                batch.commit()
+            except NotFound:
+                # No stub to update: write the full flattened document instead
+                batch = self.db.batch()
+                batch.set(recipe_ref, recipe_doc)
+                batch.update(job_ref, job_update)
+                batch.commit()
+            
+        except Exception as e:
+            logger.error("Failed to save recipe %s for job %s: %s", existing_recipe_id, job_id, e)
             return None
         
-        print(f"[RecipePersistService] Recipe persistence workflow completed successfully")
+        logger.debug("Recipe persistence workflow completed for job: %s", job_id)
         return recipe_id
     
     def get_recipe_by_id(self, recipe_id: str) -> Optional[Dict[str, Any]]:
@@ -182,7 +240,7 @@ class RecipePersistService:
             Recipe document data if found, None otherwise
         """
         if not self.db:
-            print("[RecipePersistService] No Firestore connection available")
+            logger.warning("No Firestore connection available")
             return None
         
         try:
@@ -190,8 +248,8 @@ class RecipePersistService:
             if doc.exists:
                 return doc.to_dict()
             else:
-                print(f"[RecipePersistService] Recipe {recipe_id} not found")
+                logger.debug("Recipe %s not found", recipe_id)
                 return None
         except Exception as e:
-            print(f"[RecipePersistService] Error retrieving recipe {recipe_id}: {e}")
+            logger.error("Error retrieving recipe %s: %s", recipe_id, e)
             return None 
\ No newline at end of file
@@ -7,14 +7,61 @@ if they meet minimum standards. Used for intelligent fallback decisions.
 
 import logging
 import re
+from bisect import bisect_left
 from dataclasses import dataclass
 from typing import Dict, List, Any
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Measurement pattern: a number followed by a unit or a size/count word
+_MEASURE_RE = re.compile(
+    r'\b\d+(?:\.\d+)?\s*(?:cup|tbsp|tsp|oz|lb|g|kg|ml|l|pound|tablespoon|teaspoon|inch|large|medium|small|cloves?|bunch|bulbs?)\b',
+    re.IGNORECASE
+)
+# Matches at most once per _ITEM_SEPARATOR-delimited item: each match must start at an
+# item boundary and stays within that item, so findall() counts items with a measurement
+_ITEM_SEPARATOR = '\x00'
+_MEASURED_ITEM_RE = re.compile(r'(?<![^\x00])[^\x00]*?' + _MEASURE_RE.pattern, re.IGNORECASE)
+_TIMING_RE = re.compile(r'\b\d+\s*(?:minute|min|hour|hr|second|sec)s?\b', re.IGNORECASE)
+
+# Analyses of an empty ingredient / step list, shared by the empty-recipe fast path
+_NO_INGREDIENTS_ANALYSIS = {'has_measurements': False, 'measurement_ratio': 0.0}
+_NO_STEPS_ANALYSIS = {'avg_step_length': 0, 'has_detailed_steps': False, 'vague_step_count': 0, 'has_timing': False}
+
+# Confidence thresholds used by the fallback rules, lowest first
+_FALLBACK_CONFIDENCE_THRESHOLDS = (0.7, 0.75, 0.8)
+
+
+def _build_fallback_table() -> Dict[tuple, tuple]:
+    """
+    Precompute the fallback reason templates for every combination of rule inputs:
+    (confidence level, meets minimum standards, very low quality score, missing >= 2 components).
+    Confidence level n means the confidence exceeds the first n thresholds.
+    """
+    table = {}
+    for level in range(len(_FALLBACK_CONFIDENCE_THRESHOLDS) + 1):
+        for meets_minimum in (False, True):
+            for very_low_quality in (False, True):
+                for many_missing in (False, True):
+                    reasons = []
+                    # Recipe doesn't meet minimum standards but confidence was high (likely false positive)
+                    if not meets_minimum and level >= 1:
+                        reasons.append("Recipe incomplete despite high AI confidence ({confidence:.2f})")
+                    # Quality score is very low but confidence was high
+                    if very_low_quality and level >= 3:
+                        reasons.append("Very low quality score ({quality:.2f}) despite high confidence")
+                    # Missing critical components
+                    if many_missing and level >= 2:
+                        reasons.append("Missing {missing} critical components")
+                    table[level, meets_minimum, very_low_quality, many_missing] = tuple(reasons)
+    return table
+
+
+_FALLBACK_TABLE = _build_fallback_table()
+
+@dataclass(slots=True, frozen=True)
 class RecipeQualityResult:
-    """Result of recipe quality analysis"""
+    """Result of recipe quality analysis (immutable once produced by the analyzer)"""
     is_complete: bool
     quality_score: float  # 0.0 to 1.0
     missing_components: List[str]
@@ -53,14 +100,19 @@ class RecipeQualityAnalyzer:
             steps = recipe_json.get('instructions', [])  # Use 'instructions' field, not 'steps'
             title = recipe_json.get('title', '')
             
-            # Analyze components
-            ingredient_analysis = self._analyze_ingredients(ingredients)
-            step_analysis = self._analyze_steps(steps)
-            timing_analysis = self._analyze_timing(recipe_json, steps)
+            # Analyze components. An LLM result with neither ingredients nor steps has nothing
+            # to scan, so skip straight to the precomputed analysis (only explicit timing fields
+            # and the title can still score)
+            if not ingredients and not steps:
+                ingredient_analysis = _NO_INGREDIENTS_ANALYSIS
+                step_analysis = {**_NO_STEPS_ANALYSIS, 'has_timing': self._has_timing_fields(recipe_json)}
+            else:
+                ingredient_analysis = self._analyze_ingredients(ingredients)
+                step_analysis = self._scan_steps(recipe_json, steps)
             
-            # Calculate quality score
+            # Calculate quality score (the fused step scan carries the timing result too)
             quality_score = self._calculate_quality_score(
-                ingredient_analysis, step_analysis, timing_analysis, title
+                ingredient_analysis, step_analysis, step_analysis, title
             )
             
             # Determine missing components
@@ -77,16 +129,15 @@ class RecipeQualityAnalyzer:
                 missing_components.append("ingredient measurements")
                 quality_issues.append("Most ingredients lack specific measurements")
             
-            if not timing_analysis['has_timing']:
+            if not step_analysis['has_timing']:
                 quality_issues.append("No cooking times or temperatures specified")
             
             if not title.strip():
                 quality_issues.append("Missing or empty recipe title")
             
             # Check for vague or incomplete steps
-            vague_steps = [step for step in steps if len(step.strip()) < 10]
-            if len(vague_steps) > 0:
-                quality_issues.append(f"{len(vague_steps)} cooking steps are too vague or short")
+            if step_analysis['vague_step_count'] > 0:
+                quality_issues.append(f"{step_analysis['vague_step_count']} cooking steps are too vague or short")
             
             # Determine overall completeness
             is_complete = (
@@ -109,7 +160,7 @@ class RecipeQualityAnalyzer:
                 ingredient_count=len(ingredients),
                 step_count=len(steps),
                 has_measurements=ingredient_analysis['has_measurements'],
-                has_timing=timing_analysis['has_timing'],
+                has_timing=step_analysis['has_timing'],
                 meets_minimum_standards=meets_minimum_standards
             )
             
@@ -123,28 +174,23 @@ class RecipeQualityAnalyzer:
     def _analyze_ingredients(self, ingredients: List[Dict]) -> Dict:
         """Analyze ingredient quality and completeness"""
         if not ingredients:
-            return {'has_measurements': False, 'measurement_ratio': 0.0}
+            return dict(_NO_INGREDIENTS_ANALYSIS)
         
-        ingredients_with_measurements = 0
+        # Structured ingredients count when they have a name and a non-blank quantity
+        # (any quantity containing a measurement is non-blank, so no regex is needed)
+        ingredients_with_measurements = sum(
+            1 for ingredient in ingredients
+            if isinstance(ingredient, dict)
+            and ingredient.get('name', '').strip()
+            and ingredient.get('quantity', '').strip()
+        )
         
-        for ingredient in ingredients:
-            if isinstance(ingredient, dict):
-                # Check for name and quantity fields (correct LLM schema)
-                has_name = bool(ingredient.get('name', '').strip())
-                has_quantity = bool(ingredient.get('quantity', '').strip())
-                
-                # Also check if quantity contains measurement patterns
-                quantity = ingredient.get('quantity', '')
-                measurement_pattern = r'\b\d+(?:\.\d+)?(?:\s*(?:cup|tbsp|tsp|oz|lb|g|kg|ml|l|pound|tablespoon|teaspoon|inch|large|medium|small|cloves?|bunch|bulbs?))\b'
-                has_measurement = bool(re.search(measurement_pattern, quantity.lower())) if quantity else False
-                
-                if has_name and (has_quantity or has_measurement):
-                    ingredients_with_measurements += 1
-            elif isinstance(ingredient, str):
-                # Check for measurement patterns in string format
-                measurement_pattern = r'\b\d+(?:\.\d+)?\s*(?:cup|tbsp|tsp|oz|lb|g|kg|ml|l|pound|tablespoon|teaspoon)\b'
-                if re.search(measurement_pattern, ingredient.lower()):
-                    ingredients_with_measurements += 1
+        # Free-text ingredients are scanned in one regex pass over the joined list
+        text_ingredients = [ingredient for ingredient in ingredients if isinstance(ingredient, str)]
+        if text_ingredients:
+            ingredients_with_measurements += len(
+                _MEASURED_ITEM_RE.findall(_ITEM_SEPARATOR.join(text_ingredients))
+            )
         
         measurement_ratio = ingredients_with_measurements / len(ingredients)
         has_measurements = measurement_ratio >= 0.7  # At least 70% have measurements
@@ -154,39 +200,51 @@ class RecipeQualityAnalyzer:
             'measurement_ratio': measurement_ratio
         }
     
-    def _analyze_steps(self, steps: List[str]) -> Dict:
-        """Analyze cooking step quality"""
-        if not steps:
-            return {'avg_step_length': 0, 'has_detailed_steps': False}
+    @staticmethod
+    def _has_timing_fields(recipe_json: Dict) -> bool:
+        """Check for explicit timing fields"""
+        return bool(recipe_json.get('prep_time') or recipe_json.get('cook_time') or recipe_json.get('total_time'))
+    
+    def _scan_steps(self, recipe_json: Dict, steps: List[str]) -> Dict:
+        """Analyze step detail, vagueness and timing in a single pass over the steps"""
+        has_timing = self._has_timing_fields(recipe_json)
         
-        step_lengths = [len(step.strip()) for step in steps if isinstance(step, str)]
-        avg_step_length = sum(step_lengths) / len(step_lengths) if step_lengths else 0
+        total_length = 0
+        text_steps = 0
+        vague_step_count = 0
+        for step in steps or ():
+            if not isinstance(step, str):
+                continue
+            stripped = step.strip()
+            length = len(stripped)
+            total_length += length
+            text_steps += 1
+            if length < 10:
+                vague_step_count += 1
+            if not has_timing and _TIMING_RE.search(stripped):
+                has_timing = True
         
-        # Consider steps detailed if average length > 20 characters
-        has_detailed_steps = avg_step_length > 20
+        avg_step_length = total_length / text_steps if text_steps else 0
         
         return {
             'avg_step_length': avg_step_length,
-            'has_detailed_steps': has_detailed_steps
+            # Consider steps detailed if average length > 20 characters
+            'has_detailed_steps': avg_step_length > 20,
+            'vague_step_count': vague_step_count,
+            'has_timing': has_timing
+        }
+    
+    def _analyze_steps(self, steps: List[str]) -> Dict:
+        """Analyze cooking step quality"""
+        analysis = self._scan_steps({}, steps)
+        return {
+            'avg_step_length': analysis['avg_step_length'],
+            'has_detailed_steps': analysis['has_detailed_steps']
         }
     
     def _analyze_timing(self, recipe_json: Dict, steps: List[str]) -> Dict:
         """Analyze timing information in recipe"""
-        has_timing = False
-        
-        # Check for explicit timing fields
-        if recipe_json.get('prep_time') or recipe_json.get('cook_time') or recipe_json.get('total_time'):
-            has_timing = True
-        
-        # Check for timing in steps
-        if not has_timing and steps:
-            timing_pattern = r'\b\d+\s*(?:minute|min|hour|hr|second|sec)s?\b'
-            for step in steps:
-                if isinstance(step, str) and re.search(timing_pattern, step.lower()):
-                    has_timing = True
-                    break
-        
-        return {'has_timing': has_timing}
+        return {'has_timing': self._scan_steps(recipe_json, steps)['has_timing']}
     
     def _calculate_quality_score(self, ingredient_analysis: Dict, step_analysis: Dict, 
                                 timing_analysis: Dict, title: str) -> float:
@@ -237,24 +295,20 @@ class RecipeQualityAnalyzer:
         Returns:
             Dict with fallback decision and reasoning
         """
-        should_fallback = False
-        reasons = []
-        
-        # Trigger fallback if recipe doesn't meet minimum standards
-        # but original confidence was high (indicating a potential false positive)
-        if not recipe_quality.meets_minimum_standards and original_confidence > 0.7:
-            should_fallback = True
-            reasons.append(f"Recipe incomplete despite high AI confidence ({original_confidence:.2f})")
-        
-        # Trigger fallback if quality score is very low but confidence was high
-        if recipe_quality.quality_score < 0.3 and original_confidence > 0.8:
-            should_fallback = True
-            reasons.append(f"Very low quality score ({recipe_quality.quality_score:.2f}) despite high confidence")
-        
-        # Trigger fallback if missing critical components
-        if len(recipe_quality.missing_components) >= 2 and original_confidence > 0.75:
-            should_fallback = True
-            reasons.append(f"Missing {len(recipe_quality.missing_components)} critical components")
+        missing_count = len(recipe_quality.missing_components)
+        confidence_level = bisect_left(_FALLBACK_CONFIDENCE_THRESHOLDS, original_confidence)
+        templates = _FALLBACK_TABLE[
+            confidence_level,
+            recipe_quality.meets_minimum_standards,
+            recipe_quality.quality_score < 0.3,
+            missing_count >= 2
+        ]
+        should_fallback = bool(templates)
+        reasons = [
+            template.format(confidence=original_confidence, quality=recipe_quality.quality_score,
+                            missing=missing_count)
+            for template in templates
+        ]
         
         return {
             'should_fallback': should_fallback,
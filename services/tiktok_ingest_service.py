@@ -1,10 +1,79 @@
+import logging
+import threading
+import time
 import uuid
-import numpy as np
-import json
-from datetime import datetime, timezone
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
 from config.firebase_config import get_firestore_db
 from errors import PipelineStatus
 
+logger = logging.getLogger(__name__)
+
+# Short-lived cache for job status polls; the frontend polls every few seconds
+JOB_STATUS_CACHE_TTL_SECONDS = 2.0
+JOB_STATUS_CACHE_MAX_SIZE = 2048
+# Every status a pipeline run can end on (the draft statuses are final when persistence is skipped)
+TERMINAL_STATUSES = frozenset({
+    PipelineStatus.DRAFT_PARSED,
+    PipelineStatus.DRAFT_PARSED_WITH_ERRORS,
+    PipelineStatus.LLM_FAILED_BUT_CONTINUED,
+    PipelineStatus.COMPLETED,
+    PipelineStatus.FAILED,
+})
+
+# Frames of OCR text kept on the job document (Firestore document size limit)
+MAX_SIMPLIFIED_OCR_FRAMES = 20
+
+# job_id -> (expires_at, job status response), least recently stored first
+_job_status_cache: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+_job_status_cache_lock = threading.Lock()
+
+# Background writer for job document updates nothing in the pipeline reads back
+# (OCR results), so the task thread does not block on the Firestore round trip
+_background_write_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="firestore-write")
+
+
+def _cached_job_status(job_id: str) -> Optional[Dict]:
+    """Return a fresh cached copy of a job status response, or None on miss/expiry"""
+    with _job_status_cache_lock:
+        entry = _job_status_cache.get(job_id)
+        if entry is None:
+            return None
+        expires_at, job_status = entry
+        if expires_at <= time.monotonic():
+            del _job_status_cache[job_id]
+            return None
+        return dict(job_status)
+
+
+def _cache_job_status(job_id: str, job_status: Dict) -> None:
+    """
+    Cache a job status response for the next few polls.
+    
+    Terminal statuses are never cached (and drop any stale entry) so the poll that
+    observes completion or failure always reads authoritative data.
+    """
+    with _job_status_cache_lock:
+        if job_status.get("status") in TERMINAL_STATUSES:
+            _job_status_cache.pop(job_id, None)
+            return
+        _job_status_cache[job_id] = (time.monotonic() + JOB_STATUS_CACHE_TTL_SECONDS, dict(job_status))
+        _job_status_cache.move_to_end(job_id)
+        if len(_job_status_cache) > JOB_STATUS_CACHE_MAX_SIZE:
+            _job_status_cache.popitem(last=False)
+
+
+def utcnow_iso() -> str:
+    """
+    Current UTC time as an ISO 8601 string with microseconds, e.g. 2024-01-01T12:00:00.000000+00:00.
+    
+    Built from time.time_ns() with integer math instead of datetime.now(timezone.utc).isoformat().
+    Unlike isoformat() the microseconds are always present, so the strings stay fixed width.
+    """
+    seconds, nanoseconds = divmod(time.time_ns(), 1_000_000_000)
+    return f"{time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(seconds))}.{nanoseconds // 1000:06d}+00:00"
+
 
 def extract_ai_reasoning_from_data(job_data):
     """Extract AI reasoning and OCR decision data from Firestore job document"""
@@ -44,47 +113,111 @@ def extract_ai_reasoning_from_data(job_data):
     return ai_data
 
 
-def serialize_for_firestore(obj):
-    """Recursively serialize objects to be Firestore-compatible"""
-    if obj is None:
-        return None
-    elif isinstance(obj, (str, int, float, bool)):
+# Job status response fields, in response order: copied from the job document, then from
+# the AI reasoning extracted from its status updates, then the total pipeline duration
+JOB_STATUS_DOC_FIELDS = (
+    "title", "transcript", "error_code", "recipe_json", "parse_errors", "llm_model_used",
+    "llm_processing_time_seconds", "llm_processing_completed_at", "has_parse_errors",
+    "recipe_stats", "llm_error_message", "recipe_id",
+)
+JOB_STATUS_AI_REASONING_FIELDS = (
+    "data_sufficiency_analysis", "ocr_was_skipped", "ocr_skip_reason", "ocr_confidence_score",
+    "ocr_decision_factors", "estimated_completeness", "pipeline_performance",
+)
+
+# Response for a job that cannot be read: queued with every other field unset
+_FALLBACK_JOB_STATUS = {
+    "status": PipelineStatus.QUEUED,
+    **dict.fromkeys(JOB_STATUS_DOC_FIELDS + JOB_STATUS_AI_REASONING_FIELDS + ("total_duration_seconds",))
+}
+
+
+def job_status_from_data(data):
+    """Build the job status response returned to pollers from a Firestore job document"""
+    # Extract AI reasoning data from status updates
+    ai_reasoning_data = extract_ai_reasoning_from_data(data)
+    
+    return {
+        "status": data.get("status", PipelineStatus.QUEUED),
+        **{field: data.get(field) for field in JOB_STATUS_DOC_FIELDS},
+        **{field: ai_reasoning_data.get(field) for field in JOB_STATUS_AI_REASONING_FIELDS},
+        "total_duration_seconds": data.get("total_duration_seconds")
+    }
+
+
+def _serialize_sequence(obj):
+    return [serialize_for_firestore(item) for item in obj]
+
+
+def _serialize_mapping(obj):
+    return {str(k): serialize_for_firestore(v) for k, v in obj.items()}
+
+
+def _serialize_other(obj):
+    """
+    Slow path for subclasses and unknown types. numpy arrays and scalars are handled
+    here through tolist(), so this module never has to import numpy itself.
+    """
+    if isinstance(obj, (str, int, float, bool)):
         return obj
-    elif isinstance(obj, np.ndarray):
-        return obj.tolist()
     elif hasattr(obj, 'tolist'):  # Handle array-like objects
         return obj.tolist()
     elif isinstance(obj, (list, tuple)):
-        return [serialize_for_firestore(item) for item in obj]
+        return _serialize_sequence(obj)
     elif isinstance(obj, dict):
-        return {str(k): serialize_for_firestore(v) for k, v in obj.items()}
+        return _serialize_mapping(obj)
     else:
         return str(obj)
 
 
+# Exact-type dispatch for the containers OCR payloads are made of; anything else takes the slow path
+_SERIALIZERS = {
+    list: _serialize_sequence,
+    tuple: _serialize_sequence,
+    dict: _serialize_mapping,
+}
+
+
+def serialize_for_firestore(obj):
+    """Recursively serialize objects to be Firestore-compatible"""
+    obj_type = type(obj)
+    # Most nodes are str/float leaves: return them on a pointer compare, before any dispatch
+    if obj_type is str or obj_type is float or obj_type is int or obj_type is bool or obj is None:
+        return obj
+    return _SERIALIZERS.get(obj_type, _serialize_other)(obj)
+
+
 def simplify_ocr_data(onscreen_text):
-    """Simplify OCR data to only keep essential text information"""
+    """
+    Simplify OCR data to only keep essential text information.
+    
+    The result holds only floats and strings, so it can be written to Firestore as-is.
+    """
     simplified = []
     
-    for i, frame in enumerate(onscreen_text):
-        if not isinstance(frame, dict) or 'text_blocks' not in frame:
+    for frame in onscreen_text:
+        if not isinstance(frame, dict):
+            continue
+        blocks = frame.get('text_blocks')
+        if not blocks:
             continue
-            
-        frame_texts = []
-        for block in frame['text_blocks']:
-            if isinstance(block, dict) and 'text' in block:
-                text = str(block['text']).strip()
-                if text:  # Only keep non-empty text
-                    frame_texts.append(text)
+        
+        # Only keep non-empty text
+        frame_texts = [
+            text for block in blocks
+            if isinstance(block, dict) and (text := str(block.get('text', '')).strip())
+        ]
         
         if frame_texts:  # Only add frames that have text
             simplified.append({
                 'timestamp': float(frame.get('timestamp', 0)),
                 'texts': frame_texts
             })
+            # Limit the number of frames to prevent Firestore size issues
+            if len(simplified) >= MAX_SIMPLIFIED_OCR_FRAMES:
+                break
     
-    # Limit the number of frames to prevent Firestore size issues
-    return simplified[:20] if len(simplified) > 20 else simplified
+    return simplified
 
 
 class TikTokIngestService:
@@ -99,7 +232,7 @@ class TikTokIngestService:
         # Seed Firestore documents if available
         db = get_firestore_db()
         if db and owner_uid:
-            now = datetime.now(timezone.utc).isoformat()
+            now = utcnow_iso()
             
             # Create job document
             job_doc = {
@@ -109,7 +242,6 @@ class TikTokIngestService:
                 "recipe_id": recipe_id,
                 "url": url
             }
-            db.collection("ingest_jobs").document(job_id).set(job_doc)
             
             # Create stub recipe document
             recipe_doc = {
@@ -118,100 +250,71 @@ class TikTokIngestService:
                 "owner_uid": owner_uid,
                 "user_id": owner_uid  # Add user_id for frontend ownership validation
             }
-            db.collection("recipes").document(recipe_id).set(recipe_doc)
+            
+            # Write the job and its stub recipe together: one round trip, and never one without the other
+            batch = db.batch()
+            batch.set(db.collection("ingest_jobs").document(job_id), job_doc)
+            batch.set(db.collection("recipes").document(recipe_id), recipe_doc)
+            batch.commit()
+            
+            # The first polls follow immediately; answer them from the document just written
+            _cache_job_status(job_id, job_status_from_data(job_doc))
             
         return job_id, recipe_id, status
 
     @staticmethod
     def mock_get_job_status(job_id):
-        """Get job status from Firestore or return fallback"""
+        """Get job status from Firestore (or the short-lived poll cache) or return fallback"""
+        cached = _cached_job_status(job_id)
+        if cached is not None:
+            return cached
+        
         db = get_firestore_db()
         if db:
             doc = db.collection("ingest_jobs").document(job_id).get()
             if doc.exists:
-                data = doc.to_dict()
-                # Extract AI reasoning data from status updates
-                ai_reasoning_data = extract_ai_reasoning_from_data(data)
-                
-                return {
-                    "status": data.get("status", PipelineStatus.QUEUED),
-                    "title": data.get("title"),
-                    "transcript": data.get("transcript"),
-                    "error_code": data.get("error_code"),
-                    "recipe_json": data.get("recipe_json"),
-                    "parse_errors": data.get("parse_errors"),
-                    "llm_model_used": data.get("llm_model_used"),
-                    "llm_processing_time_seconds": data.get("llm_processing_time_seconds"),
-                    "llm_processing_completed_at": data.get("llm_processing_completed_at"),
-                    "has_parse_errors": data.get("has_parse_errors"),
-                    "recipe_stats": data.get("recipe_stats"),
-                    "llm_error_message": data.get("llm_error_message"),
-                    "recipe_id": data.get("recipe_id"),
-                    
-                    # AI reasoning and OCR decision data
-                    "data_sufficiency_analysis": ai_reasoning_data.get("data_sufficiency_analysis"),
-                    "ocr_was_skipped": ai_reasoning_data.get("ocr_was_skipped"),
-                    "ocr_skip_reason": ai_reasoning_data.get("ocr_skip_reason"),
-                    "ocr_confidence_score": ai_reasoning_data.get("ocr_confidence_score"),
-                    "ocr_decision_factors": ai_reasoning_data.get("ocr_decision_factors"),
-                    "estimated_completeness": ai_reasoning_data.get("estimated_completeness"),
-                    
-                    # Pipeline performance metrics
-                    "pipeline_performance": ai_reasoning_data.get("pipeline_performance"),
-                    "total_duration_seconds": data.get("total_duration_seconds")
-                }
+                job_status = job_status_from_data(doc.to_dict())
+                _cache_job_status(job_id, job_status)
+                return job_status
         
         # Fallback response
-        return {
-            "status": PipelineStatus.QUEUED,
-            "title": None,
-            "transcript": None,
-            "error_code": None,
-            "recipe_json": None,
-            "parse_errors": None,
-            "llm_model_used": None,
-            "llm_processing_time_seconds": None,
-            "llm_processing_completed_at": None,
-            "has_parse_errors": None,
-            "recipe_stats": None,
-            "llm_error_message": None,
-            "recipe_id": None,
-            
-            # AI reasoning fallback values
-            "data_sufficiency_analysis": None,
-            "ocr_was_skipped": None,
-            "ocr_skip_reason": None,
-            "ocr_confidence_score": None,
-            "ocr_decision_factors": None,
-            "estimated_completeness": None,
-            "pipeline_performance": None,
-            "total_duration_seconds": None
-        }
+        return dict(_FALLBACK_JOB_STATUS)
 
     @staticmethod
-    def update_ocr_results(job_id: str, onscreen_text: list, ingredient_candidates: list):
-        """Update job document with OCR results"""
+    def update_ocr_results(job_id: str, onscreen_text: list, ingredient_candidates: list) -> Optional[Future]:
+        """
+        Update job document with OCR results.
+        
+        The payload is built synchronously (so bad input still raises to the caller) but the
+        Firestore write runs on a background executor; failures are logged when the returned
+        future completes.
+        """
         db = get_firestore_db()
         if not db:
-            return
-            
-        try:
-            # Simplify and serialize the OCR data
-            simplified_onscreen_text = simplify_ocr_data(onscreen_text)
-            safe_onscreen_text = serialize_for_firestore(simplified_onscreen_text)
-            safe_ingredient_candidates = serialize_for_firestore(ingredient_candidates)
+            return None
             
-            # Prepare update data
-            update_data = {
-                "onscreen_text": safe_onscreen_text,
-                "ingredient_candidates": safe_ingredient_candidates,
-                "updatedAt": datetime.now(timezone.utc).isoformat(),
-            }
-            
-            # Update the document
-            db.collection("ingest_jobs").document(job_id).update(update_data)
-            print(f"[TikTokIngestService] Successfully updated OCR results for job {job_id}")
-            
-        except Exception as e:
-            print(f"[TikTokIngestService] Error updating OCR results for job {job_id}: {e}")
-            raise 
\ No newline at end of file
+        # simplify_ocr_data only emits floats and strings, so its output is already
+        # Firestore-safe; only the caller-supplied candidates need serializing
+        simplified_onscreen_text = simplify_ocr_data(onscreen_text)
+        safe_ingredient_candidates = serialize_for_firestore(ingredient_candidates)
+        
+        # Prepare update data
+        update_data = {
+            "onscreen_text": simplified_onscreen_text,
+            "ingredient_candidates": safe_ingredient_candidates,
+            "updatedAt": utcnow_iso(),
+        }
+        
+        def log_outcome(future: Future) -> None:
+            error = future.exception()
+            if error is not None:
+                logger.error("Error updating OCR results for job %s: %s", job_id, error)
+            else:
+                logger.debug("Successfully updated OCR results for job %s", job_id)
+        
+        # Update the document in the background
+        future = _background_write_executor.submit(
+            db.collection("ingest_jobs").document(job_id).update, update_data
+        )
+        future.add_done_callback(log_outcome)
+        return future
@@ -1,6 +1,19 @@
 import re
 from typing import List, Dict, Any
 
+# Keywords that suggest a block of OCR text is (part of) a recipe title, in priority order
+RECIPE_KEYWORDS = (
+    "caramelized", "onion", "garlic", "spaghetti", "pasta", "sauce", "chicken", "beef", "pork",
+    "salmon", "shrimp", "vegetables", "salad", "soup", "stew", "curry", "stir fry", "grilled",
+    "baked", "fried", "roasted", "braised", "poached", "seared", "smoked", "pickled"
+)
+_KEYWORD_PRIORITY = {keyword: index for index, keyword in enumerate(RECIPE_KEYWORDS)}
+# Substring match for every keyword in one pass; the lookahead also reports overlapping hits
+_RECIPE_KEYWORD_RE = re.compile("(?=(" + "|".join(map(re.escape, RECIPE_KEYWORDS)) + "))")
+# A sentence is a run of text between . ! ? or newline
+_SENTENCE_RE = re.compile(r'[^.!?\n]+')
+_HASHTAG_RE = re.compile(r'#\w+')
+
 class TitleExtractor:
     @staticmethod
     def from_metadata(metadata_title: str | None) -> str | None:
@@ -25,13 +38,12 @@ class TitleExtractor:
             print(f"[TitleExtractor] No transcript provided")
             return None
         
-        # Simple fallback: just return the first sentence
-        sentences = re.split(r'[.!?\n]', transcript)
-        print(f"[TitleExtractor] Found {len(sentences)} sentences")
-        for i, sentence in enumerate(sentences):
-            s = sentence.strip()
-            if s and len(s) > 3:  # Only use sentences with meaningful content
-                print(f"[TitleExtractor] Using sentence {i}: {s}")
+        # Simple fallback: just return the first sentence. Sentences are scanned lazily so a
+        # long transcript is never split in full when an early sentence qualifies.
+        for match in _SENTENCE_RE.finditer(transcript):
+            s = match.group().strip()
+            if len(s) > 3:  # Only use sentences with meaningful content
+                print(f"[TitleExtractor] Using sentence: {s}")
                 return s
         print(f"[TitleExtractor] No valid sentences found")
         return None
@@ -52,7 +64,7 @@ class TitleExtractor:
             return ""
         
         # Remove hashtags but keep emojis
-        no_hashtags = re.sub(r'#\w+', '', raw_title)
+        no_hashtags = _HASHTAG_RE.sub('', raw_title)
         # Trim whitespace
         trimmed = no_hashtags.strip()
         # No character limit - keep the full title
@@ -72,48 +84,45 @@ class TitleExtractor:
         """
         print(f"[TitleExtractor] from_ocr_text called with {len(ocr_results)} OCR frames")
         
-        # Collect all text from OCR
+        # Collect all text from OCR, tracking the longest block for the fallback below
         all_text = []
+        longest_text = ""
         for frame in ocr_results:
             if "text_blocks" in frame:
                 for block in frame["text_blocks"]:
                     if "text" in block:
-                        all_text.append(block["text"].strip())
+                        text = block["text"].strip()
+                        all_text.append(text)
+                        if len(text) > len(longest_text):
+                            longest_text = text
         
         if not all_text:
             print(f"[TitleExtractor] No OCR text found")
             return None
         
-        # Look for recipe title patterns in OCR text
-        recipe_keywords = [
-            "caramelized", "onion", "garlic", "spaghetti", "pasta", "sauce", "chicken", "beef", "pork",
-            "salmon", "shrimp", "vegetables", "salad", "soup", "stew", "curry", "stir fry", "grilled",
-            "baked", "fried", "roasted", "braised", "poached", "seared", "smoked", "pickled"
-        ]
+        # Find which recipe keywords each text block contains, scanning every block once
+        block_keywords = [set(_RECIPE_KEYWORD_RE.findall(text.lower())) for text in all_text]
+        
+        # Only blocks with a keyword can start or join a title, so scan just those. Hits are
+        # in block order, and any hit within 2 blocks is within 2 places in this list
+        hits = [i for i, keywords in enumerate(block_keywords) if keywords]
         
         # Try to find a combination of keywords that form a recipe title
-        for i, text in enumerate(all_text):
-            text_lower = text.lower()
-            for keyword in recipe_keywords:
-                if keyword in text_lower:
-                    # Look for related keywords in nearby text blocks
-                    title_parts = [text]
-                    for j in range(max(0, i-2), min(len(all_text), i+3)):
-                        if j != i:
-                            nearby_text = all_text[j].lower()
-                            # Check if nearby text contains related recipe keywords
-                            for other_keyword in recipe_keywords:
-                                if other_keyword in nearby_text and other_keyword != keyword:
-                                    title_parts.append(all_text[j])
-                                    break
-                    
-                    if len(title_parts) > 1:
-                        title = " ".join(title_parts)  # No limit - keep all parts
-                        print(f"[TitleExtractor] Found OCR title: {title}")
-                        return title
+        for position, i in enumerate(hits):
+            nearby = [j for j in hits[max(0, position-2):position+3] if j != i and abs(j - i) <= 2]
+            if not nearby:
+                continue
+            for keyword in sorted(block_keywords[i], key=_KEYWORD_PRIORITY.__getitem__):
+                # Look for related keywords in nearby text blocks
+                title_parts = [all_text[i]]
+                title_parts.extend(all_text[j] for j in nearby if block_keywords[j] - {keyword})
+                
+                if len(title_parts) > 1:
+                    title = " ".join(title_parts)  # No limit - keep all parts
+                    print(f"[TitleExtractor] Found OCR title: {title}")
+                    return title
         
         # Fallback: return the longest text block that looks like a recipe name
-        longest_text = max(all_text, key=len) if all_text else ""
         if len(longest_text) > 5:
             print(f"[TitleExtractor] Using longest OCR text as title: {longest_text}")
             return longest_text
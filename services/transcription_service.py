@@ -1,48 +1,268 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from openai import OpenAI
+from openai import OpenAI, RateLimitError, APIConnectionError, APITimeoutError
+import hashlib
+import io
+import logging
 import os
+import random
+import re
+import threading
 import time
+import wave
+from typing import Optional
+import httpx
+from utils.disk_cache import DiskCache
+from utils.rate_limiter import SlidingWindowRateLimiter
+
+logger = logging.getLogger(__name__)
+
+# OpenAI reset durations look like "20ms", "1s" or "6m0s"
+_RESET_DURATION_RE = re.compile(r'(\d+(?:\.\d+)?)(ms|s|m|h)')
+_RESET_UNIT_SECONDS = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+
+# WAV audio larger than this is split and transcribed in parallel pieces (Whisper rejects uploads
+# over 25 MB). Only applies with TRANSCRIPTION_AUDIO_FORMAT=wav: the default 32 kbps MP3 stays under
+# 20 MB for about 87 minutes of audio, so it is always sent whole
+WHISPER_ENABLE_CHUNKING = os.getenv("WHISPER_ENABLE_CHUNKING", "true").lower() == "true"
+WHISPER_CHUNK_SIZE_MB = float(os.getenv("WHISPER_CHUNK_SIZE_MB", "20"))
+# Upper bound on simultaneous chunk uploads for one transcription
+MAX_CHUNK_WORKERS = 4
+
+# Whisper requests per minute shared by every worker, checked before each call
+_whisper_rate_limiter = SlidingWindowRateLimiter(
+    "whisper:rpm", limit=int(os.getenv("WHISPER_RPM_LIMIT", "50")), window_seconds=60
+)
+
+# Cap on Whisper uploads in flight at once across all jobs running on this worker's threads
+_whisper_slots = threading.BoundedSemaphore(int(os.getenv("WHISPER_MAX_CONCURRENCY", "20")))
 
 class TranscriptionError(Exception):
     pass
 
+@lru_cache(maxsize=1)
+def _openai_client(api_key: str) -> OpenAI:
+    """
+    Process-wide OpenAI client, so every transcription reuses one warm connection pool
+    (TLS sessions included) instead of building a new httpx client per call.
+    """
+    return OpenAI(
+        api_key=api_key,
+        http_client=httpx.Client(
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=50),
+            # Long reads: Whisper only responds once the whole upload is transcribed
+            timeout=httpx.Timeout(300, connect=5)
+        )
+    )
+
+@lru_cache(maxsize=None)
+def _transcript_cache(cache_dir: str) -> DiskCache:
+    """One persistent transcript cache per directory, shared by every call in the process"""
+    return DiskCache(cache_dir)
+
 class TranscriptionService:
+    # Upper bound on a single retry wait, in seconds
+    RETRY_BACKOFF_CAP = 60
+    # Random extra wait added to each backoff so concurrent workers don't retry in lockstep
+    RETRY_JITTER_SECONDS = 1.0
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        """Rate limits (HTTP 429) and transient connection/timeout failures are worth retrying"""
+        if isinstance(error, (RateLimitError, APIConnectionError, APITimeoutError)):
+            return True
+        return getattr(error, 'status_code', None) == 429 or '429' in str(error)
+
+    WHISPER_MODEL = "whisper-1"
+    WHISPER_RESPONSE_FORMAT = "text"
+    # How long transcripts stay in the persistent transcript cache
+    TRANSCRIPT_CACHE_TTL_SECONDS = 30 * 86400
+    # Pause new calls once this few requests remain in OpenAI's current rate limit window
+    MIN_REMAINING_REQUESTS = 2
+
+    @staticmethod
+    def _parse_reset_seconds(value: Optional[str]) -> float:
+        """Convert an OpenAI reset/retry header value to seconds (0.0 when missing or unparseable)"""
+        if not value:
+            return 0.0
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        return sum(float(amount) * _RESET_UNIT_SECONDS[unit] for amount, unit in _RESET_DURATION_RE.findall(value))
+
+    @staticmethod
+    def _throttle_from_headers(headers) -> None:
+        """Pause upcoming calls when OpenAI reports the request budget is nearly spent"""
+        remaining = headers.get('x-ratelimit-remaining-requests')
+        try:
+            if remaining is None or int(remaining) >= TranscriptionService.MIN_REMAINING_REQUESTS:
+                return
+        except ValueError:
+            return
+        _whisper_rate_limiter.pause(
+            TranscriptionService._parse_reset_seconds(headers.get('x-ratelimit-reset-requests'))
+        )
+
+    @staticmethod
+    def _retry_after_seconds(error: Exception) -> float:
+        """Retry-After from a rate limit error's response, if the API sent one"""
+        response = getattr(error, 'response', None)
+        headers = getattr(response, 'headers', None)
+        if not headers:
+            return 0.0
+        return TranscriptionService._parse_reset_seconds(headers.get('retry-after'))
+
+    @classmethod
+    def _retry_delay(cls, attempt: int) -> float:
+        """Capped exponential backoff with jitter for the given (1-based) retry attempt"""
+        return min(cls.RETRY_BACKOFF_CAP, 2 ** attempt + random.uniform(0, cls.RETRY_JITTER_SECONDS))
+
+    @staticmethod
+    def _split_upload(name: str, audio_bytes: bytes) -> list:
+        """
+        Split audio over the chunk size into consecutive WAV pieces of at most that size.
+        Returns a list of (filename, bytes) uploads; audio under the limit, chunking disabled,
+        or non-WAV input (the default MP3 extraction) is returned whole.
+        """
+        max_chunk_bytes = int(WHISPER_CHUNK_SIZE_MB * 1024 * 1024)
+        if not WHISPER_ENABLE_CHUNKING or len(audio_bytes) <= max_chunk_bytes:
+            return [(name, audio_bytes)]
+        
+        stem = Path(name).stem
+        uploads = []
+        try:
+            with wave.open(io.BytesIO(audio_bytes), 'rb') as source:
+                params = source.getparams()
+                # Leave room for the 44-byte header each piece gets
+                frames_per_chunk = max(1, (max_chunk_bytes - 44) // (params.sampwidth * params.nchannels))
+                while frames := source.readframes(frames_per_chunk):
+                    buffer = io.BytesIO()
+                    with wave.open(buffer, 'wb') as piece:
+                        piece.setparams(params)
+                        piece.writeframes(frames)
+                    uploads.append((f"{stem}_{len(uploads):03d}.wav", buffer.getvalue()))
+        except (wave.Error, EOFError):
+            return [(name, audio_bytes)]
+        return uploads
+
     @staticmethod
-    def transcribe(audio_path: Path, max_retries: int = 2) -> str:
+    def _transcribe_upload(client: OpenAI, audio_upload: tuple, max_retries: int, allow_empty: bool = False) -> str:
+        """Send one (filename, bytes) upload to Whisper, retrying rate limits and transient failures"""
+        attempt = 0
+        while attempt <= max_retries:
+            try:
+                _whisper_rate_limiter.acquire()
+                with _whisper_slots:
+                    raw_response = client.audio.transcriptions.with_raw_response.create(
+                        model=TranscriptionService.WHISPER_MODEL,
+                        file=audio_upload,
+                        response_format=TranscriptionService.WHISPER_RESPONSE_FORMAT
+                    )
+                TranscriptionService._throttle_from_headers(raw_response.headers)
+                response = raw_response.parse()
+                if not isinstance(response, str) or not (response or allow_empty):
+                    raise TranscriptionError("No transcript returned from OpenAI.")
+                return response.strip()
+            except Exception as e:
+                # Retry rate limits (HTTP 429) and transient network failures
+                if TranscriptionService._is_retryable(e):
+                    attempt += 1
+                    if attempt > max_retries:
+                        if isinstance(e, (APIConnectionError, APITimeoutError)):
+                            raise TranscriptionError(f"ASR_FAILED: {e}")
+                        raise TranscriptionError("ASR_FAILED: Rate limit exceeded after retries.")
+                    retry_after = TranscriptionService._retry_after_seconds(e)
+                    if retry_after:
+                        # Hold back every worker, not just this one; acquire() waits it out
+                        _whisper_rate_limiter.pause(retry_after)
+                    else:
+                        time.sleep(TranscriptionService._retry_delay(attempt))
+                else:
+                    raise TranscriptionError(f"ASR_FAILED: {e}")
+
+    @staticmethod
+    def _cache_key(audio_bytes: bytes) -> str:
+        """Content-addressed key: the same audio always yields the same Whisper transcript"""
+        digest = hashlib.sha256(audio_bytes).hexdigest()
+        return f"whisper:{digest}:{TranscriptionService.WHISPER_MODEL}:{TranscriptionService.WHISPER_RESPONSE_FORMAT}"
+
+    @staticmethod
+    def _cached_transcript(cache: Optional[DiskCache], cache_key: str) -> Optional[str]:
+        """Return a cached transcript, or None on a miss or when caching is disabled"""
+        if cache is None:
+            return None
+        try:
+            transcript = cache.get(cache_key)
+        except Exception as e:
+            logger.warning(f"Transcript cache read failed: {e}")
+            return None
+        if transcript is not None:
+            logger.info("Transcript cache hit")
+        return transcript
+
+    @staticmethod
+    def _store_transcript(cache: Optional[DiskCache], cache_key: str, transcript: str) -> None:
+        """Persist a transcript for identical audio seen later (reposts, retried jobs)"""
+        if cache is None:
+            return
+        try:
+            cache.set(cache_key, transcript, expire=TranscriptionService.TRANSCRIPT_CACHE_TTL_SECONDS)
+        except Exception as e:
+            logger.warning(f"Transcript cache write failed: {e}")
+
+    @staticmethod
+    def transcribe(audio_path: Path, max_retries: int = 6) -> str:
         """
         Transcribe the given audio file using OpenAI Whisper ASR and return the transcript as a string.
-        Retries on HTTP 429 (rate limit) up to max_retries. Deletes audio after transcription (success or failure).
+        Calls are throttled proactively from a shared requests-per-minute window and OpenAI's rate limit
+        headers. Retries on HTTP 429 (rate limit) and transient connection errors up to max_retries,
+        honoring Retry-After or else using jittered exponential backoff. Deletes audio after transcription
+        (success or failure). WAV audio over WHISPER_CHUNK_SIZE_MB is split and the pieces are transcribed
+        concurrently, then joined in order. When TRANSCRIPT_CACHE_DIR is set, transcripts are cached by the
+        SHA-256 of the audio so identical audio never reaches the API twice.
         Raises TranscriptionError on failure.
         """
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise TranscriptionError("OPENAI_API_KEY not set in environment.")
         
-        # Initialize OpenAI client (v1.0+ API)
-        client = OpenAI(api_key=api_key)
+        # Shared OpenAI client (v1.0+ API)
+        client = _openai_client(api_key)
         
-        attempt = 0
         try:
-            while attempt <= max_retries:
-                try:
-                    with open(audio_path, "rb") as audio_file:
-                        response = client.audio.transcriptions.create(
-                            model="whisper-1",
-                            file=audio_file,
-                            response_format="text"
-                        )
-                    if not response or not isinstance(response, str):
-                        raise TranscriptionError("No transcript returned from OpenAI.")
-                    return response.strip()
-                except Exception as e:
-                    # Check for rate limit errors (HTTP 429)
-                    if hasattr(e, 'status_code') and e.status_code == 429 or '429' in str(e):
-                        attempt += 1
-                        if attempt > max_retries:
-                            raise TranscriptionError("ASR_FAILED: Rate limit exceeded after retries.")
-                        time.sleep(2 ** attempt)  # Exponential backoff
-                    else:
-                        raise TranscriptionError(f"ASR_FAILED: {e}")
+            # Read the audio once; every retry re-sends the same in-memory upload
+            try:
+                audio_bytes = Path(audio_path).read_bytes()
+            except OSError as e:
+                raise TranscriptionError(f"ASR_FAILED: {e}")
+            
+            cache_dir = os.getenv("TRANSCRIPT_CACHE_DIR")
+            cache = _transcript_cache(cache_dir) if cache_dir else None
+            cache_key = TranscriptionService._cache_key(audio_bytes)
+            transcript = TranscriptionService._cached_transcript(cache, cache_key)
+            if transcript is not None:
+                return transcript
+            
+            uploads = TranscriptionService._split_upload(Path(audio_path).name, audio_bytes)
+            if len(uploads) == 1:
+                transcript = TranscriptionService._transcribe_upload(client, uploads[0], max_retries)
+            else:
+                # Transcribe the pieces concurrently and stitch them back together in order
+                with ThreadPoolExecutor(max_workers=min(MAX_CHUNK_WORKERS, len(uploads))) as executor:
+                    transcripts = list(executor.map(
+                        lambda upload: TranscriptionService._transcribe_upload(
+                            client, upload, max_retries, allow_empty=True
+                        ),
+                        uploads
+                    ))
+                transcript = " ".join(text for text in transcripts if text)
+                if not transcript:
+                    raise TranscriptionError("ASR_FAILED: No transcript returned from OpenAI.")
+            
+            TranscriptionService._store_transcript(cache, cache_key, transcript)
+            return transcript
         finally:
             # Always delete the audio file, even if transcription fails
             try:
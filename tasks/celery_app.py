@@ -1,5 +1,10 @@
+import atexit
+import logging
+import logging.handlers
 import os
+import queue
 from celery import Celery
+from celery.signals import worker_process_init, worker_ready
 
 # Load broker and result backend URLs from environment variables
 CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0')
@@ -18,4 +23,39 @@ celery_app.conf.update(
     accept_content=['json'],
     timezone='UTC',
     enable_utc=True,
-) 
\ No newline at end of file
+    # The ingest pipeline mostly waits on yt-dlp, Whisper, the LLM and Firestore, so one worker
+    # process runs many jobs on threads instead of holding a whole process per job
+    worker_pool=os.getenv('CELERY_WORKER_POOL', 'threads'),
+    worker_concurrency=int(os.getenv('CELERY_WORKER_CONCURRENCY', '16')),
+)
+
+# Listener draining the queued log records in this process, if one has been started
+_log_listener = None
+
+@worker_ready.connect
+@worker_process_init.connect
+def _log_through_queue(**kwargs):
+    """
+    Route the process's root log handlers through a queue drained by a background
+    listener thread, so task code never blocks on log handler I/O.
+    Runs in the main worker process (threads pool) and in each prefork pool process.
+    """
+    global _log_listener
+    root = logging.getLogger()
+    if _log_listener is not None:
+        # Forked from a process that already queued its handlers; its listener thread didn't survive the fork
+        handlers = list(_log_listener.handlers)
+        for handler in root.handlers[:]:
+            if isinstance(handler, logging.handlers.QueueHandler):
+                root.removeHandler(handler)
+    else:
+        handlers = root.handlers[:]
+    if not handlers:
+        return
+    log_queue = queue.SimpleQueue()
+    _log_listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    for handler in handlers:
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
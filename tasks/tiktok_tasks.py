@@ -1,22 +1,66 @@
 from tasks.celery_app import celery_app
 from config.firebase_config import get_firestore_db
-from datetime import datetime, timezone
+from contextlib import ExitStack
+from concurrent.futures import ThreadPoolExecutor, wait as wait_for_futures
+from google.api_core.exceptions import Aborted, NotFound
 import time
-from utils.media_downloader import download_video, VideoUnavailableError, temp_job_dir
+from utils.media_downloader import download_video, VideoUnavailableError, VideoNotFoundError, temp_job_dir
 from utils.audio_extractor import extract_audio, AudioExtractionError
 from services.transcription_service import TranscriptionService, TranscriptionError
 from services.title_extractor import TitleExtractor
 from utils.frame_extractor import extract_frames
-from services.ocr_service import OCRService
-from services.tiktok_ingest_service import TikTokIngestService
+from services.ocr_service import OCRService, INGREDIENT_RE
+from services.tiktok_ingest_service import TikTokIngestService, utcnow_iso
 from services.llm_refine_service import LLMRefineService, LLMRefineError
 from services.firestore_recipe_service import FirestoreRecipeService
 from services.recipe_persist_service import RecipePersistService
-from services.data_sufficiency_analyzer import DataSufficiencyAnalyzer
+from services.data_sufficiency_analyzer import DataSufficiencyAnalyzer, SufficiencyResult
 from services.recipe_quality_analyzer import RecipeQualityAnalyzer
 from errors import get_error, log_stage_timing, PipelineStatus
-import traceback
+import logging
+from openai import RateLimitError, APIConnectionError, APITimeoutError
 import os
+import random
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Failures worth re-running the task for: flaky downloads/ffmpeg runs, OpenAI rate limits and
+# network errors. Anything else (bad LLM output, parse errors, bugs) fails the job immediately.
+# Whisper calls retry internally, so a TranscriptionError is already final.
+# A private or deleted video (VideoNotFoundError) stays unavailable, so it is never retried.
+RETRYABLE_ERRORS = (
+    VideoUnavailableError,
+    AudioExtractionError,
+    RateLimitError,
+    APIConnectionError,
+    APITimeoutError,
+    ConnectionError,
+    TimeoutError,
+)
+NON_RETRYABLE_ERRORS = (
+    VideoNotFoundError,
+)
+# Cap on the countdown between task retries (seconds)
+MAX_RETRY_COUNTDOWN = 60
+# Format the audio is extracted to for Whisper; compressed MP3 keeps uploads small
+TRANSCRIPTION_AUDIO_FORMAT = os.getenv("TRANSCRIPTION_AUDIO_FORMAT", "mp3")
+# A transcript quoting at least this many measured ingredients ("2 cups", "1 tsp") is a full
+# voice-over recipe: OCR and the OpenAI sufficiency check are skipped for it
+MIN_TRANSCRIPT_MEASUREMENTS = int(os.getenv("OCR_SKIP_MIN_TRANSCRIPT_MEASUREMENTS", "4"))
+
+# Background writers for progress-only status updates, shared by every job in the worker
+_status_write_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="status-write")
+# Frame extraction for OCR runs here so it overlaps audio extraction and transcription
+_frame_extraction_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="frame-extract")
+
+
+def _status_payload(status: str, extra_data: dict = None, updated_at: str = None) -> dict:
+    """Build the Firestore update for a status change: status, updatedAt, then any extra fields"""
+    payload = {"status": status, "updatedAt": updated_at or utcnow_iso()}
+    if extra_data:
+        payload.update(extra_data)
+    return payload
 
 
 class PipelineContext:
@@ -27,6 +71,9 @@ class PipelineContext:
         self.owner_uid = owner_uid
         self.recipe_id = recipe_id
         self.db = get_firestore_db()
+        # Document references are reused by every status write for this job
+        self.job_ref = self.db.collection("ingest_jobs").document(job_id) if self.db else None
+        self.recipe_ref = self.db.collection("recipes").document(recipe_id) if self.db else None
         self.firestore_service = FirestoreRecipeService(self.db) if self.db else None
         self.tiktok_service = TikTokIngestService() if self.db else None
         self.recipe_persist_service = RecipePersistService() if self.db else None
@@ -38,90 +85,191 @@ class PipelineContext:
         self.original_ocr_results = None
         self.video_path = None
         self.job_dir = None
-        
+        self.frames_future = None
+        self._last_progress_write = None
+        self._pending_progress = None
+        self._progress_lock = threading.Lock()
+        # Other job document writes running off the task thread (OCR results)
+        self._background_writes = []
+        
+    def update_progress(self, status: str, extra_data: dict = None):
+        """
+        Update job status in Firestore without waiting for the write.
+        
+        Writes for one job are applied in order on a background writer, so a late write
+        never overwrites a later status. Updates made while a write is still queued are
+        merged into it rather than sent separately. Call flush_progress() where the
+        status has to be durable (failures, the final status).
+        """
+        if not self.db:
+            return
+            
+        update_data = _status_payload(status, extra_data)
+        with self._progress_lock:
+            if self._pending_progress is not None:
+                # The queued write hasn't been sent yet; it will carry this update too
+                self._pending_progress.update(update_data)
+                return
+            self._pending_progress = update_data
+        
+        previous_write = self._last_progress_write
+        
+        def write():
+            if previous_write is not None:
+                wait_for_futures([previous_write])
+            self._write_progress(self._take_pending_progress())
+        
+        self._last_progress_write = _status_write_executor.submit(write)
+    
+    def _take_pending_progress(self):
+        """Claim the progress update waiting to be written, if any"""
+        with self._progress_lock:
+            pending, self._pending_progress = self._pending_progress, None
+        return pending
+    
+    def _write_progress(self, update_data):
+        if not update_data:
+            return
+        for attempt in range(2):
+            try:
+                self.job_ref.update(update_data)
+                return
+            except Aborted as e:
+                # Contention on the job document; retry once
+                if attempt:
+                    logger.error(f"Failed to update status to {update_data['status']}: {e}")
+            except Exception as e:
+                logger.error(f"Failed to update status to {update_data['status']}: {e}")
+                return
+    
+    def _absorb_progress(self):
+        """
+        Wait for progress and background writes already in flight and return the fields of any
+        progress still queued, for the caller to fold into its own write (saving a round trip)
+        """
+        pending = self._take_pending_progress()
+        if self._last_progress_write is not None:
+            wait_for_futures([self._last_progress_write])
+            self._last_progress_write = None
+        if self._background_writes:
+            wait_for_futures(self._background_writes)
+            self._background_writes = []
+        return pending or {}
+    
+    def flush_progress(self):
+        """Wait until every queued progress update and background write has been written"""
+        self._write_progress(self._absorb_progress())
+        
+    def persist_ocr_results(self, ocr_service, ocr_results):
+        """Store OCR results on the job document off the task thread; flush_progress() waits for it"""
+        self._background_writes.append(
+            _status_write_executor.submit(_persist_ocr_results, self.job_id, ocr_service, ocr_results)
+        )
+    
     def update_status(self, status: str, extra_data: dict = None):
-        """Update job status in Firestore"""
+        """Update job status in Firestore; queued like update_progress() so the pipeline never waits on it"""
+        self.update_progress(status, extra_data)
+    
+    def update_recipe_status(self, status: str, extra_data: dict = None):
+        """Update recipe status in Firestore"""
         if not self.db:
             return
             
-        update_data = {
-            "status": status,
-            "updatedAt": datetime.now(timezone.utc).isoformat()
-        }
-        if extra_data:
-            update_data.update(extra_data)
+        update_data = _status_payload(status, extra_data)
             
         try:
-            self.db.collection("ingest_jobs").document(self.job_id).update(update_data)
+            self.recipe_ref.update(update_data)
         except Exception as e:
-            print(f"[ERROR] Failed to update status to {status}: {e}")
+            logger.error(f"Failed to update recipe status to {status}: {e}")
     
-    def update_recipe_status(self, status: str, extra_data: dict = None):
-        """Update recipe status in Firestore"""
+    def update_job_and_recipe_status(self, status: str, job_data: dict = None, recipe_data: dict = None):
+        """Update job and recipe status together in one batched Firestore write"""
         if not self.db:
             return
+        pending_progress = self._absorb_progress()
             
-        update_data = {
-            "status": status,
-            "updatedAt": datetime.now(timezone.utc).isoformat()
-        }
-        if extra_data:
-            update_data.update(extra_data)
+        now = utcnow_iso()
+        job_update = {**pending_progress, **_status_payload(status, job_data, now)}
+        batch = self.db.batch()
+        batch.update(self.job_ref, job_update)
+        batch.update(self.recipe_ref, _status_payload(status, recipe_data, now))
             
         try:
-            self.db.collection("recipes").document(self.recipe_id).update(update_data)
+            batch.commit()
+        except NotFound:
+            # No recipe stub (never created, or deleted mid-ingest) fails the whole batch; the
+            # job update must still land, since a retry resumes from the transcript saved on it
+            logger.warning(f"Recipe {self.recipe_id} not found; updating job status to {status} only")
+            self._write_progress(job_update)
         except Exception as e:
-            print(f"[ERROR] Failed to update recipe status to {status}: {e}")
+            logger.error(f"Failed to update job and recipe status to {status}: {e}")
     
     def handle_error(self, error_type: str, exception: Exception, stage: str):
         """Centralized error handling"""
         error_info = get_error(error_type, str(exception))
-        print(f"[ERROR] {stage} failed: {error_info}")
+        logger.error(f"{stage} failed: {error_info}")
         
         self.update_status(PipelineStatus.FAILED, {
             "error_code": error_info["code"],
             "error_message": error_info["message"]
         })
+        # Failure states must be durable before the error propagates
+        self.flush_progress()
         return error_info
 
 
-@celery_app.task(bind=True, max_retries=1, autoretry_for=(Exception,), retry_backoff=True)
+@celery_app.task(bind=True, max_retries=3)
 def ingest_tiktok(self, job_id: str, url: str, owner_uid: str, recipe_id: str):
     """
     Simplified TikTok ingestion task with improved error handling and reduced complexity
     """
-    pipeline_start = time.time()
+    pipeline_start = time.monotonic_ns()
     ctx = PipelineContext(job_id, url, owner_uid, recipe_id)
     
     try:
-        print(f"[TASK] Starting TikTok ingestion for job {job_id}")
+        logger.info(f"Starting TikTok ingestion for job {job_id}")
         
-        # Ensure ingest_jobs doc exists
+        # Ensure ingest_jobs doc exists; on a retry it may already hold an earlier attempt's transcript
+        previous_transcript = None
         if ctx.db:
-            job_ref = ctx.db.collection("ingest_jobs").document(job_id)
-            if not job_ref.get().exists:
-                now = datetime.now(timezone.utc).isoformat()
-                job_ref.set({"status": PipelineStatus.QUEUED, "createdAt": now, "job_id": job_id})
-        
-        with temp_job_dir() as job_dir:
+            job_snapshot = ctx.job_ref.get()
+            if not job_snapshot.exists:
+                now = utcnow_iso()
+                ctx.job_ref.set({"status": PipelineStatus.QUEUED, "createdAt": now, "job_id": job_id})
+            else:
+                previous_transcript = _checkpointed_transcript(job_snapshot.to_dict())
+        
+        with temp_job_dir() as job_dir, ExitStack() as background_work:
             # Stage 1: Download video
-            video_path, metadata_title, thumbnail_url = _download_stage(ctx, url, job_dir, self)
+            video_path, metadata_title, thumbnail_url = _download_stage(ctx, url, job_dir)
+            
+            # Frames only need the video, so extract them while audio is extracted and
+            # transcribed; the OCR stages pick them up. Waited on before job_dir is removed.
+            ctx.frames_future = _frame_extraction_executor.submit(
+                extract_frames, video_path, job_dir / "frames", method="scene", fps=1.0, max_frames=8
+            )
+            background_work.callback(_finish_frame_extraction, ctx)
             # Store paths and thumbnail URL in context for potential fallback use
             ctx.video_path = video_path
             ctx.job_dir = job_dir
             ctx.thumbnail_url = thumbnail_url
             
-            # Stage 2: Extract audio
-            audio_path = _extract_audio_stage(ctx, video_path, job_dir, self)
-            
-            # Stage 3: Transcribe audio
-            transcript = _transcription_stage(ctx, audio_path, self)
+            if previous_transcript:
+                # Stages 2-3 finished in an earlier attempt (DRAFT_TRANSCRIBED checkpoint)
+                logger.info(f"Resuming job {job_id} with transcript from a previous attempt")
+                transcript = previous_transcript
+            else:
+                # Stage 2: Extract audio
+                audio_path = _extract_audio_stage(ctx, video_path, job_dir)
+                
+                # Stage 3: Transcribe audio
+                transcript = _transcription_stage(ctx, audio_path)
             
             # Stage 4: Extract title and update documents
             normalized_title = _title_extraction_stage(ctx, metadata_title, transcript)
             
             # Stage 5: Analyze data sufficiency with OpenAI
-            sufficiency_result = _data_sufficiency_analysis_stage(ctx, normalized_title, transcript, metadata_title)
+            _data_sufficiency_analysis_stage(ctx, normalized_title, transcript, metadata_title)
             
             # Stage 6: Conditional OCR processing (skip if data is sufficient)
             ocr_results = _conditional_ocr_stage(ctx, video_path, job_dir)
@@ -138,14 +286,14 @@ def ingest_tiktok(self, job_id: str, url: str, owner_uid: str, recipe_id: str):
         
         # Calculate performance metrics
         performance_metrics = {
-            "pipeline_completed_at": datetime.now(timezone.utc).isoformat(),
+            "pipeline_completed_at": utcnow_iso(),
             "total_duration_seconds": round(total_duration, 2),
             "ocr_was_skipped": ctx.sufficiency_result and ctx.sufficiency_result.is_sufficient,
             "confidence_score": ctx.sufficiency_result.confidence_score if ctx.sufficiency_result else None
         }
         
         # Add OCR-specific metrics
-        if hasattr(ctx, 'sufficiency_result') and ctx.sufficiency_result:
+        if ctx.sufficiency_result:
             performance_metrics["data_sufficiency_analysis"] = {
                 "was_sufficient": ctx.sufficiency_result.is_sufficient,
                 "confidence": ctx.sufficiency_result.confidence_score,
@@ -153,31 +301,45 @@ def ingest_tiktok(self, job_id: str, url: str, owner_uid: str, recipe_id: str):
             }
         
         ctx.update_status(ctx.final_status, performance_metrics)
+        ctx.flush_progress()
         
-        print(f"[TASK] Job {job_id} completed with status: {ctx.final_status}")
+        logger.info(f"Job {job_id} completed with status: {ctx.final_status}")
         return {"job_id": job_id, "status": ctx.final_status, "recipe_id": ctx.saved_recipe_id}
         
     except Exception as exc:
         log_stage_timing("TOTAL_PIPELINE", pipeline_start)
         error_info = get_error("UNKNOWN_ERROR", str(exc))
-        print(f"[ERROR] Pipeline failed: {error_info}")
-        traceback.print_exc()
+        logger.exception(f"Pipeline failed: {error_info}")
         
         ctx.update_status(PipelineStatus.FAILED, {
             "error_code": error_info["code"],
             "error_message": error_info["message"]
         })
+        ctx.flush_progress()
         
-        raise self.retry(exc=exc)
+        if isinstance(exc, RETRYABLE_ERRORS) and not isinstance(exc, NON_RETRYABLE_ERRORS):
+            countdown = min(MAX_RETRY_COUNTDOWN, 2 ** self.request.retries + random.random())
+            raise self.retry(exc=exc, countdown=countdown)
+        raise
+
+
+def _checkpointed_transcript(job_data):
+    """
+    Transcript saved by an earlier attempt of this job (written with DRAFT_TRANSCRIBED), if any.
+    A failed attempt only adds error fields to the job document, so the transcript survives
+    into the retry and Whisper doesn't have to run again.
+    """
+    transcript = (job_data or {}).get("transcript")
+    return transcript if isinstance(transcript, str) and transcript else None
 
 
-def _download_stage(ctx: PipelineContext, url: str, job_dir, task_self):
+def _download_stage(ctx: PipelineContext, url: str, job_dir):
     """Handle video download stage"""
-    ctx.update_status(PipelineStatus.DOWNLOADING)
-    download_start = time.time()
+    ctx.update_progress(PipelineStatus.DOWNLOADING)
+    download_start = time.monotonic_ns()
     
     try:
-        print(f"[TASK] Downloading video from {url}")
+        logger.info(f"Downloading video from {url}")
         video_result = download_video(url, output_dir=job_dir)
         
         if isinstance(video_result, tuple) and len(video_result) == 3:
@@ -192,55 +354,55 @@ def _download_stage(ctx: PipelineContext, url: str, job_dir, task_self):
             thumbnail_url = None
             
         log_stage_timing("DOWNLOAD", download_start)
-        print(f"[TASK] Video downloaded successfully: {video_path}")
+        logger.info(f"Video downloaded successfully: {video_path}")
         if thumbnail_url:
-            print(f"[TASK] Thumbnail URL extracted: {thumbnail_url}")
+            logger.info(f"Thumbnail URL extracted: {thumbnail_url}")
         return video_path, metadata_title, thumbnail_url
                 
     except VideoUnavailableError as e:
         log_stage_timing("DOWNLOAD", download_start)
         ctx.handle_error("VIDEO_UNAVAILABLE", e, "Download")
-        raise task_self.retry(exc=e)
+        raise
     except Exception as e:
         log_stage_timing("DOWNLOAD", download_start)
         ctx.handle_error("DOWNLOAD_FAILED", e, "Download")
-        raise task_self.retry(exc=e)
+        raise
 
 
-def _extract_audio_stage(ctx: PipelineContext, video_path, job_dir, task_self):
+def _extract_audio_stage(ctx: PipelineContext, video_path, job_dir):
     """Handle audio extraction stage"""
-    ctx.update_status(PipelineStatus.EXTRACTING)
-    extract_start = time.time()
+    ctx.update_progress(PipelineStatus.EXTRACTING)
+    extract_start = time.monotonic_ns()
     
     try:
-        print(f"[TASK] Extracting audio from video")
-        audio_path = extract_audio(video_path, output_dir=job_dir)
+        logger.info("Extracting audio from video")
+        audio_path = extract_audio(video_path, output_dir=job_dir, audio_format=TRANSCRIPTION_AUDIO_FORMAT)
         log_stage_timing("AUDIO_EXTRACTION", extract_start)
-        print(f"[TASK] Audio extracted successfully: {audio_path}")
+        logger.info(f"Audio extracted successfully: {audio_path}")
         return audio_path
                 
     except AudioExtractionError as e:
         log_stage_timing("AUDIO_EXTRACTION", extract_start)
         ctx.handle_error("AUDIO_EXTRACTION_FAILED", e, "Audio extraction")
-        raise task_self.retry(exc=e)
+        raise
 
 
-def _transcription_stage(ctx: PipelineContext, audio_path, task_self):
+def _transcription_stage(ctx: PipelineContext, audio_path):
     """Handle transcription stage"""
-    ctx.update_status(PipelineStatus.TRANSCRIBING)
-    transcribe_start = time.time()
+    ctx.update_progress(PipelineStatus.TRANSCRIBING)
+    transcribe_start = time.monotonic_ns()
     
     try:
-        print(f"[TASK] Transcribing audio using OpenAI ASR")
+        logger.info("Transcribing audio using OpenAI ASR")
         transcript = TranscriptionService.transcribe(audio_path)
         log_stage_timing("TRANSCRIPTION", transcribe_start)
-        print(f"[TASK] Transcription completed: {len(transcript)} characters")
+        logger.info(f"Transcription completed: {len(transcript)} characters")
         return transcript
                 
     except TranscriptionError as e:
         log_stage_timing("TRANSCRIPTION", transcribe_start)
         ctx.handle_error("ASR_FAILED", e, "Transcription")
-        raise task_self.retry(exc=e)
+        raise
 
 
 def _title_extraction_stage(ctx: PipelineContext, metadata_title, transcript):
@@ -248,28 +410,48 @@ def _title_extraction_stage(ctx: PipelineContext, metadata_title, transcript):
     raw_title = TitleExtractor.from_metadata(metadata_title) or TitleExtractor.from_transcript(transcript)
     normalized_title = TitleExtractor.normalize_title(raw_title)
     
-    # Update both collections with title and transcript
-    ctx.update_status(PipelineStatus.DRAFT_TRANSCRIBED, {
-        "transcript": transcript,
-        "title": normalized_title
-    })
-    
-    ctx.update_recipe_status(PipelineStatus.DRAFT_TRANSCRIBED, {
-        "title": normalized_title,
-        "transcript": transcript,
-        "owner_uid": ctx.owner_uid
-    })
+    # Update both collections with title and transcript in a single write
+    ctx.update_job_and_recipe_status(
+        PipelineStatus.DRAFT_TRANSCRIBED,
+        job_data={
+            "transcript": transcript,
+            "title": normalized_title
+        },
+        recipe_data={
+            "title": normalized_title,
+            "transcript": transcript,
+            "owner_uid": ctx.owner_uid
+        }
+    )
     
     return normalized_title
 
 
+def _transcript_sufficiency(transcript):
+    """Sufficient result when the transcript itself lists enough measured ingredients, else None"""
+    measurement_count = len(INGREDIENT_RE.findall(transcript or ""))
+    if measurement_count < MIN_TRANSCRIPT_MEASUREMENTS:
+        return None
+    return SufficiencyResult(
+        is_sufficient=True,
+        confidence_score=1.0,
+        reasoning=f"Transcript lists {measurement_count} measured ingredients",
+        estimated_completeness={
+            "ingredients": "complete",
+            "instructions": "unknown",
+            "timing": "unknown",
+            "measurements": "complete"
+        }
+    )
+
+
 def _data_sufficiency_analysis_stage(ctx: PipelineContext, title, transcript, metadata_title):
     """Handle OpenAI-based data sufficiency analysis stage"""
-    ctx.update_status(PipelineStatus.ANALYZING_DATA_SUFFICIENCY)
-    analysis_start = time.time()
+    ctx.update_progress(PipelineStatus.ANALYZING_DATA_SUFFICIENCY)
+    analysis_start = time.monotonic_ns()
     
     try:
-        print(f"[TASK] Starting OpenAI data sufficiency analysis...")
+        logger.info("Starting OpenAI data sufficiency analysis...")
         
         # Initialize data sufficiency analyzer
         analyzer = DataSufficiencyAnalyzer()
@@ -279,8 +461,8 @@ def _data_sufficiency_analysis_stage(ctx: PipelineContext, title, transcript, me
         if metadata_title and metadata_title != title:
             metadata['description'] = metadata_title
         
-        # Analyze data sufficiency
-        sufficiency_result = analyzer.analyze_sufficiency(
+        # Analyze data sufficiency (a measurement-heavy transcript settles it without OpenAI)
+        sufficiency_result = _transcript_sufficiency(transcript) or analyzer.analyze_sufficiency(
             title=title,
             transcript=transcript,
             metadata=metadata
@@ -296,7 +478,7 @@ def _data_sufficiency_analysis_stage(ctx: PipelineContext, title, transcript, me
         
         # Add additional pipeline metrics
         analysis_summary.update({
-            "analysis_timestamp": datetime.now(timezone.utc).isoformat(),
+            "analysis_timestamp": utcnow_iso(),
             "text_sources_analyzed": {
                 "title_length": len(title) if title else 0,
                 "transcript_length": len(transcript) if transcript else 0,
@@ -310,20 +492,19 @@ def _data_sufficiency_analysis_stage(ctx: PipelineContext, title, transcript, me
         })
         
         if sufficiency_result.is_sufficient:
-            print(f"[TASK] Data sufficiency analysis: SUFFICIENT (confidence: {sufficiency_result.confidence_score:.2f})")
-            print(f"[TASK] Reasoning: {sufficiency_result.reasoning}")
+            logger.info(f"Data sufficiency analysis: SUFFICIENT (confidence: {sufficiency_result.confidence_score:.2f})")
+            logger.info(f"Reasoning: {sufficiency_result.reasoning}")
         else:
-            print(f"[TASK] Data sufficiency analysis: INSUFFICIENT (confidence: {sufficiency_result.confidence_score:.2f})")
-            print(f"[TASK] Reasoning: {sufficiency_result.reasoning}")
+            logger.info(f"Data sufficiency analysis: INSUFFICIENT (confidence: {sufficiency_result.confidence_score:.2f})")
+            logger.info(f"Reasoning: {sufficiency_result.reasoning}")
         
         return sufficiency_result
         
     except Exception as e:
         log_stage_timing("DATA_SUFFICIENCY_ANALYSIS", analysis_start)
-        print(f"[ERROR] Data sufficiency analysis failed: {e}")
+        logger.error(f"Data sufficiency analysis failed: {e}")
         
         # On error, default to requiring OCR (safe fallback)
-        from services.data_sufficiency_analyzer import SufficiencyResult
         fallback_result = SufficiencyResult(
             is_sufficient=False,
             confidence_score=0.0,
@@ -357,7 +538,7 @@ def _conditional_ocr_stage(ctx: PipelineContext, video_path, job_dir):
     
     # Safety check: ensure we have sufficiency analysis results
     if not ctx.sufficiency_result:
-        print("[TASK] No sufficiency analysis available - proceeding with OCR as fallback")
+        logger.info("No sufficiency analysis available - proceeding with OCR as fallback")
         return _ocr_stage(ctx, video_path, job_dir)
     
     confidence = ctx.sufficiency_result.confidence_score
@@ -371,9 +552,9 @@ def _conditional_ocr_stage(ctx: PipelineContext, video_path, job_dir):
     )
     
     if should_skip_ocr:
-        print(f"[TASK] ✅ Skipping OCR - OpenAI analysis indicates sufficient data")
-        print(f"[TASK]    Confidence: {confidence:.2f} (>= {MIN_CONFIDENCE_THRESHOLD} threshold)")
-        print(f"[TASK]    Reasoning: {reasoning}")
+        logger.info("✅ Skipping OCR - OpenAI analysis indicates sufficient data")
+        logger.info(f"   Confidence: {confidence:.2f} (>= {MIN_CONFIDENCE_THRESHOLD} threshold)")
+        logger.info(f"   Reasoning: {reasoning}")
         
         # Update status with detailed OCR skip information
         ctx.update_status(PipelineStatus.OCR_SKIPPED, {
@@ -388,6 +569,11 @@ def _conditional_ocr_stage(ctx: PipelineContext, video_path, job_dir):
             }
         })
         
+        # The prefetched frames won't be used; drop the extraction if it hasn't started yet
+        # (fallback OCR extracts frames itself when the prefetch was cancelled)
+        if ctx.frames_future is not None:
+            ctx.frames_future.cancel()
+        
         # Store empty OCR results for potential fallback
         ctx.original_ocr_results = []
         return []  # Return empty OCR results
@@ -399,8 +585,8 @@ def _conditional_ocr_stage(ctx: PipelineContext, video_path, job_dir):
         else:
             skip_reason = f"Confidence {confidence:.2f} below threshold {MIN_CONFIDENCE_THRESHOLD}"
         
-        print(f"[TASK] 🔍 Proceeding with OCR - {skip_reason}")
-        print(f"[TASK]    Reasoning: {reasoning}")
+        logger.info(f"🔍 Proceeding with OCR - {skip_reason}")
+        logger.info(f"   Reasoning: {reasoning}")
         
         # Update status to show OCR decision reasoning
         ctx.update_status(PipelineStatus.OCRING, {
@@ -416,50 +602,54 @@ def _conditional_ocr_stage(ctx: PipelineContext, video_path, job_dir):
         return ocr_results
 
 
+def _finish_frame_extraction(ctx: PipelineContext):
+    """Wait for a prefetch still writing frames into the job dir before it is removed"""
+    if ctx.frames_future is not None and not ctx.frames_future.cancelled():
+        wait_for_futures([ctx.frames_future])
+
+
+def _extract_ocr_frames(ctx: PipelineContext, video_path, frames_dir):
+    """Frames for OCR: the ones extracted alongside transcription when available (optimized - max 8 frames)"""
+    if ctx.frames_future is not None and not ctx.frames_future.cancelled():
+        return ctx.frames_future.result()
+    return extract_frames(video_path, frames_dir, method="scene", fps=1.0, max_frames=8)
+
+
 def _ocr_stage(ctx: PipelineContext, video_path, job_dir):
     """Handle OCR processing stage"""
-    ctx.update_status(PipelineStatus.OCRING)
+    ctx.update_progress(PipelineStatus.OCRING)
                 
-    # Extract frames (optimized - max 8 frames)
-    frame_extract_start = time.time()
+    # Extract frames (or collect the ones extracted during transcription)
+    frame_extract_start = time.monotonic_ns()
     try:
-        print(f"[TASK] Extracting video frames for OCR...")
-        frames = extract_frames(video_path, job_dir / "frames", method="scene", fps=1.0, max_frames=8)
+        logger.info("Extracting video frames for OCR...")
+        frames = _extract_ocr_frames(ctx, video_path, job_dir / "frames")
         log_stage_timing("FRAME_EXTRACTION", frame_extract_start)
-        print(f"[TASK] Frame extraction completed: {len(frames)} frames")
+        logger.info(f"Frame extraction completed: {len(frames)} frames")
     except Exception as e:
         log_stage_timing("FRAME_EXTRACTION", frame_extract_start)
-        print(f"[ERROR] Frame extraction failed: {e}")
+        logger.error(f"Frame extraction failed: {e}")
         frames = []
                 
     # Run OCR
     ocr_service = OCRService()
-    ocr_start = time.time()
+    ocr_start = time.monotonic_ns()
     try:
-        print(f"[TASK] Running OCR on {len(frames)} frames...")
+        logger.info(f"Running OCR on {len(frames)} frames...")
         ocr_results = ocr_service.run_ocr_on_frames(frames)
         log_stage_timing("OCR_PROCESSING", ocr_start)
                     
-        # Process OCR results
-        all_text_blocks = [tb for frame in ocr_results for tb in frame["text_blocks"]]
-        deduped_blocks = ocr_service.dedupe_text_blocks(all_text_blocks)
-        ingredient_candidates = ocr_service.extract_ingredient_candidates(deduped_blocks)
-                    
-        # Persist OCR results
-        TikTokIngestService.update_ocr_results(
-            ctx.job_id,
-            onscreen_text=ocr_results,
-            ingredient_candidates=ingredient_candidates
-        )
+        # Post-process and persist OCR results in the background; the LLM stage only needs ocr_results
+        ctx.persist_ocr_results(ocr_service, ocr_results)
                     
-        ctx.update_status(PipelineStatus.OCR_DONE)
-        print(f"[TASK] OCR processing completed")
+        ctx.update_progress(PipelineStatus.OCR_DONE)
+        logger.info("OCR processing completed")
         return ocr_results
                         
     except Exception as e:
         log_stage_timing("OCR_PROCESSING", ocr_start)
         error_info = get_error("OCR_FAILED", str(e))
-        print(f"[ERROR] OCR processing failed: {error_info}")
+        logger.error(f"OCR processing failed: {error_info}")
         
         # Don't fail the entire job, continue with empty OCR results
         ctx.update_status(PipelineStatus.OCR_FAILED_BUT_CONTINUED, {
@@ -469,6 +659,27 @@ def _ocr_stage(ctx: PipelineContext, video_path, job_dir):
         return []
 
 
+def _persist_ocr_results(job_id, ocr_service, ocr_results):
+    """
+    Dedupe OCR text blocks, pick ingredient candidates and store both on the job document.
+    Returns once the write has finished (update_ocr_results logs its outcome), so waiting on
+    this call waits on the write too.
+    """
+    try:
+        all_text_blocks = [tb for frame in ocr_results for tb in frame["text_blocks"]]
+        deduped_blocks = ocr_service.dedupe_text_blocks(all_text_blocks)
+        ingredient_candidates = ocr_service.extract_ingredient_candidates(deduped_blocks)
+        write = TikTokIngestService.update_ocr_results(
+            job_id,
+            onscreen_text=ocr_results,
+            ingredient_candidates=ingredient_candidates
+        )
+        if write is not None:
+            wait_for_futures([write])
+    except Exception as e:
+        logger.error(f"Failed to persist OCR results for job {job_id}: {e}")
+
+
 def _llm_stage(ctx: PipelineContext, normalized_title, transcript, ocr_results):
     """Handle LLM refinement stage with intelligent fallback mechanism"""
     return _llm_stage_with_fallback(ctx, normalized_title, transcript, ocr_results)
@@ -476,11 +687,11 @@ def _llm_stage(ctx: PipelineContext, normalized_title, transcript, ocr_results):
 
 def _llm_stage_with_fallback(ctx: PipelineContext, normalized_title, transcript, ocr_results):
     """Handle LLM refinement with intelligent fallback to OCR if recipe quality is poor"""
-    ctx.update_status(PipelineStatus.LLM_REFINING)
-    llm_start = time.time()
+    ctx.update_progress(PipelineStatus.LLM_REFINING)
+    llm_start = time.monotonic_ns()
     
     try:
-        print(f"[TASK] Starting LLM recipe refinement...")
+        logger.info("Starting LLM recipe refinement...")
                     
         # Initialize services
         llm_service = LLMRefineService()
@@ -517,10 +728,10 @@ def _llm_stage_with_fallback(ctx: PipelineContext, normalized_title, transcript,
                 not ctx.fallback_triggered and 
                 not ocr_results):  # Only if OCR was originally skipped
                 
-                print(f"[TASK] 🔄 FALLBACK TRIGGERED - Recipe quality insufficient")
-                print(f"[TASK]    Quality score: {quality_result.quality_score:.2f}")
-                print(f"[TASK]    Missing: {', '.join(quality_result.missing_components)}")
-                print(f"[TASK]    Reasons: {', '.join(fallback_decision['reasons'])}")
+                logger.info("🔄 FALLBACK TRIGGERED - Recipe quality insufficient")
+                logger.info(f"   Quality score: {quality_result.quality_score:.2f}")
+                logger.info(f"   Missing: {', '.join(quality_result.missing_components)}")
+                logger.info(f"   Reasons: {', '.join(fallback_decision['reasons'])}")
                 
                 # Mark fallback as triggered to prevent infinite loops
                 ctx.fallback_triggered = True
@@ -539,7 +750,7 @@ def _llm_stage_with_fallback(ctx: PipelineContext, normalized_title, transcript,
                 
                 # Re-run LLM with OCR data
                 if fallback_ocr_results:
-                    print(f"[TASK] Re-running LLM with fallback OCR data ({len(fallback_ocr_results)} results)")
+                    logger.info(f"Re-running LLM with fallback OCR data ({len(fallback_ocr_results)} results)")
                     
                     recipe_json_fallback, parse_error_fallback = llm_service.refine_with_validation_retry(
                         title=normalized_title,
@@ -557,36 +768,37 @@ def _llm_stage_with_fallback(ctx: PipelineContext, normalized_title, transcript,
                         
                         # Use fallback result if it's better
                         if fallback_quality.quality_score > quality_result.quality_score:
-                            print(f"[TASK] ✅ Fallback improved quality: {quality_result.quality_score:.2f} → {fallback_quality.quality_score:.2f}")
+                            logger.info(f"✅ Fallback improved quality: {quality_result.quality_score:.2f} → {fallback_quality.quality_score:.2f}")
                             recipe_json = recipe_json_fallback
                             parse_error = parse_error_fallback
                             ocr_results = fallback_ocr_results  # Update for metadata
                         else:
-                            print(f"[TASK] ⚠️ Fallback didn't improve quality, keeping original")
+                            logger.warning("⚠️ Fallback didn't improve quality, keeping original")
                 else:
-                    print(f"[TASK] ⚠️ Fallback OCR failed, keeping original recipe")
+                    logger.warning("⚠️ Fallback OCR failed, keeping original recipe")
                     
         log_stage_timing("LLM_REFINEMENT", llm_start)
                     
         # Determine final status
         if parse_error:
             ctx.final_status = PipelineStatus.DRAFT_PARSED_WITH_ERRORS
-            print(f"[TASK] Recipe parsed with errors: {parse_error}")
+            logger.info(f"Recipe parsed with errors: {parse_error}")
         else:
             ctx.final_status = PipelineStatus.DRAFT_PARSED
-            print(f"[TASK] Recipe parsed successfully")
+            logger.info("Recipe parsed successfully")
                     
         # Prepare LLM metadata
         llm_metadata = {
             "llm_model_used": llm_service.model,
-            "llm_processing_time_seconds": round(time.time() - llm_start, 2),
-            "llm_processing_completed_at": datetime.now(timezone.utc).isoformat(),
+            "llm_processing_time_seconds": round((time.monotonic_ns() - llm_start) / 1e9, 2),
+            "llm_processing_completed_at": utcnow_iso(),
             "llm_validation_retries": 2,
             "ocr_frames_processed": len(ocr_results) if ocr_results else 0,
             "fallback_triggered": ctx.fallback_triggered
         }
                     
-        # Update Firestore using the dedicated service
+        # Update Firestore using the dedicated service (after any queued progress write)
+        ctx.flush_progress()
         if ctx.firestore_service:
             success = ctx.firestore_service.update_recipe_with_llm_results(
                 job_id=ctx.job_id,
@@ -597,16 +809,17 @@ def _llm_stage_with_fallback(ctx: PipelineContext, normalized_title, transcript,
             )
                         
             if not success:
-                print(f"[TASK] Warning: Firestore update failed for job {ctx.job_id}")
+                logger.warning(f"Firestore update failed for job {ctx.job_id}")
         
         return recipe_json
                     
     except LLMRefineError as e:
         log_stage_timing("LLM_REFINEMENT", llm_start)
         error_info = get_error("LLM_FAILED", str(e))
-        print(f"[ERROR] LLM refinement failed: {error_info}")
+        logger.error(f"LLM refinement failed: {error_info}")
         
-        # Update Firestore with LLM failure
+        # Update Firestore with LLM failure (after any queued progress write)
+        ctx.flush_progress()
         if ctx.firestore_service:
             ctx.firestore_service.update_recipe_llm_failure(
                 job_id=ctx.job_id,
@@ -622,10 +835,10 @@ def _llm_stage_with_fallback(ctx: PipelineContext, normalized_title, transcript,
 def _run_fallback_ocr(ctx: PipelineContext):
     """Run OCR as a fallback mechanism when recipe quality is insufficient"""
     try:
-        print(f"[TASK] Running intelligent fallback OCR...")
+        logger.info("Running intelligent fallback OCR...")
         
         if not ctx.video_path or not ctx.job_dir:
-            print(f"[TASK] ⚠️ Missing video path or job directory for fallback OCR")
+            logger.warning("⚠️ Missing video path or job directory for fallback OCR")
             return []
         
         # Update status to show fallback OCR is running
@@ -635,26 +848,23 @@ def _run_fallback_ocr(ctx: PipelineContext):
         })
         
         # Run the same OCR process as the normal pipeline
-        fallback_start = time.time()
-        
         # Extract frames (same as normal OCR stage)
-        frame_extract_start = time.time()
+        frame_extract_start = time.monotonic_ns()
         try:
-            print(f"[TASK] Extracting video frames for fallback OCR...")
-            frames = extract_frames(ctx.video_path, ctx.job_dir / "fallback_frames", 
-                                  method="scene", fps=1.0, max_frames=8)
+            logger.info("Extracting video frames for fallback OCR...")
+            frames = _extract_ocr_frames(ctx, ctx.video_path, ctx.job_dir / "fallback_frames")
             log_stage_timing("FALLBACK_FRAME_EXTRACTION", frame_extract_start)
-            print(f"[TASK] Fallback frame extraction completed: {len(frames)} frames")
+            logger.info(f"Fallback frame extraction completed: {len(frames)} frames")
         except Exception as e:
             log_stage_timing("FALLBACK_FRAME_EXTRACTION", frame_extract_start)
-            print(f"[ERROR] Fallback frame extraction failed: {e}")
+            logger.error(f"Fallback frame extraction failed: {e}")
             return []
         
         # Run OCR on frames using the correct method
         if frames:
-            ocr_start = time.time()
+            ocr_start = time.monotonic_ns()
             try:
-                print(f"[TASK] Running OCR on {len(frames)} fallback frames...")
+                logger.info(f"Running OCR on {len(frames)} fallback frames...")
                 ocr_service = OCRService()
                 
                 # Use the correct method that expects list of (frame_path, timestamp) tuples
@@ -663,36 +873,27 @@ def _run_fallback_ocr(ctx: PipelineContext):
                 log_stage_timing("FALLBACK_OCR_PROCESSING", ocr_start)
                 
                 if ocr_results:
-                    print(f"[TASK] ✅ Fallback OCR completed: {len(ocr_results)} frames with text")
+                    logger.info(f"✅ Fallback OCR completed: {len(ocr_results)} frames with text")
                     
-                    # Update OCR results in Firestore
+                    # Update OCR results in Firestore, in the background like the normal OCR flow
                     if ctx.tiktok_service:
-                        # Extract ingredient candidates like the normal OCR flow
-                        all_text_blocks = [tb for frame in ocr_results for tb in frame["text_blocks"]]
-                        deduped_blocks = ocr_service.dedupe_text_blocks(all_text_blocks)
-                        ingredient_candidates = ocr_service.extract_ingredient_candidates(deduped_blocks)
-                        
-                        ctx.tiktok_service.update_ocr_results(
-                            ctx.job_id, 
-                            ocr_results, 
-                            ingredient_candidates
-                        )
+                        ctx.persist_ocr_results(ocr_service, ocr_results)
                     
                     return ocr_results
                 else:
-                    print(f"[TASK] ⚠️ Fallback OCR found no text in frames")
+                    logger.warning("⚠️ Fallback OCR found no text in frames")
                     return []
                     
             except Exception as e:
                 log_stage_timing("FALLBACK_OCR_PROCESSING", ocr_start)
-                print(f"[ERROR] Fallback OCR processing failed: {e}")
+                logger.error(f"Fallback OCR processing failed: {e}")
                 return []
         else:
-            print(f"[TASK] ⚠️ No frames available for fallback OCR")
+            logger.warning("⚠️ No frames available for fallback OCR")
             return []
         
     except Exception as e:
-        print(f"[ERROR] Fallback OCR failed: {e}")
+        logger.error(f"Fallback OCR failed: {e}")
         return []
 
 
@@ -701,9 +902,9 @@ def _persistence_stage(ctx: PipelineContext, recipe_json):
     if not ctx.recipe_persist_service or not recipe_json:
         return
         
-    persist_start = time.time()
+    persist_start = time.monotonic_ns()
     try:
-        print(f"[TASK] Starting recipe persistence for job {ctx.job_id}")
+        logger.info(f"Starting recipe persistence for job {ctx.job_id}")
         
         ctx.saved_recipe_id = ctx.recipe_persist_service.save_recipe_and_update_job(
             recipe_json=recipe_json,
@@ -716,12 +917,12 @@ def _persistence_stage(ctx: PipelineContext, recipe_json):
         log_stage_timing("RECIPE_PERSISTENCE", persist_start)
         
         if ctx.saved_recipe_id:
-            print(f"[TASK] Successfully saved recipe {ctx.saved_recipe_id}")
+            logger.info(f"Successfully saved recipe {ctx.saved_recipe_id}")
             ctx.final_status = PipelineStatus.COMPLETED
         else:
-            print(f"[TASK] Failed to save recipe for job {ctx.job_id}")
+            logger.info(f"Failed to save recipe for job {ctx.job_id}")
             
     except Exception as e:
         log_stage_timing("RECIPE_PERSISTENCE", persist_start)
         error_info = get_error("PERSIST_FAILED", str(e))
-        print(f"[ERROR] Recipe persistence failed: {error_info}") 
\ No newline at end of file
+        logger.error(f"Recipe persistence failed: {error_info}")
\ No newline at end of file
@@ -0,0 +1,50 @@
+import asyncio
+import os
+import pytest
+from unittest.mock import patch, MagicMock, AsyncMock, mock_open
+from services.llm_parallel import Throttler, estimate_tokens, refine_many
+from services.llm_refine_service import LLMRefineService
+
+
+def test_throttler_waits_for_token_capacity():
+    """Test a request that exceeds remaining token capacity sleeps until it is replenished"""
+    async def run():
+        throttler = Throttler(requests_per_minute=600, tokens_per_minute=600)
+        await throttler.acquire(500)
+        assert throttler.available_request_capacity == pytest.approx(599, abs=0.1)
+        with patch('services.llm_parallel.asyncio.sleep', new=AsyncMock()) as mock_sleep:
+            # Pretend the sleep let a full minute pass
+            async def advance(seconds):
+                throttler._last_update -= 60
+            mock_sleep.side_effect = advance
+            await throttler.acquire(200)
+            mock_sleep.assert_awaited_once()
+            # Needed 100 more tokens at 10 tokens/second
+            assert mock_sleep.await_args.args[0] == pytest.approx(10, abs=0.1)
+    asyncio.run(run())
+
+
+def test_throttler_rejects_non_positive_limits():
+    with pytest.raises(ValueError):
+        Throttler(requests_per_minute=0, tokens_per_minute=1000)
+
+
+@patch('services.llm_refine_service.AsyncOpenAI')
+@patch('services.llm_refine_service.OpenAI')
+def test_refine_many_throttles_each_job(mock_openai_class, mock_async_openai_class):
+    """Test every job reserves capacity and results keep job order"""
+    with patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'}):
+        with patch('builtins.open', mock_open(read_data="prompt")):
+            mock_aclient = MagicMock()
+            mock_aclient.__aenter__.return_value = mock_aclient
+            mock_async_openai_class.return_value = mock_aclient
+            service = LLMRefineService()
+            service.arefine_recipe = AsyncMock(side_effect=lambda title, **kwargs: ({"title": title}, None))
+            jobs = [{"title": "First", "transcript": "x" * 400}, {"title": "Second", "transcript": ""}]
+            
+            with patch.object(Throttler, 'acquire', new=AsyncMock()) as mock_acquire:
+                results = refine_many(jobs, requests_per_minute=100, tokens_per_minute=100000, service=service)
+            
+            assert [recipe["title"] for recipe, _ in results] == ["First", "Second"]
+            assert mock_acquire.await_count == 2
+            assert estimate_tokens(service, {"transcript": "x" * 400}) - estimate_tokens(service, {}) == 100
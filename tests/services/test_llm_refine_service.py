@@ -1,9 +1,28 @@
 import pytest
 import os
 import json
-from unittest.mock import patch, MagicMock, mock_open
+import httpx
+from openai import RateLimitError
+from unittest.mock import patch, MagicMock, AsyncMock, mock_open
 from services.llm_refine_service import LLMRefineService, LLMRefineError
 
+
+def _stream_response(content, is_async=False):
+    """Build a mock streamed chat completion that yields content in small chunks"""
+    chunks = []
+    for start in range(0, len(content), 16):
+        chunk = MagicMock()
+        chunk.choices[0].delta.content = content[start:start + 16]
+        chunks.append(chunk)
+    stream = MagicMock()
+    if is_async:
+        stream.__aiter__.return_value = chunks
+        stream.close = AsyncMock()
+    else:
+        stream.__iter__.return_value = iter(chunks)
+    return stream
+
+
 class TestLLMRefineService:
     """Tests for LLMRefineService"""
 
@@ -53,6 +72,32 @@ class TestLLMRefineService:
                 assert "1 cup flour" in result
                 assert "2 tbsp sugar" in result
 
+    def test_prepare_ocr_text_drops_repeated_overlay_text(self):
+        """Test text repeated across frames is only sent to the LLM once"""
+        with patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'}):
+            with patch('builtins.open', mock_open(read_data="test")):
+                service = LLMRefineService()
+                ocr_results = [
+                    {"timestamp": 1.0, "text_blocks": [{"text": "Easy Pancakes"}, {"text": "1 cup flour"}]},
+                    {"timestamp": 2.0, "text_blocks": [{"text": "easy pancakes "}]},
+                    {"timestamp": 3.0, "text_blocks": [{"text": "Easy Pancakes"}, {"text": "2 eggs"}]},
+                ]
+                result = service._prepare_ocr_text(ocr_results)
+                assert result == "Frame at 1.0s: Easy Pancakes | 1 cup flour\nFrame at 3.0s: 2 eggs"
+
+    def test_prepare_ocr_text_keeps_confident_blocks_within_budget(self):
+        """Test OCR text over the prompt budget keeps only the highest-confidence blocks, in frame order"""
+        with patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'}):
+            with patch('builtins.open', mock_open(read_data="test")):
+                service = LLMRefineService()
+                service.MAX_OCR_PROMPT_CHARS = 20
+                ocr_results = [
+                    {"timestamp": 1.0, "text_blocks": [{"text": "1 cup flour", "score": 0.9}, {"text": "blurry caption", "score": 0.55}]},
+                    {"timestamp": 2.0, "text_blocks": [{"text": "2 eggs", "score": 0.95}]},
+                ]
+                result = service._prepare_ocr_text(ocr_results)
+                assert result == "Frame at 1.0s: 1 cup flour\nFrame at 2.0s: 2 eggs"
+
     def test_prepare_ocr_text_empty_results(self):
         """Test OCR text preparation with empty results"""
         with patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'}):
@@ -95,6 +140,19 @@ class TestLLMRefineService:
                 assert result["title"] == "Test Recipe"
                 assert error is None
 
+    def test_extract_json_from_response_surrounding_prose(self):
+        """Test JSON extraction from plain JSON wrapped in prose and from an unterminated block"""
+        with patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'}):
+            with patch('builtins.open', mock_open(read_data="test")):
+                service = LLMRefineService()
+                result, error = service._extract_json_from_response('Here is the recipe: {"title": "Test Recipe"} Enjoy!')
+                assert result["title"] == "Test Recipe"
+                assert error is None
+                
+                result, error = service._extract_json_from_response('```json\n{"title": "Test Recipe"}')
+                assert result["title"] == "Test Recipe"
+                assert error is None
+
     def test_extract_json_from_response_invalid_json(self):
         """Test JSON extraction from response with invalid JSON"""
         with patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'}):
@@ -147,8 +205,7 @@ class TestLLMRefineService:
             with patch('builtins.open', mock_open(read_data="test")):
                 # Mock the OpenAI client
                 mock_client = MagicMock()
-                mock_response = MagicMock()
-                mock_response.choices[0].message.content = '{"title": "Test Recipe", "ingredients": [{"name": "flour", "quantity": "1 cup"}], "instructions": ["Mix ingredients"]}'
+                mock_response = _stream_response('{"title": "Test Recipe", "ingredients": [{"name": "flour", "quantity": "1 cup"}], "instructions": ["Mix ingredients"]}')
                 mock_client.chat.completions.create.return_value = mock_response
                 mock_openai_class.return_value = mock_client
                 
@@ -167,8 +224,7 @@ class TestLLMRefineService:
             with patch('builtins.open', mock_open(read_data="test")):
                 # Mock the OpenAI client
                 mock_client = MagicMock()
-                mock_response = MagicMock()
-                mock_response.choices[0].message.content = '{"title": "", "ingredients": [{"name": "flour", "quantity": "1 cup"}], "instructions": ["Mix ingredients"]}'
+                mock_response = _stream_response('{"title": "", "ingredients": [{"name": "flour", "quantity": "1 cup"}], "instructions": ["Mix ingredients"]}')
                 mock_client.chat.completions.create.return_value = mock_response
                 mock_openai_class.return_value = mock_client
                 
@@ -184,8 +240,7 @@ class TestLLMRefineService:
             with patch('builtins.open', mock_open(read_data="test")):
                 # Mock the OpenAI client
                 mock_client = MagicMock()
-                mock_response = MagicMock()
-                mock_response.choices[0].message.content = '{"title": "Test Recipe", "ingredients": [{"name": "flour", "quantity": "1 cup"}], "instructions": ["Mix ingredients"]}'
+                mock_response = _stream_response('{"title": "Test Recipe", "ingredients": [{"name": "flour", "quantity": "1 cup"}], "instructions": ["Mix ingredients"]}')
                 mock_client.chat.completions.create.return_value = mock_response
                 mock_openai_class.return_value = mock_client
                 
@@ -203,10 +258,8 @@ class TestLLMRefineService:
                 mock_client = MagicMock()
                 
                 # First response is invalid JSON, second is valid
-                mock_response1 = MagicMock()
-                mock_response1.choices[0].message.content = '{"title": "Test Recipe", "ingredients": [{"name": "flour", "quantity": "1 cup"}], "instructions": ["Mix ingredients"]'
-                mock_response2 = MagicMock()
-                mock_response2.choices[0].message.content = '{"title": "Test Recipe", "ingredients": [{"name": "flour", "quantity": "1 cup"}], "instructions": ["Mix ingredients"]}'
+                mock_response1 = _stream_response('{"title": "Test Recipe", "ingredients": [{"name": "flour", "quantity": "1 cup"}], "instructions": ["Mix ingredients"]')
+                mock_response2 = _stream_response('{"title": "Test Recipe", "ingredients": [{"name": "flour", "quantity": "1 cup"}], "instructions": ["Mix ingredients"]}')
                 mock_client.chat.completions.create.side_effect = [mock_response1, mock_response2]
                 mock_openai_class.return_value = mock_client
                 
@@ -222,8 +275,7 @@ class TestLLMRefineService:
             with patch('builtins.open', mock_open(read_data="test")):
                 # Mock the OpenAI client
                 mock_client = MagicMock()
-                mock_response = MagicMock()
-                mock_response.choices[0].message.content = '{"title": "", "ingredients": [{"name": "flour", "quantity": "1 cup"}], "instructions": ["Mix ingredients"]}'
+                mock_response = _stream_response('{"title": "", "ingredients": [{"name": "flour", "quantity": "1 cup"}], "instructions": ["Mix ingredients"]}')
                 mock_client.chat.completions.create.return_value = mock_response
                 mock_openai_class.return_value = mock_client
                 
@@ -254,8 +306,7 @@ class TestLLMRefineService:
             with patch('builtins.open', mock_open(read_data="test")):
                 # Mock the OpenAI client
                 mock_client = MagicMock()
-                mock_response = MagicMock()
-                mock_response.choices[0].message.content = '{"title": "Test Recipe", "ingredients": [{"name": "flour", "quantity": "1 cup"}], "instructions": ["Mix ingredients"]}'
+                mock_response = _stream_response('{"title": "Test Recipe", "ingredients": [{"name": "flour", "quantity": "1 cup"}], "instructions": ["Mix ingredients"]}')
                 mock_client.chat.completions.create.return_value = mock_response
                 mock_openai_class.return_value = mock_client
                 
@@ -286,15 +337,24 @@ class TestLLMRefineService:
             with patch('builtins.open', mock_open(read_data="test")):
                 # Mock the OpenAI client
                 mock_client = MagicMock()
-                mock_response = MagicMock()
-                mock_response.choices[0].message.content = '{"title": "Test Recipe", "ingredients": [{"name": "flour", "quantity": "1 cup"}], "instructions": ["Mix ingredients"]}'
+                mock_response = _stream_response('{"title": "Test Recipe", "ingredients": [{"name": "flour", "quantity": "1 cup"}], "instructions": ["Mix ingredients"]}')
                 mock_client.chat.completions.create.return_value = mock_response
                 mock_openai_class.return_value = mock_client
                 
                 service = LLMRefineService()
-                result, error = service.refine_recipe("Test", "", [], "url", "author")
+                # With no transcript, OCR text can still carry the recipe
+                ocr = [{"timestamp": 1.0, "text_blocks": [{"text": "1 cup flour"}]}]
+                result, error = service.refine_recipe("Test", "", ocr, "url", "author")
                 assert result["title"] == "Test Recipe"
                 assert error is None
+                
+                # Nothing to refine: skipped without calling OpenAI
+                mock_client.chat.completions.create.reset_mock()
+                result, error = service.refine_recipe("Test", "   ", [{"timestamp": 2.0, "text_blocks": [{"text": " "}]}], "url", "author")
+                assert result is None
+                assert error == "insufficient_content"
+                mock_client.chat.completions.create.assert_not_called()
+                assert service.request_counts["skipped_insufficient_content"] == 1
 
     @patch('services.llm_refine_service.OpenAI')
     def test_refine_with_long_title(self, mock_openai_class):
@@ -303,8 +363,7 @@ class TestLLMRefineService:
             with patch('builtins.open', mock_open(read_data="test")):
                 # Mock the OpenAI client
                 mock_client = MagicMock()
-                mock_response = MagicMock()
-                mock_response.choices[0].message.content = '{"title": "Test Recipe", "ingredients": [{"name": "flour", "quantity": "1 cup"}], "instructions": ["Mix ingredients"]}'
+                mock_response = _stream_response('{"title": "Test Recipe", "ingredients": [{"name": "flour", "quantity": "1 cup"}], "instructions": ["Mix ingredients"]}')
                 mock_client.chat.completions.create.return_value = mock_response
                 mock_openai_class.return_value = mock_client
                 
@@ -321,8 +380,7 @@ class TestLLMRefineService:
             with patch('builtins.open', mock_open(read_data="test")):
                 # Mock the OpenAI client
                 mock_client = MagicMock()
-                mock_response = MagicMock()
-                mock_response.choices[0].message.content = '{"title": "Test Recipe", "ingredients": [{"name": "flour", "quantity": "1 cup"}], "instructions": ["Mix ingredients"]}'
+                mock_response = _stream_response('{"title": "Test Recipe", "ingredients": [{"name": "flour", "quantity": "1 cup"}], "instructions": ["Mix ingredients"]}')
                 mock_client.chat.completions.create.return_value = mock_response
                 mock_openai_class.return_value = mock_client
                 
@@ -338,8 +396,7 @@ class TestLLMRefineService:
             with patch('builtins.open', mock_open(read_data="test")):
                 # Mock the OpenAI client
                 mock_client = MagicMock()
-                mock_response = MagicMock()
-                mock_response.choices[0].message.content = '{"title": "Test Recipe", "ingredients": [{"name": "flour", "quantity": "1 cup"}], "instructions": ["Mix ingredients"]}'
+                mock_response = _stream_response('{"title": "Test Recipe", "ingredients": [{"name": "flour", "quantity": "1 cup"}], "instructions": ["Mix ingredients"]}')
                 mock_client.chat.completions.create.return_value = mock_response
                 mock_openai_class.return_value = mock_client
                 
@@ -355,8 +412,7 @@ class TestLLMRefineService:
             with patch('builtins.open', mock_open(read_data="test")):
                 # Mock the OpenAI client
                 mock_client = MagicMock()
-                mock_response = MagicMock()
-                mock_response.choices[0].message.content = '{"title": "Test Recipe", "ingredients": [{"name": "flour", "quantity": "1 cup"}], "instructions": ["Mix ingredients"]}'
+                mock_response = _stream_response('{"title": "Test Recipe", "ingredients": [{"name": "flour", "quantity": "1 cup"}], "instructions": ["Mix ingredients"]}')
                 mock_client.chat.completions.create.return_value = mock_response
                 mock_openai_class.return_value = mock_client
                 
@@ -373,8 +429,7 @@ class TestLLMRefineService:
             with patch('builtins.open', mock_open(read_data="test")):
                 # Mock the OpenAI client
                 mock_client = MagicMock()
-                mock_response = MagicMock()
-                mock_response.choices[0].message.content = '{"title": "Test Recipe", "ingredients": [{"name": "flour", "quantity": "1 cup"}], "instructions": ["Mix ingredients"]}'
+                mock_response = _stream_response('{"title": "Test Recipe", "ingredients": [{"name": "flour", "quantity": "1 cup"}], "instructions": ["Mix ingredients"]}')
                 mock_client.chat.completions.create.return_value = mock_response
                 mock_openai_class.return_value = mock_client
                 
@@ -391,15 +446,20 @@ class TestLLMRefineService:
             with patch('builtins.open', mock_open(read_data="test")):
                 # Mock the OpenAI client
                 mock_client = MagicMock()
-                mock_response = MagicMock()
-                mock_response.choices[0].message.content = '{"title": "Test Recipe", "ingredients": [{"name": "flour", "quantity": "1 cup"}], "instructions": ["Mix ingredients"]}'
+                mock_response = _stream_response('{"title": "Test Recipe", "ingredients": [{"name": "flour", "quantity": "1 cup"}], "instructions": ["Mix ingredients"]}')
                 mock_client.chat.completions.create.return_value = mock_response
                 mock_openai_class.return_value = mock_client
                 
                 service = LLMRefineService()
-                result, error = service.refine_recipe("Test", None, None, None, None)
+                result, error = service.refine_recipe("Test", "transcript", None, None, None)
                 assert result["title"] == "Test Recipe"
                 assert error is None
+                
+                # No transcript or OCR and a short title is skipped without an API call
+                result, error = service.refine_recipe("Test", None, None, None, None)
+                assert result is None
+                assert error == "insufficient_content"
+                assert mock_client.chat.completions.create.call_count == 1
 
     @patch('services.llm_refine_service.OpenAI')
     def test_refine_with_unicode_characters(self, mock_openai_class):
@@ -408,12 +468,170 @@ class TestLLMRefineService:
             with patch('builtins.open', mock_open(read_data="test")):
                 # Mock the OpenAI client
                 mock_client = MagicMock()
-                mock_response = MagicMock()
-                mock_response.choices[0].message.content = '{"title": "Test Recipe", "ingredients": [{"name": "flour", "quantity": "1 cup"}], "instructions": ["Mix ingredients"]}'
+                mock_response = _stream_response('{"title": "Test Recipe", "ingredients": [{"name": "flour", "quantity": "1 cup"}], "instructions": ["Mix ingredients"]}')
                 mock_client.chat.completions.create.return_value = mock_response
                 mock_openai_class.return_value = mock_client
                 
                 service = LLMRefineService()
                 result, error = service.refine_recipe("Test 🍕", "transcript", [], "url", "author")
                 assert result["title"] == "Test Recipe"
-                assert error is None 
\ No newline at end of file
+                assert error is None
+
+    @patch('services.llm_refine_service.AsyncOpenAI')
+    @patch('services.llm_refine_service.OpenAI')
+    def test_refine_batch_runs_jobs_concurrently(self, mock_openai_class, mock_async_openai_class):
+        """Test batched async refinement returns results in job order"""
+        with patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'}):
+            with patch('builtins.open', mock_open(read_data="test")):
+                # Mock the async OpenAI client
+                mock_aclient = MagicMock()
+                mock_aclient.__aenter__.return_value = mock_aclient
+                responses = []
+                for title in ("First", "Second"):
+                    mock_response = _stream_response('{"title": "%s", "ingredients": [{"name": "flour", "quantity": "1 cup"}], "instructions": ["Mix ingredients"]}' % title, is_async=True)
+                    responses.append(mock_response)
+                mock_aclient.chat.completions.create = AsyncMock(side_effect=responses)
+                mock_async_openai_class.return_value = mock_aclient
+                
+                service = LLMRefineService()
+                jobs = [
+                    {"title": "First", "transcript": "transcript", "ocr_results": []},
+                    {"title": "Second", "transcript": "transcript", "ocr_results": []},
+                ]
+                results = service.refine_batch(jobs)
+                assert [recipe["title"] for recipe, _ in results] == ["First", "Second"]
+                assert all(error is None for _, error in results)
+                assert mock_aclient.chat.completions.create.await_count == 2
+
+    @patch('services.llm_refine_service.OpenAI')
+    def test_submit_and_poll_batch(self, mock_openai_class):
+        """Test Batch API submission and result parsing"""
+        with patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'}):
+            with patch('builtins.open', mock_open(read_data="test")):
+                # Mock the OpenAI client
+                mock_client = MagicMock()
+                mock_client.files.create.return_value.id = "file-in"
+                mock_client.batches.create.return_value.id = "batch-1"
+                mock_client.batches.retrieve.return_value.status = "completed"
+                mock_client.batches.retrieve.return_value.output_file_id = "file-out"
+                recipe = {"title": "Test Recipe", "ingredients": [{"name": "flour", "quantity": "1 cup"}], "instructions": ["Mix ingredients"]}
+                output_lines = [
+                    {"custom_id": "1", "response": {"status_code": 500, "body": {"error": "boom"}}, "error": None},
+                    {"custom_id": "0", "response": {"status_code": 200, "body": {"choices": [{"message": {"content": json.dumps(recipe)}}]}}, "error": None},
+                ]
+                mock_client.files.content.return_value.text = "\n".join(json.dumps(line) for line in output_lines)
+                mock_openai_class.return_value = mock_client
+                
+                service = LLMRefineService()
+                jobs = [
+                    {"title": "Test", "transcript": "transcript", "ocr_results": [], "source_url": "url"},
+                    {"title": "Other", "transcript": "transcript", "ocr_results": []},
+                ]
+                batch_id = service.submit_batch(jobs)
+                assert batch_id == "batch-1"
+                
+                results = service.poll_batch(batch_id, jobs, poll_interval=0)
+                assert results[0][0]["title"] == "Test Recipe"
+                assert results[0][0]["source_url"] == "url"
+                assert results[1][0] is None
+                assert "LLM processing error" in results[1][1]
+
+    @patch('services.llm_refine_service.OpenAI')
+    def test_call_openai_stops_stream_after_json_closes(self, mock_openai_class):
+        """Test streamed generation is cut off once the JSON object is complete"""
+        with patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'}):
+            with patch('builtins.open', mock_open(read_data="test")):
+                # Mock the OpenAI client
+                mock_client = MagicMock()
+                mock_stream = _stream_response('```json\n{"title": "Braces {in} strings"}\n```\nHope this helps with your recipe!')
+                mock_client.chat.completions.create.return_value = mock_stream
+                mock_openai_class.return_value = mock_client
+                
+                service = LLMRefineService()
+                response = service._call_openai([{"role": "user", "content": "test"}])
+                assert response.rstrip().endswith('}')
+                assert "Hope this helps" not in response
+                mock_stream.close.assert_called_once()
+                
+                result, error = service._extract_json_from_response(response)
+                assert result["title"] == "Braces {in} strings"
+                assert error is None
+
+    @patch('services.llm_refine_service.time.sleep')
+    @patch('services.llm_refine_service.OpenAI')
+    def test_call_openai_backoff_honors_retry_after(self, mock_openai_class, mock_sleep):
+        """Test retries back off exponentially and honor Retry-After on rate limits"""
+        with patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'}):
+            with patch('builtins.open', mock_open(read_data="test")):
+                # Mock the OpenAI client
+                mock_client = MagicMock()
+                rate_limited = httpx.Response(429, headers={"retry-after": "7"},
+                                              request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions"))
+                mock_client.chat.completions.create.side_effect = [
+                    Exception("API error"),
+                    RateLimitError("Rate limit exceeded", response=rate_limited, body=None),
+                    _stream_response('{"title": "Test Recipe"}'),
+                ]
+                mock_openai_class.return_value = mock_client
+                
+                service = LLMRefineService()
+                response = service._call_openai([{"role": "user", "content": "test"}])
+                assert response == '{"title": "Test Recipe"}'
+                
+                first_delay = mock_sleep.call_args_list[0].args[0]
+                assert 0.5 * service.RETRY_BACKOFF_BASE <= first_delay <= 1.5 * service.RETRY_BACKOFF_BASE
+                assert mock_sleep.call_args_list[1].args[0] == 7.0
+
+    @patch('services.llm_refine_service.OpenAI')
+    def test_refine_recipe_uses_persistent_cache(self, mock_openai_class, tmp_path):
+        """Test identical content is served from the disk cache, even across service instances"""
+        with patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'}):
+            with patch('builtins.open', mock_open(read_data="test")):
+                # Mock the OpenAI client
+                mock_client = MagicMock()
+                mock_client.chat.completions.create.side_effect = [
+                    _stream_response('{"title": "Test Recipe", "ingredients": [{"name": "flour", "quantity": "1 cup"}], "instructions": ["Mix ingredients"]}'),
+                ]
+                mock_openai_class.return_value = mock_client
+                
+                service = LLMRefineService(cache_dir=str(tmp_path))
+                first, error = service.refine_recipe("Test", "transcript", [], "url", "author")
+                assert error is None
+                
+                restarted = LLMRefineService(cache_dir=str(tmp_path))
+                second, error = restarted.refine_recipe("Test", "transcript", [], "other-url", "author")
+                assert error is None
+                assert second["title"] == first["title"]
+                assert second["source_url"] == "other-url"
+                assert mock_client.chat.completions.create.call_count == 1
+
+    @patch('services.llm_refine_service.OpenAI')
+    def test_create_content_hash_covers_ocr_text(self, mock_openai_class):
+        """Test content hash is stable and sensitive to OCR text and block boundaries"""
+        with patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'}):
+            with patch('builtins.open', mock_open(read_data="test")):
+                service = LLMRefineService()
+                ocr = [{"timestamp": 1.0, "text_blocks": [{"text": "1 cup", "confidence": 0.9}, {"text": "flour", "confidence": 0.8}]}]
+                merged = [{"timestamp": 1.0, "text_blocks": [{"text": "1 cupflour", "confidence": 0.9}]}]
+                
+                key = service._create_content_hash("Test", "transcript", ocr)
+                assert key == service._create_content_hash("Test", "transcript", ocr)
+                assert key != service._create_content_hash("Test", "transcript", merged)
+                assert key != service._create_content_hash("Test", "transcript", [])
+                assert service._create_content_hash(None, None, None) == service._create_content_hash("", "", [])
+
+    @patch('services.llm_refine_service.OpenAI')
+    def test_call_openai_requests_json_mode(self, mock_openai_class):
+        """Test completions are requested in JSON mode"""
+        with patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'}):
+            with patch('builtins.open', mock_open(read_data="test")):
+                # Mock the OpenAI client
+                mock_client = MagicMock()
+                mock_client.chat.completions.create.return_value = _stream_response('{"title": "Test Recipe"}')
+                mock_openai_class.return_value = mock_client
+                
+                service = LLMRefineService()
+                service._call_openai([{"role": "user", "content": "test"}])
+                kwargs = mock_client.chat.completions.create.call_args.kwargs
+                assert kwargs["response_format"] == {"type": "json_object"}
+                assert kwargs["stream"] is True
@@ -1,7 +1,9 @@
+import os
 import pytest
 from unittest.mock import patch, MagicMock
 from pathlib import Path
-from services.ocr_service import OCRService
+from services.ocr_service import OCRService, tolist_recursive, _paddleocr_options
+from utils.disk_cache import DiskCache
 
 @pytest.fixture
 def sample_text_blocks():
@@ -12,6 +14,17 @@ def sample_text_blocks():
         {"text": "Mix well", "bbox": [[6,6],[7,6],[7,7],[6,7]]},
     ]
 
+@pytest.fixture
+def ocr_service(monkeypatch):
+    """Fresh OCRService singleton on a mocked PaddleOCR, with the OCR cache disabled"""
+    monkeypatch.delenv("OCR_CACHE_DIR", raising=False)
+    OCRService._instance = OCRService._ocr_instance = None
+    with patch("services.ocr_service.PaddleOCR"):
+        service = OCRService()
+    service.ocr.reset_mock()  # Forget the warmup call
+    yield service
+    OCRService._instance = OCRService._ocr_instance = None
+
 def test_dedupe_text_blocks(sample_text_blocks):
     deduped = OCRService.dedupe_text_blocks(sample_text_blocks, threshold=0.9)
     texts = [b["text"] for b in deduped]
@@ -42,4 +55,118 @@ def test_run_ocr_on_frames(mock_paddleocr):
     assert results[0]["timestamp"] == 0.0
     texts = [tb["text"] for tb in results[0]["text_blocks"]]
     assert "1 cup flour" in texts
-    assert "2 tbsp sugar" in texts 
\ No newline at end of file
+    assert "2 tbsp sugar" in texts
+
+def test_run_ocr_on_frames_batches_frames(ocr_service):
+    # One page result per input image, in the new dictionary format
+    ocr_service.ocr.ocr.return_value = [
+        {"rec_texts": ["1 cup flour"], "rec_scores": [0.99], "rec_polys": [[[0,0],[1,0],[1,1],[0,1]]]},
+        {"rec_texts": [], "rec_scores": [], "rec_polys": []},
+        {"rec_texts": ["2 tbsp sugar"], "rec_scores": [0.98], "rec_polys": [[[2,2],[3,2],[3,3],[2,3]]]},
+    ]
+    frames = [(Path("frame1.jpg"), 0.0), (Path("frame2.jpg"), 1.0), (Path("frame3.jpg"), 2.0)]
+    results = ocr_service.run_ocr_on_frames(frames)
+    ocr_service.ocr.ocr.assert_called_once_with(["frame1.jpg", "frame2.jpg", "frame3.jpg"])
+    assert [r["timestamp"] for r in results] == [0.0, 2.0]
+    assert results[1]["text_blocks"][0]["text"] == "2 tbsp sugar"
+
+def test_run_ocr_on_frames_falls_back_per_frame(ocr_service):
+    single = [[([[0,0],[1,0],[1,1],[0,1]], ("1 cup flour", 0.99))]]
+    ocr_service.ocr.ocr.side_effect = [TypeError("list input not supported"), single, Exception("bad frame")]
+    frames = [(Path("frame1.jpg"), 0.0), (Path("frame2.jpg"), 1.0)]
+    results = ocr_service.run_ocr_on_frames(frames)
+    assert len(results) == 1
+    assert results[0]["frame_path"] == "frame1.jpg"
+
+def test_run_ocr_on_frames_calls_paddleocr_2_per_frame(ocr_service):
+    single = [[([[0,0],[1,0],[1,1],[0,1]], ("1 cup flour", 0.99))]]
+    ocr_service.ocr.ocr.side_effect = [single, single]
+    frames = [(Path("frame1.jpg"), 0.0), (Path("frame2.jpg"), 1.0)]
+    with patch("services.ocr_service.paddleocr.__version__", "2.7.0", create=True), \
+         patch("services.ocr_service.frame_hash", return_value=None):
+        results = ocr_service.run_ocr_on_frames(frames)
+    assert [call.args for call in ocr_service.ocr.ocr.call_args_list] == [("frame1.jpg",), ("frame2.jpg",)]
+    assert len(results) == 2
+
+def test_tolist_recursive_converts_nested_values():
+    class FakeArray:
+        def tolist(self):
+            return [[0, 0], [1, 0]]
+    assert tolist_recursive(FakeArray()) == [[0, 0], [1, 0]]
+    assert tolist_recursive(([0, 1], (2.5, "x"))) == [[0, 1], [2.5, "x"]]
+
+def test_paddleocr_options_for_cpu_and_gpu():
+    with patch.dict(os.environ, {"OCR_DEVICE": "cpu", "OCR_CPU_THREADS": "3"}):
+        with patch("services.ocr_service.paddleocr.__version__", "3.0.0", create=True):
+            options = _paddleocr_options("en")
+    assert options["device"] == "cpu"
+    assert options["enable_mkldnn"] is True
+    assert options["precision"] == "fp32"
+    assert options["cpu_threads"] == 3
+    
+    with patch.dict(os.environ, {"OCR_DEVICE": "gpu"}):
+        with patch("services.ocr_service.paddleocr.__version__", "2.7.0", create=True):
+            options = _paddleocr_options("en")
+    assert options["use_gpu"] is True
+    assert options["enable_mkldnn"] is False
+    assert options["precision"] == "fp16"
+    assert "device" not in options
+
+def test_run_ocr_on_frames_skips_repeated_frames(ocr_service):
+    ocr_service.ocr.ocr.return_value = [
+        {"rec_texts": ["1 cup flour"], "rec_scores": [0.99], "rec_polys": [[[0,0],[1,0],[1,1],[0,1]]]},
+        {"rec_texts": ["2 tbsp sugar"], "rec_scores": [0.98], "rec_polys": [[[2,2],[3,2],[3,3],[2,3]]]},
+    ]
+    frames = [(Path("frame1.jpg"), 0.0), (Path("frame2.jpg"), 1.0), (Path("frame3.jpg"), 2.0)]
+    # frame2 is an identical hold of frame1, frame3 is a different scene
+    hashes = {"frame1.jpg": 0b1111_0000, "frame2.jpg": 0b1111_0000, "frame3.jpg": 0xFFFF_0000_0000}
+    with patch("services.ocr_service.frame_hash", side_effect=lambda path: hashes[path.name]):
+        results = ocr_service.run_ocr_on_frames(frames)
+    ocr_service.ocr.ocr.assert_called_once_with(["frame1.jpg", "frame3.jpg"])
+    assert [r["timestamp"] for r in results] == [0.0, 1.0, 2.0]
+    assert results[1]["text_blocks"] == results[0]["text_blocks"]
+    assert results[1]["text_blocks"][0] is not results[0]["text_blocks"][0]
+    assert results[1]["frame_path"] == "frame2.jpg"
+    assert results[2]["text_blocks"][0]["text"] == "2 tbsp sugar"
+
+def test_run_ocr_on_frames_only_groups_identical_consecutive_frames(ocr_service):
+    ocr_service.ocr.ocr.return_value = [
+        {"rec_texts": [text], "rec_scores": [0.99], "rec_polys": [[[0,0],[1,0],[1,1],[0,1]]]}
+        for text in ("1 cup flour", "2 tbsp sugar", "Serve warm", "1 cup flour")
+    ]
+    frames = [(Path(f"frame{i}.jpg"), float(i)) for i in range(1, 5)]
+    # frame2 is a same-layout card a few bits from frame1; frame4 repeats frame1 after another scene
+    hashes = {"frame1.jpg": 0b1111_0000, "frame2.jpg": 0b1111_0011, "frame3.jpg": 0xFFFF_0000_0000, "frame4.jpg": 0b1111_0000}
+    with patch("services.ocr_service.frame_hash", side_effect=lambda path: hashes[path.name]):
+        results = ocr_service.run_ocr_on_frames(frames)
+    ocr_service.ocr.ocr.assert_called_once_with(["frame1.jpg", "frame2.jpg", "frame3.jpg", "frame4.jpg"])
+    assert [r["text_blocks"][0]["text"] for r in results] == ["1 cup flour", "2 tbsp sugar", "Serve warm", "1 cup flour"]
+
+def test_run_ocr_on_frames_reuses_cached_frame_results(ocr_service, tmp_path):
+    ocr_service.cache = DiskCache(tmp_path / "cache")
+    ocr_service.ocr.ocr.return_value = [
+        {"rec_texts": ["1 cup flour"], "rec_scores": [0.99], "rec_polys": [[[0,0],[1,0],[1,1],[0,1]]]},
+    ]
+    first_frame = tmp_path / "frame1.jpg"
+    first_frame.write_bytes(b"title card")
+    with patch("services.ocr_service.frame_hash", return_value=0):
+        first = ocr_service.run_ocr_on_frames([(first_frame, 0.0)])
+    
+    # Same frame bytes in a later job: served from the cache without running inference
+    repeat_frame = tmp_path / "frame2.jpg"
+    repeat_frame.write_bytes(b"title card")
+    ocr_service.ocr.ocr.reset_mock()
+    with patch("services.ocr_service.frame_hash", return_value=0):
+        repeat = ocr_service.run_ocr_on_frames([(repeat_frame, 3.0)])
+    ocr_service.ocr.ocr.assert_not_called()
+    assert repeat[0]["text_blocks"] == first[0]["text_blocks"]
+    assert repeat[0]["timestamp"] == 3.0
+    assert repeat[0]["frame_path"] == str(repeat_frame)
+
+def test_parse_ocr_result_stores_plain_float_scores():
+    class NumpyScalar(float):
+        """Stands in for np.float32, which json.dumps rejects"""
+    blocks = OCRService._parse_ocr_result([
+        {"rec_texts": ["1 cup flour"], "rec_scores": [NumpyScalar(0.99)], "rec_polys": [[[0,0],[1,0],[1,1],[0,1]]]}
+    ])
+    assert type(blocks[0]["score"]) is float
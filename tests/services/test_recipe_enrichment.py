@@ -122,15 +122,17 @@ class TestRecipeEnrichmentService(unittest.TestCase):
             }
         ]
         
-        # Mock like service responses
-        def mock_has_liked(recipe_id, user_id):
-            return recipe_id == 'recipe_1'  # User liked only recipe_1
+        # Mock like service response: user liked only recipe_1
+        with patch.object(self.enrichment_service.like_service, 'get_liked_recipe_ids', return_value={'recipe_1'}) as mock_liked_ids:
+            with patch.object(self.enrichment_service.like_service, 'has_liked') as mock_has_liked:
+                enriched_recipes = self.enrichment_service.enrich_recipes_with_user_data(
+                    recipes, 
+                    user_id='test_user'
+                )
         
-        with patch.object(self.enrichment_service.like_service, 'has_liked', side_effect=mock_has_liked):
-            enriched_recipes = self.enrichment_service.enrich_recipes_with_user_data(
-                recipes, 
-                user_id='test_user'
-            )
+        # Like status is fetched once for the whole page
+        mock_liked_ids.assert_called_once_with(['recipe_1', 'recipe_2'], 'test_user')
+        mock_has_liked.assert_not_called()
         
         # Verify first recipe (liked, saved, not created)
         self.assertTrue(enriched_recipes[0]['liked'])
@@ -155,21 +157,18 @@ class TestRecipeEnrichmentService(unittest.TestCase):
             {'id': 'created_1', 'title': 'My Recipe', 'user_id': 'test_user', 'updated_at': '2025-01-27T10:00:00Z'}
         ]
         
-        # Mock recipe_service.get_recipe_by_id for liked recipes
-        mock_recipe_service.get_recipe_by_id.return_value = {
-            'id': 'liked_1', 'title': 'Liked Recipe', 'user_id': 'other_user', 'updated_at': '2025-01-27T11:00:00Z'
-        }
+        # Mock recipe_service.get_recipes_by_ids for liked recipes
+        mock_recipe_service.get_recipes_by_ids.return_value = [
+            {'id': 'liked_1', 'title': 'Liked Recipe', 'user_id': 'other_user', 'updated_at': '2025-01-27T11:00:00Z'}
+        ]
         
-        # Mock like service
-        with patch.object(self.enrichment_service.like_service, 'get_user_likes', return_value=['liked_1']):
-            with patch.object(self.enrichment_service.like_service, 'has_liked') as mock_has_liked:
-                # Configure has_liked responses
-                def mock_has_liked_response(recipe_id, user_id):
-                    return recipe_id == 'liked_1'
-                mock_has_liked.side_effect = mock_has_liked_response
-                
+        # Mock like service (user also liked their own recipe, which must not be fetched twice)
+        with patch.object(self.enrichment_service.like_service, 'get_user_likes', return_value=['liked_1', 'created_1']):
+            with patch.object(self.enrichment_service.like_service, 'get_liked_recipe_ids', return_value={'liked_1', 'created_1'}):
                 user_recipes = self.enrichment_service.get_user_recipes('test_user', page=1, limit=10)
         
+        mock_recipe_service.get_recipes_by_ids.assert_called_once_with(['liked_1'])
+        
         # Should return both created and liked recipes
         self.assertEqual(len(user_recipes), 2)
         
@@ -181,14 +180,14 @@ class TestRecipeEnrichmentService(unittest.TestCase):
     @patch('services.recipe_enrichment_service.recipe_service')
     def test_get_liked_recipes(self, mock_recipe_service):
         """Test getting only recipes that user liked"""
-        # Mock recipe_service.get_recipe_by_id
-        mock_recipe_service.get_recipe_by_id.return_value = {
-            'id': 'liked_recipe', 'title': 'Liked Recipe', 'user_id': 'other_user'
-        }
+        # Mock recipe_service.get_recipes_by_ids
+        mock_recipe_service.get_recipes_by_ids.return_value = [
+            {'id': 'liked_recipe', 'title': 'Liked Recipe', 'user_id': 'other_user'}
+        ]
         
         # Mock like service
         with patch.object(self.enrichment_service.like_service, 'get_user_likes', return_value=['liked_recipe']):
-            with patch.object(self.enrichment_service.like_service, 'has_liked', return_value=True):
+            with patch.object(self.enrichment_service.like_service, 'get_liked_recipe_ids', return_value={'liked_recipe'}):
                 liked_recipes = self.enrichment_service.get_liked_recipes('test_user', page=1, limit=10)
         
         # Should return liked recipes with liked=True
@@ -6,8 +6,12 @@ import pytest
 from unittest.mock import Mock, patch, MagicMock
 from datetime import datetime, timezone
 import uuid
+from firebase_admin import firestore
+from google.api_core.exceptions import NotFound
+from google.cloud.firestore_v1.transforms import ArrayUnion, Increment
 
 from services.recipe_persist_service import RecipePersistService
+from errors import PipelineStatus
 
 
 class TestRecipePersistService:
@@ -182,54 +186,102 @@ class TestRecipePersistService:
         assert success is False
     
     def test_save_recipe_and_update_job_success(self, recipe_persist_service, sample_recipe_json, mock_firestore_db):
-        """Test complete workflow success"""
+        """Test complete workflow writes recipe and job in a single batch commit"""
         mock_db, mock_recipes_collection, mock_ingest_collection, mock_recipes_document, mock_ingest_document = mock_firestore_db
+        mock_batch = Mock()
+        mock_db.batch.return_value = mock_batch
         
-        # Mock UUID generation
-        test_uuid = "test-uuid-123"
-        with patch('uuid.uuid4', return_value=test_uuid):
-            with patch('services.recipe_persist_service.datetime') as mock_datetime:
-                mock_datetime.now.return_value = datetime(2025, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+        with patch('services.recipe_persist_service.datetime') as mock_datetime:
+            mock_datetime.now.return_value = datetime(2025, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
 
-                recipe_id = recipe_persist_service.save_recipe_and_update_job(
-                    recipe_json=sample_recipe_json,
-                    job_id="job123",
-                    owner_uid="user123",
-                    source_url="https://tiktok.com/test"
-                )
+            recipe_id = recipe_persist_service.save_recipe_and_update_job(
+                recipe_json=sample_recipe_json,
+                job_id="job123",
+                owner_uid="user123",
+                source_url="https://tiktok.com/test",
+                existing_recipe_id="rec_existing123"
+            )
 
-        expected_recipe_id = f"rec_{test_uuid}"
-        assert recipe_id == expected_recipe_id
-        
-        # Verify both operations were called
-        mock_recipes_document.set.assert_called_once()
-        mock_ingest_document.update.assert_called_once()
+        assert recipe_id == "rec_existing123"
+        
+        # Both writes go through the batch as narrow updates, committed once
+        assert mock_batch.update.call_count == 2
+        (recipe_ref, recipe_update), (job_ref, update_data) = [c[0] for c in mock_batch.update.call_args_list]
+        assert recipe_ref is mock_recipes_document
+        assert recipe_update["title"] == sample_recipe_json["title"]
+        assert recipe_update["original_job_id"] == "job123"
+        # Stub fields and like counters are never overwritten
+        assert "createdAt" not in recipe_update
+        assert "owner_uid" not in recipe_update
+        assert "last_liked_by" not in recipe_update
+        assert isinstance(recipe_update["likes_count"], firestore.Increment)
+        assert job_ref is mock_ingest_document
+        assert update_data["recipe_id"] == "rec_existing123"
+        assert update_data["status"] == PipelineStatus.COMPLETED
+        assert update_data["updatedAt"] == "2025-01-01T12:00:00+00:00"
+        mock_batch.set.assert_not_called()
+        mock_batch.commit.assert_called_once()
+        
+        # No standalone writes outside the batch
+        mock_recipes_document.set.assert_not_called()
+        mock_ingest_document.update.assert_not_called()
     
-    def test_save_recipe_and_update_job_recipe_save_fails(self, recipe_persist_service, sample_recipe_json, mock_firestore_db):
-        """Test workflow when recipe saving fails"""
+    def test_save_recipe_and_update_job_without_stub_recipe(self, recipe_persist_service, sample_recipe_json, mock_firestore_db):
+        """Test workflow writes the full recipe document when there is no stub to update"""
         mock_db, mock_recipes_collection, mock_ingest_collection, mock_recipes_document, mock_ingest_document = mock_firestore_db
-        
-        # Mock recipe save failure
-        mock_recipes_document.set.side_effect = Exception("Recipe save failed")
+        update_batch, set_batch = Mock(), Mock()
+        update_batch.commit.side_effect = NotFound("No document to update")
+        mock_db.batch.side_effect = [update_batch, set_batch]
 
         recipe_id = recipe_persist_service.save_recipe_and_update_job(
             recipe_json=sample_recipe_json,
             job_id="job123",
-            owner_uid="user123"
+            owner_uid="user123",
+            existing_recipe_id="rec_existing123"
+        )
+
+        assert recipe_id == "rec_existing123"
+        set_batch.set.assert_called_once()
+        recipe_doc = set_batch.set.call_args[0][1]
+        assert recipe_doc["owner_uid"] == "user123"
+        assert isinstance(recipe_doc["createdAt"], str)
+        set_batch.update.assert_called_once()
+        set_batch.commit.assert_called_once()
+    
+    def test_save_recipe_and_update_job_commit_fails(self, recipe_persist_service, sample_recipe_json, mock_firestore_db):
+        """Test workflow when the batch commit fails - nothing is written"""
+        mock_db, mock_recipes_collection, mock_ingest_collection, mock_recipes_document, mock_ingest_document = mock_firestore_db
+        mock_batch = Mock()
+        mock_batch.commit.side_effect = Exception("Commit failed")
+        mock_db.batch.return_value = mock_batch
+
+        recipe_id = recipe_persist_service.save_recipe_and_update_job(
+            recipe_json=sample_recipe_json,
+            job_id="job123",
+            owner_uid="user123",
+            existing_recipe_id="rec_existing123"
         )
 
         assert recipe_id is None
+        mock_batch.commit.assert_called_once()
+    
+    def test_build_recipe_update_with_firestore_transforms(self, sample_recipe_json):
+        """Test the stub update builds with the real transforms, which reject an empty ArrayUnion"""
+        now = datetime.now(timezone.utc).isoformat()
+        recipe_doc = RecipePersistService._build_recipe_doc(
+            {**sample_recipe_json, "saved_by": []}, "user123", "", "job123", now
+        )
+        update = RecipePersistService._build_recipe_update(recipe_doc)
+        assert "saved_by" not in update
+        assert update["likes_count"] == Increment(0)
         
-        # Verify only recipe save was attempted, job update was not
-        mock_recipes_document.set.assert_called_once()
-        mock_ingest_document.update.assert_not_called()
+        recipe_doc["saved_by"] = ["user456"]
+        update = RecipePersistService._build_recipe_update(recipe_doc)
+        assert update["saved_by"] == ArrayUnion(["user456"])
 
-    def test_save_recipe_and_update_job_job_update_fails(self, recipe_persist_service, sample_recipe_json, mock_firestore_db):
-        """Test workflow when job update fails"""
-        mock_db, mock_recipes_collection, mock_ingest_collection, mock_recipes_document, mock_ingest_document = mock_firestore_db
-        
-        # Mock job update failure
-        mock_ingest_document.update.side_effect = Exception("Job update failed")
+    def test_save_recipe_and_update_job_requires_existing_recipe_id(self, recipe_persist_service, sample_recipe_json, mock_firestore_db):
+        """Test workflow refuses to run without an existing recipe id"""
+        mock_db = mock_firestore_db[0]
 
         recipe_id = recipe_persist_service.save_recipe_and_update_job(
             recipe_json=sample_recipe_json,
@@ -238,10 +290,7 @@ class TestRecipePersistService:
         )
 
         assert recipe_id is None
-        
-        # Verify both operations were attempted
-        mock_recipes_document.set.assert_called_once()
-        mock_ingest_document.update.assert_called_once()
+        mock_db.batch.assert_not_called()
     
     def test_get_recipe_by_id_success(self, recipe_persist_service, mock_firestore_db):
         """Test successful recipe retrieval"""
@@ -180,6 +180,44 @@ class TestRecipeQualityAnalyzer:
         assert analysis['measurement_ratio'] == 1.0
         assert analysis['has_measurements'] == True
     
+    def test_recipe_without_ingredients_or_steps(self):
+        """Test the empty-recipe fast path still scores timing fields and title"""
+        recipe = {
+            "title": "Mystery Dinner",
+            "ingredients": [],
+            "instructions": [],
+            "cook_time": 20
+        }
+        
+        result = self.analyzer.analyze_recipe_quality(recipe)
+        
+        assert result.is_complete == False
+        assert result.meets_minimum_standards == False
+        assert result.has_timing == True
+        assert result.has_measurements == False
+        assert result.quality_score == pytest.approx(0.3)
+        assert "ingredient measurements" in result.missing_components
+    
+    def test_string_ingredients_counted_once_each(self):
+        """Test string ingredients count once even with several measurements"""
+        ingredients = [
+            "1 tbsp oil and 2 tsp salt",  # Two measurements, one ingredient
+            "pinch of pepper",            # No measurement
+            "250 g flour",
+            {"name": "eggs", "quantity": "2 large"}
+        ]
+        
+        analysis = self.analyzer._analyze_ingredients(ingredients)
+        assert analysis['measurement_ratio'] == 0.75
+        assert analysis['has_measurements'] == True
+    
+    def test_string_ingredients_use_structured_units(self):
+        """Test free-text ingredients recognise the same size/count units as structured ones"""
+        ingredients = ["3 large eggs", "2 cloves garlic", "1 bunch cilantro", "salt to taste"]
+        
+        analysis = self.analyzer._analyze_ingredients(ingredients)
+        assert analysis['measurement_ratio'] == 0.75
+    
     def test_step_analysis_detail_levels(self):
         """Test step analysis with different detail levels"""
         # Test detailed steps
@@ -0,0 +1,180 @@
+"""
+Tests for TikTokIngestService job status polling
+"""
+
+import pytest
+from unittest.mock import Mock, patch
+
+import services.tiktok_ingest_service as ingest_module
+from services.tiktok_ingest_service import TikTokIngestService
+from errors import PipelineStatus
+
+
+@pytest.fixture(autouse=True)
+def clear_job_status_cache():
+    ingest_module._job_status_cache.clear()
+    yield
+    ingest_module._job_status_cache.clear()
+
+
+def _mock_db_with_job(job_data):
+    """Build a Firestore mock whose ingest_jobs document returns job_data"""
+    mock_doc = Mock(exists=True)
+    mock_doc.to_dict.return_value = job_data
+    mock_db = Mock()
+    mock_db.collection.return_value.document.return_value.get.return_value = mock_doc
+    return mock_db
+
+
+class TestJobStatusCache:
+    """Unit tests for the short-lived job status poll cache"""
+
+    def test_repeated_polls_served_from_cache(self):
+        """Test polls within the TTL reuse the first read"""
+        mock_db = _mock_db_with_job({"status": PipelineStatus.OCRING})
+
+        with patch('services.tiktok_ingest_service.get_firestore_db', return_value=mock_db):
+            first = TikTokIngestService.mock_get_job_status("job123")
+            second = TikTokIngestService.mock_get_job_status("job123")
+
+        assert first["status"] == PipelineStatus.OCRING
+        assert second == first
+        assert mock_db.collection.return_value.document.return_value.get.call_count == 1
+
+    def test_expired_entry_reads_firestore_again(self):
+        """Test polls after the TTL hit Firestore"""
+        mock_db = _mock_db_with_job({"status": PipelineStatus.OCRING})
+
+        with patch('services.tiktok_ingest_service.get_firestore_db', return_value=mock_db), \
+             patch('services.tiktok_ingest_service.time.monotonic', side_effect=[100.0, 200.0, 200.0]):
+            TikTokIngestService.mock_get_job_status("job123")
+            TikTokIngestService.mock_get_job_status("job123")
+
+        assert mock_db.collection.return_value.document.return_value.get.call_count == 2
+
+    @pytest.mark.parametrize("status", [
+        PipelineStatus.DRAFT_PARSED,
+        PipelineStatus.DRAFT_PARSED_WITH_ERRORS,
+        PipelineStatus.LLM_FAILED_BUT_CONTINUED,
+        PipelineStatus.COMPLETED,
+        PipelineStatus.FAILED,
+    ])
+    def test_terminal_status_not_cached(self, status):
+        """Test terminal statuses are always read from Firestore"""
+        mock_db = _mock_db_with_job({"status": status, "recipe_id": "rec123"})
+
+        with patch('services.tiktok_ingest_service.get_firestore_db', return_value=mock_db):
+            TikTokIngestService.mock_get_job_status("job123")
+            result = TikTokIngestService.mock_get_job_status("job123")
+
+        assert result["status"] == status
+        assert mock_db.collection.return_value.document.return_value.get.call_count == 2
+
+    def test_first_poll_after_create_skips_read(self):
+        """Test a poll right after mock_create_job is answered from memory"""
+        mock_db = Mock()
+
+        with patch('services.tiktok_ingest_service.get_firestore_db', return_value=mock_db):
+            job_id, recipe_id, _ = TikTokIngestService.mock_create_job("https://tiktok.com/test", owner_uid="user123")
+            result = TikTokIngestService.mock_get_job_status(job_id)
+
+        assert result["status"] == PipelineStatus.QUEUED
+        assert result["recipe_id"] == recipe_id
+        assert result["ocr_was_skipped"] is False
+        mock_db.batch.return_value.commit.assert_called_once()
+        mock_db.collection.return_value.document.return_value.get.assert_not_called()
+        # Same ISO string format as every other job/recipe timestamp
+        job_doc, recipe_doc = (call.args[1] for call in mock_db.batch.return_value.set.call_args_list)
+        assert isinstance(job_doc["createdAt"], str) and recipe_doc["createdAt"] == job_doc["createdAt"]
+
+
+class TestSerializeForFirestore:
+    """Unit tests for Firestore payload serialization"""
+
+    def test_nested_payload(self):
+        """Test nested containers are rebuilt with string keys and lists"""
+        payload = {"frames": ({"timestamp": 1.5, "texts": ["salt"]},), 2: None, "ok": True}
+
+        assert ingest_module.serialize_for_firestore(payload) == {
+            "frames": [{"timestamp": 1.5, "texts": ["salt"]}],
+            "2": None,
+            "ok": True
+        }
+
+    def test_array_like_and_unknown_types(self):
+        """Test objects with tolist() are converted and unknown objects are stringified"""
+        class Scalar:
+            def tolist(self):
+                return 7
+
+        class Opaque:
+            def __str__(self):
+                return "opaque"
+
+        assert ingest_module.serialize_for_firestore([Scalar(), Opaque()]) == [7, "opaque"]
+
+
+class TestUpdateOcrResults:
+    """Unit tests for writing OCR results to the job document"""
+
+    def test_writes_simplified_ocr_text(self):
+        """Test OCR frames are simplified and written with serialized candidates"""
+        mock_db = Mock()
+        onscreen_text = [
+            {"timestamp": 2, "text_blocks": [{"text": " 2 cups flour ", "confidence": 0.9}, {"text": ""}]},
+            {"timestamp": 3, "text_blocks": []}
+        ]
+
+        with patch('services.tiktok_ingest_service.get_firestore_db', return_value=mock_db):
+            future = TikTokIngestService.update_ocr_results("job123", onscreen_text, [("flour", 0.9)])
+            future.result(timeout=5)
+
+        update_data = mock_db.collection.return_value.document.return_value.update.call_args[0][0]
+        assert update_data["onscreen_text"] == [{"timestamp": 2.0, "texts": ["2 cups flour"]}]
+        assert update_data["ingredient_candidates"] == [["flour", 0.9]]
+
+    def test_write_failure_is_logged_not_raised(self):
+        """Test a failed background write is reported through the logger"""
+        mock_db = Mock()
+        mock_db.collection.return_value.document.return_value.update.side_effect = Exception("unavailable")
+
+        with patch('services.tiktok_ingest_service.get_firestore_db', return_value=mock_db), \
+             patch.object(ingest_module.logger, 'error') as mock_error:
+            future = TikTokIngestService.update_ocr_results("job123", [], [])
+            with pytest.raises(Exception, match="unavailable"):
+                future.result(timeout=5)
+
+        mock_error.assert_called_once()
+
+    def test_simplified_ocr_text_capped(self):
+        """Test only the first frames with text are kept"""
+        onscreen_text = [{"timestamp": i, "text_blocks": [{"text": f"step {i}"}]} for i in range(30)]
+
+        simplified = ingest_module.simplify_ocr_data(onscreen_text)
+
+        assert len(simplified) == ingest_module.MAX_SIMPLIFIED_OCR_FRAMES
+        assert simplified[-1] == {"timestamp": 19.0, "texts": ["step 19"]}
+
+
+def test_utcnow_iso_matches_datetime_format():
+    """Test the fast formatter produces the same timestamp as datetime.isoformat"""
+    from datetime import datetime
+
+    with patch('services.tiktok_ingest_service.time.time_ns', return_value=1_700_000_000_123_456_789):
+        assert ingest_module.utcnow_iso() == "2023-11-14T22:13:20.123456+00:00"
+        assert datetime.fromisoformat(ingest_module.utcnow_iso()).timestamp() == 1_700_000_000.123456
+
+
+def test_missing_job_returns_queued_fallback():
+    """Test an unknown job gets a queued response with every other field unset"""
+    mock_db = Mock()
+    mock_db.collection.return_value.document.return_value.get.return_value = Mock(exists=False)
+
+    with patch('services.tiktok_ingest_service.get_firestore_db', return_value=mock_db):
+        result = TikTokIngestService.mock_get_job_status("missing")
+        result["title"] = "mutated"
+        again = TikTokIngestService.mock_get_job_status("missing")
+
+    assert again["status"] == PipelineStatus.QUEUED
+    assert again["recipe_id"] is None and again["title"] is None
+    assert set(again) == set(ingest_module.job_status_from_data({}))
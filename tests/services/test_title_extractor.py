@@ -28,4 +28,22 @@ def test_from_transcript_first_sentence():
     assert TitleExtractor.from_transcript(transcript) == "First sentence"
     transcript = "   .  !  ?  Only this remains"
     assert TitleExtractor.from_transcript(transcript) == "Only this remains"
-    assert TitleExtractor.from_transcript("") is None 
\ No newline at end of file
+    assert TitleExtractor.from_transcript("") is None 
+
+def test_from_ocr_text_combines_nearby_keyword_blocks():
+    ocr_results = [
+        {"text_blocks": [{"text": "Caramelized Onion"}, {"text": "follow for more"}]},
+        {"text_blocks": [{"text": "Pasta"}]},
+    ]
+    assert TitleExtractor.from_ocr_text(ocr_results) == "Caramelized Onion Pasta"
+
+def test_from_ocr_text_falls_back_to_longest_block():
+    ocr_results = [{"text_blocks": [{"text": "hi"}, {"text": "My favourite dinner"}]}]
+    assert TitleExtractor.from_ocr_text(ocr_results) == "My favourite dinner"
+    assert TitleExtractor.from_ocr_text([{"text_blocks": []}]) is None
+
+def test_from_ocr_text_ignores_keyword_blocks_more_than_two_apart():
+    ocr_results = [{"text_blocks": [
+        {"text": "Garlic"}, {"text": "a"}, {"text": "b"}, {"text": "Soup"}, {"text": "Grilled"},
+    ]}]
+    assert TitleExtractor.from_ocr_text(ocr_results) == "Soup Grilled"
@@ -1,7 +1,23 @@
+import io
 import pytest
 from services.transcription_service import TranscriptionService, TranscriptionError
 from pathlib import Path
-from unittest.mock import patch
+from unittest.mock import Mock, patch
+import services.transcription_service as transcription_module
+
+@pytest.fixture(autouse=True)
+def fresh_openai_client():
+    # Each test patches OpenAI, so don't reuse a client built by an earlier test
+    transcription_module._openai_client.cache_clear()
+    yield
+    transcription_module._openai_client.cache_clear()
+
+@pytest.fixture(autouse=True)
+def no_retry_sleep():
+    # Retries back off (and the rate limiter waits) for real seconds; tests that check the
+    # delays patch sleep themselves
+    with patch("services.transcription_service.time.sleep"):
+        yield
 
 def test_transcribe_error(tmp_path):
     audio_path = tmp_path / "audio.wav"
@@ -29,4 +45,117 @@ def test_transcribe_asr_failed(tmp_path):
         with pytest.raises(TranscriptionError) as exc:
             TranscriptionService.transcribe(audio_path, max_retries=1)
         assert "ASR_FAILED" in str(exc.value)
-    assert not audio_path.exists() 
\ No newline at end of file
+    assert not audio_path.exists() 
+
+def test_transcribe_retries_with_jittered_backoff(tmp_path, monkeypatch):
+    audio_path = tmp_path / "audio.wav"
+    audio_path.write_bytes(b"fake audio")
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    class MockRateLimitError(Exception):
+        status_code = 429
+    raw_response = Mock(headers={})
+    raw_response.parse.return_value = " transcript "
+    with patch("services.transcription_service.OpenAI") as mock_openai, \
+         patch("services.transcription_service._whisper_rate_limiter"), \
+         patch("services.transcription_service.time.sleep") as mock_sleep, \
+         patch("services.transcription_service.random.uniform", return_value=0.5):
+        mock_openai.return_value.audio.transcriptions.with_raw_response.create.side_effect = [
+            MockRateLimitError(), MockRateLimitError(), raw_response
+        ]
+        assert TranscriptionService.transcribe(audio_path) == "transcript"
+    assert [c.args[0] for c in mock_sleep.call_args_list] == [2.5, 4.5]
+    # Every attempt uploads the same bytes, read from disk once
+    uploads = [c.kwargs["file"] for c in mock_openai.return_value.audio.transcriptions.with_raw_response.create.call_args_list]
+    assert uploads == [("audio.wav", b"fake audio")] * 3
+    assert not audio_path.exists()
+
+def test_retry_delay_is_capped():
+    with patch("services.transcription_service.random.uniform", return_value=1.0):
+        assert TranscriptionService._retry_delay(10) == TranscriptionService.RETRY_BACKOFF_CAP
+
+def test_rate_limit_headers_pause_upcoming_calls(tmp_path, monkeypatch):
+    audio_path = tmp_path / "audio.wav"
+    audio_path.write_bytes(b"fake audio")
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    raw_response = Mock(headers={"x-ratelimit-remaining-requests": "1", "x-ratelimit-reset-requests": "1m30s"})
+    raw_response.parse.return_value = "transcript"
+    with patch("services.transcription_service.OpenAI") as mock_openai, \
+         patch("services.transcription_service._whisper_rate_limiter") as mock_limiter:
+        mock_openai.return_value.audio.transcriptions.with_raw_response.create.return_value = raw_response
+        assert TranscriptionService.transcribe(audio_path) == "transcript"
+    mock_limiter.acquire.assert_called_once()
+    mock_limiter.pause.assert_called_once_with(90.0)
+
+def test_retry_after_pauses_instead_of_backoff(tmp_path, monkeypatch):
+    audio_path = tmp_path / "audio.wav"
+    audio_path.write_bytes(b"fake audio")
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    class MockRateLimitError(Exception):
+        status_code = 429
+        response = Mock(headers={"retry-after": "3"})
+    raw_response = Mock(headers={})
+    raw_response.parse.return_value = "transcript"
+    with patch("services.transcription_service.OpenAI") as mock_openai, \
+         patch("services.transcription_service._whisper_rate_limiter") as mock_limiter, \
+         patch("services.transcription_service.time.sleep") as mock_sleep:
+        mock_openai.return_value.audio.transcriptions.with_raw_response.create.side_effect = [
+            MockRateLimitError(), raw_response
+        ]
+        assert TranscriptionService.transcribe(audio_path) == "transcript"
+    mock_limiter.pause.assert_called_once_with(3.0)
+    mock_sleep.assert_not_called()
+
+def test_large_wav_is_split_and_transcribed_in_order(tmp_path, monkeypatch):
+    import wave
+    audio_path = tmp_path / "audio.wav"
+    with wave.open(str(audio_path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(16000)
+        wav.writeframes(b"\x00\x01" * 16000)  # 1 second, 32000 bytes of samples
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    def fake_create(model, file, response_format):
+        name, data = file
+        # Every piece is a valid WAV under the chunk size
+        assert len(data) <= 10 * 1024
+        with wave.open(io.BytesIO(data)) as piece:
+            assert piece.getframerate() == 16000
+        raw_response = Mock(headers={})
+        raw_response.parse.return_value = name
+        return raw_response
+    with patch("services.transcription_service.WHISPER_CHUNK_SIZE_MB", 10 / 1024), \
+         patch("services.transcription_service.OpenAI") as mock_openai, \
+         patch("services.transcription_service._whisper_rate_limiter"):
+        mock_openai.return_value.audio.transcriptions.with_raw_response.create.side_effect = fake_create
+        result = TranscriptionService.transcribe(audio_path)
+    assert result == "audio_000.wav audio_001.wav audio_002.wav audio_003.wav"
+    assert not audio_path.exists()
+
+def test_identical_audio_served_from_transcript_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("TRANSCRIPT_CACHE_DIR", str(tmp_path / "cache"))
+    raw_response = Mock(headers={})
+    raw_response.parse.return_value = "transcript"
+    with patch("services.transcription_service.OpenAI") as mock_openai, \
+         patch("services.transcription_service._whisper_rate_limiter"):
+        create = mock_openai.return_value.audio.transcriptions.with_raw_response.create
+        create.return_value = raw_response
+        for name in ("first.wav", "repost.wav"):
+            audio_path = tmp_path / name
+            audio_path.write_bytes(b"same audio")
+            assert TranscriptionService.transcribe(audio_path) == "transcript"
+            assert not audio_path.exists()
+    create.assert_called_once()
+
+def test_openai_client_reused_across_calls(tmp_path, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    raw_response = Mock(headers={})
+    raw_response.parse.return_value = "transcript"
+    with patch("services.transcription_service.OpenAI") as mock_openai, \
+         patch("services.transcription_service._whisper_rate_limiter"):
+        mock_openai.return_value.audio.transcriptions.with_raw_response.create.return_value = raw_response
+        for index in range(2):
+            audio_path = tmp_path / f"audio{index}.wav"
+            audio_path.write_bytes(f"audio {index}".encode())
+            TranscriptionService.transcribe(audio_path)
+    mock_openai.assert_called_once()
@@ -37,6 +37,7 @@ class TestConditionalOCRIntegration:
         ctx.video_path = Path("/tmp/test_video.mp4")
         ctx.job_dir = Path("/tmp/test_job")
         ctx.thumbnail_url = "https://example.com/thumb.jpg"
+        ctx.frames_future = None
         ctx.status_updates = []
         
         def mock_update_status(status, data=None):
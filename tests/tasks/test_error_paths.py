@@ -50,7 +50,7 @@ class TestErrorHandlingAndCleanup:
                     ingest_tiktok(job_id="test_job", url="https://tiktok.com/test", owner_uid="user123", recipe_id="recipe123")
                 
                 # Verify error was logged and job marked as failed
-                mock_firestore.collection.assert_called_with("ingest_jobs")
+                mock_firestore.collection.assert_any_call("ingest_jobs")
                 mock_firestore.collection().document().update.assert_called()
                 
                 # Verify temp directory cleanup
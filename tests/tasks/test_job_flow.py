@@ -1,6 +1,10 @@
 import pytest
+import threading
+from concurrent.futures import Future
+from google.api_core.exceptions import NotFound
 from unittest.mock import patch, MagicMock
 from pathlib import Path
+from utils.media_downloader import VideoUnavailableError, VideoNotFoundError
 
 class MockFirestoreDoc:
     def __init__(self):
@@ -12,9 +16,22 @@ class MockFirestoreDoc:
     def get(self):
         return MagicMock(exists=True, to_dict=lambda: self.data)
 
+class MockWriteBatch:
+    def __init__(self):
+        self.writes = []
+    def update(self, doc, data):
+        self.writes.append((doc, data))
+    def set(self, doc, data, merge=False):
+        self.writes.append((doc, data))
+    def commit(self):
+        for doc, data in self.writes:
+            doc.update(data)
+
 class MockFirestore:
     def __init__(self):
         self.docs = {}
+    def batch(self):
+        return MockWriteBatch()
     def collection(self, name):
         return self
     def document(self, job_id):
@@ -73,4 +90,168 @@ def test_ingest_tiktok_pipeline(mock_llm_service, mock_download, mock_extract, m
     # Check Firestore status transitions
     doc = mock_get_db.return_value.document(job_id)
     assert doc.data["status"] == "DRAFT_PARSED"  # Final status after LLM processing
-    assert doc.data["transcript"] == "transcript text" 
\ No newline at end of file
+    assert doc.data["transcript"] == "transcript text"
+
+
+def test_status_update_lands_after_queued_progress_writes():
+    from tasks.tiktok_tasks import PipelineContext
+    db = MockFirestore()
+    doc = db.document("testjobid")
+    apply_update = doc.update
+    first_write_started, release_first_write = threading.Event(), threading.Event()
+    writes = []
+
+    def blocking_update(data):
+        writes.append(dict(data))
+        if data["status"] == "DOWNLOADING":
+            first_write_started.set()
+            release_first_write.wait(1)
+        apply_update(data)
+    doc.update = blocking_update
+
+    with patch("tasks.tiktok_tasks.get_firestore_db", return_value=db):
+        ctx = PipelineContext("testjobid", "https://www.tiktok.com/@user/video/1", "user123", "recipe123")
+    ctx.update_progress("DOWNLOADING")
+    first_write_started.wait(1)
+    ctx.update_status("FAILED", {"error_code": "DOWNLOAD_FAILED"})
+    release_first_write.set()
+    ctx.flush_progress()
+    # The failure is written after the in-flight progress write, never before it
+    assert [write["status"] for write in writes] == ["DOWNLOADING", "FAILED"]
+    assert doc.data["status"] == "FAILED" and doc.data["error_code"] == "DOWNLOAD_FAILED"
+
+
+def test_queued_progress_updates_are_coalesced():
+    from tasks.tiktok_tasks import PipelineContext
+    db = MockFirestore()
+    doc = db.document("testjobid")
+    apply_update = doc.update
+    first_write_started, release_first_write = threading.Event(), threading.Event()
+    writes = []
+
+    def blocking_update(data):
+        writes.append(dict(data))
+        if data["status"] == "DOWNLOADING":
+            first_write_started.set()
+            release_first_write.wait(1)
+        apply_update(data)
+    doc.update = blocking_update
+
+    with patch("tasks.tiktok_tasks.get_firestore_db", return_value=db):
+        ctx = PipelineContext("testjobid", "https://www.tiktok.com/@user/video/1", "user123", "recipe123")
+    ctx.update_progress("DOWNLOADING")
+    first_write_started.wait(1)
+    ctx.update_progress("EXTRACTING", {"step": 1})
+    ctx.update_progress("TRANSCRIBING")
+    release_first_write.set()
+    ctx.flush_progress()
+    ctx.update_progress("OCRING", {"frames": 8})
+    ctx.update_status("OCR_DONE")
+    ctx.flush_progress()
+    # EXTRACTING and TRANSCRIBING share one write; OCRING rides along with OCR_DONE
+    assert [write["status"] for write in writes] == ["DOWNLOADING", "TRANSCRIBING", "OCR_DONE"]
+    assert writes[1]["step"] == 1
+    assert doc.data["status"] == "OCR_DONE" and doc.data["frames"] == 8
+
+
+def test_job_status_written_alone_when_recipe_is_missing():
+    from tasks.tiktok_tasks import PipelineContext
+    db = MockFirestore()
+    failing_batch = MagicMock()
+    failing_batch.commit.side_effect = NotFound("No document to update: recipes/recipe123")
+    db.batch = MagicMock(return_value=failing_batch)
+    with patch("tasks.tiktok_tasks.get_firestore_db", return_value=db):
+        ctx = PipelineContext("testjobid", "https://www.tiktok.com/@user/video/1", "user123", "recipe123")
+    ctx.update_progress("TRANSCRIBING")
+    ctx.update_job_and_recipe_status("DRAFT_TRANSCRIBED", {"transcript": "saved transcript"}, {"title": "Draft"})
+    job = db.document("testjobid").data
+    assert job["status"] == "DRAFT_TRANSCRIBED" and job["transcript"] == "saved transcript"
+
+
+def test_flush_progress_waits_for_ocr_results_write():
+    from tasks.tiktok_tasks import PipelineContext
+    ocr_write = Future()
+    with patch("tasks.tiktok_tasks.get_firestore_db", return_value=MockFirestore()):
+        ctx = PipelineContext("testjobid", "https://www.tiktok.com/@user/video/1", "user123", "recipe123")
+    with patch("tasks.tiktok_tasks.TikTokIngestService.update_ocr_results", return_value=ocr_write) as mock_update:
+        ctx.persist_ocr_results(MagicMock(), [{"timestamp": 0.0, "text_blocks": []}])
+        flush = threading.Thread(target=ctx.flush_progress)
+        flush.start()
+        flush.join(0.1)
+        # The final status write must not start while the OCR results are still being written
+        assert flush.is_alive()
+        ocr_write.set_result(None)
+        flush.join(1)
+    assert not flush.is_alive()
+    mock_update.assert_called_once()
+
+
+@pytest.mark.parametrize("error, retried", [
+    (VideoUnavailableError("yt-dlp failed"), True),
+    (VideoNotFoundError("Video is private or not found"), False),
+    (ValueError("bad recipe json"), False),
+])
+def test_only_transient_errors_retry_the_task(error, retried):
+    from tasks.tiktok_tasks import ingest_tiktok
+    with patch("tasks.tiktok_tasks.get_firestore_db", return_value=MockFirestore()), \
+         patch("tasks.tiktok_tasks.download_video", side_effect=error), \
+         patch.object(ingest_tiktok, "retry", side_effect=RuntimeError("retry scheduled")) as mock_retry:
+        with pytest.raises(RuntimeError if retried else type(error)):
+            ingest_tiktok("testjobid", "https://www.tiktok.com/@user/video/1", "user123", "recipe123")
+    assert mock_retry.called == retried
+
+
+def test_retry_reuses_transcript_from_previous_attempt(tmp_path):
+    from tasks.tiktok_tasks import ingest_tiktok
+    db = MockFirestore()
+    db.document("testjobid").data.update({"status": "FAILED", "transcript": "saved transcript"})
+    with patch("tasks.tiktok_tasks.get_firestore_db", return_value=db), \
+         patch("services.tiktok_ingest_service.get_firestore_db", return_value=db), \
+         patch("tasks.tiktok_tasks.download_video", return_value=tmp_path / "video.mp4"), \
+         patch("tasks.tiktok_tasks.extract_frames", return_value=[]), \
+         patch("tasks.tiktok_tasks.extract_audio") as mock_extract_audio, \
+         patch("tasks.tiktok_tasks.TranscriptionService.transcribe") as mock_transcribe, \
+         patch("tasks.tiktok_tasks.DataSufficiencyAnalyzer"), \
+         patch("tasks.tiktok_tasks.LLMRefineService") as mock_llm_service:
+        mock_llm_service.return_value.refine_with_validation_retry.return_value = (
+            {"title": "Test Recipe", "ingredients": [], "instructions": ["Test"]}, None
+        )
+        ingest_tiktok("testjobid", "https://www.tiktok.com/@user/video/1", "user123", "recipe123")
+    mock_extract_audio.assert_not_called()
+    mock_transcribe.assert_not_called()
+    assert db.document("testjobid").data["transcript"] == "saved transcript"
+
+
+def test_measured_transcript_skips_sufficiency_check_and_ocr(tmp_path):
+    from tasks.tiktok_tasks import ingest_tiktok
+    db = MockFirestore()
+    transcript = "Mix 2 cups flour, 1 tsp salt and 3 tbsp sugar, then add 200g butter."
+    with patch("tasks.tiktok_tasks.get_firestore_db", return_value=db), \
+         patch("services.tiktok_ingest_service.get_firestore_db", return_value=db), \
+         patch("tasks.tiktok_tasks.download_video", return_value=tmp_path / "video.mp4"), \
+         patch("tasks.tiktok_tasks.extract_frames", return_value=[]), \
+         patch("tasks.tiktok_tasks.extract_audio", return_value=tmp_path / "audio.mp3"), \
+         patch("tasks.tiktok_tasks.TranscriptionService.transcribe", return_value=transcript), \
+         patch("tasks.tiktok_tasks.DataSufficiencyAnalyzer") as mock_analyzer, \
+         patch("tasks.tiktok_tasks.OCRService") as mock_ocr_service, \
+         patch("tasks.tiktok_tasks.LLMRefineService") as mock_llm_service:
+        mock_analyzer.return_value.get_analysis_summary.return_value = {}
+        mock_llm_service.return_value.refine_with_validation_retry.return_value = (
+            {"title": "Test Recipe", "ingredients": [], "instructions": ["Test"]}, None
+        )
+        ingest_tiktok("testjobid", "https://www.tiktok.com/@user/video/1", "user123", "recipe123")
+    mock_analyzer.return_value.analyze_sufficiency.assert_not_called()
+    mock_ocr_service.return_value.run_ocr_on_frames.assert_not_called()
+    assert mock_llm_service.return_value.refine_with_validation_retry.call_args_list[0].kwargs["ocr_results"] == []
+
+
+def test_cancelled_frame_prefetch_falls_back_to_direct_extraction(tmp_path):
+    from tasks.tiktok_tasks import PipelineContext, _extract_ocr_frames
+    with patch("tasks.tiktok_tasks.get_firestore_db", return_value=None):
+        ctx = PipelineContext("testjobid", "https://www.tiktok.com/@user/video/1", "user123", "recipe123")
+    ctx.frames_future = Future()
+    ctx.frames_future.cancel()
+    frames = [(tmp_path / "frame_0.jpg", 0.0)]
+    with patch("tasks.tiktok_tasks.extract_frames", return_value=frames) as mock_extract_frames:
+        assert _extract_ocr_frames(ctx, tmp_path / "video.mp4", tmp_path / "fallback_frames") == frames
+    mock_extract_frames.assert_called_once()
@@ -1,11 +1,25 @@
 import pytest
-from unittest.mock import patch, Mock, mock_open
+from unittest.mock import patch, Mock, MagicMock, mock_open
 from datetime import datetime, timezone
 import json
 
 from services.llm_refine_service import LLMRefineService, LLMRefineError
 from services.firestore_recipe_service import FirestoreRecipeService
 
+
+def _stream_response(content):
+    """Build a mock streamed chat completion that yields content in small chunks"""
+    chunks = []
+    for start in range(0, len(content), 16):
+        chunk = Mock()
+        chunk.choices = [Mock()]
+        chunk.choices[0].delta.content = content[start:start + 16]
+        chunks.append(chunk)
+    stream = MagicMock()
+    stream.__iter__.return_value = iter(chunks)
+    return stream
+
+
 class TestLLMIntegration:
     
     @pytest.fixture
@@ -101,9 +115,7 @@ class TestLLMIntegration:
         
         # Mock OpenAI
         mock_client = Mock()
-        mock_response = Mock()
-        mock_response.choices = [Mock()]
-        mock_response.choices[0].message.content = mock_llm_response["choices"][0]["message"]["content"]
+        mock_response = _stream_response(mock_llm_response["choices"][0]["message"]["content"])
         mock_client.chat.completions.create.return_value = mock_response
         mock_openai.return_value = mock_client
         
@@ -145,9 +157,7 @@ class TestLLMIntegration:
         
         # Mock OpenAI to return invalid JSON
         mock_client = Mock()
-        mock_response = Mock()
-        mock_response.choices = [Mock()]
-        mock_response.choices[0].message.content = '{"title": "", "ingredients": [{"name": "flour", "quantity": "1 cup"}], "instructions": ["Mix ingredients"]}'
+        mock_response = _stream_response('{"title": "", "ingredients": [{"name": "flour", "quantity": "1 cup"}], "instructions": ["Mix ingredients"]}')
         mock_client.chat.completions.create.return_value = mock_response
         mock_openai.return_value = mock_client
         
@@ -298,13 +308,9 @@ Hope this helps!"""
             with patch('services.llm_refine_service.OpenAI') as mock_openai:
                 mock_client = Mock()
                 # First call returns invalid JSON, second call returns valid data
-                mock_response1 = Mock()
-                mock_response1.choices = [Mock()]
-                mock_response1.choices[0].message.content = '{"title": "Test Recipe", "ingredients": [{"name": "flour", "quantity": "1 cup"}], "instructions": ["Mix ingredients"]'
+                mock_response1 = _stream_response('{"title": "Test Recipe", "ingredients": [{"name": "flour", "quantity": "1 cup"}], "instructions": ["Mix ingredients"]')
                 
-                mock_response2 = Mock()
-                mock_response2.choices = [Mock()]
-                mock_response2.choices[0].message.content = '{"title": "Test Recipe", "ingredients": [{"name": "flour", "quantity": "1 cup"}], "instructions": ["Mix ingredients"]}'
+                mock_response2 = _stream_response('{"title": "Test Recipe", "ingredients": [{"name": "flour", "quantity": "1 cup"}], "instructions": ["Mix ingredients"]}')
                 
                 mock_client.chat.completions.create.side_effect = [mock_response1, mock_response2]
                 mock_openai.return_value = mock_client
@@ -365,9 +371,7 @@ Hope this helps!"""
         
         with patch('services.llm_refine_service.OpenAI') as mock_openai:
             mock_client = Mock()
-            mock_response = Mock()
-            mock_response.choices = [Mock()]
-            mock_response.choices[0].message.content = mock_llm_response["choices"][0]["message"]["content"]
+            mock_response = _stream_response(mock_llm_response["choices"][0]["message"]["content"])
             mock_client.chat.completions.create.return_value = mock_response
             mock_openai.return_value = mock_client
             
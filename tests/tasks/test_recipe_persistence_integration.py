@@ -13,9 +13,22 @@ class MockFirestoreDoc:
     def get(self):
         return MagicMock(exists=True, to_dict=lambda: self.data)
 
+class MockWriteBatch:
+    def __init__(self):
+        self.writes = []
+    def update(self, doc, data):
+        self.writes.append((doc, data))
+    def set(self, doc, data, merge=False):
+        self.writes.append((doc, data))
+    def commit(self):
+        for doc, data in self.writes:
+            doc.update(data)
+
 class MockFirestore:
     def __init__(self):
         self.docs = {}
+    def batch(self):
+        return MockWriteBatch()
     def collection(self, name):
         return self
     def document(self, job_id):
@@ -30,4 +30,20 @@ def test_extract_audio_ffmpeg_error(tmp_path):
          patch("pathlib.Path.exists", return_value=False):
         with pytest.raises(AudioExtractionError) as exc:
             extract_audio(video_path, output_dir=tmp_path)
-        assert "ffmpeg failed" in str(exc.value) 
\ No newline at end of file
+        assert "ffmpeg failed" in str(exc.value)
+
+def test_extract_audio_mp3_uses_compressed_encoder(tmp_path):
+    video_path = tmp_path / "video.mp4"
+    video_path.touch()
+    with patch("subprocess.run") as mock_run, \
+         patch("pathlib.Path.exists", return_value=True):
+        result = extract_audio(video_path, output_dir=tmp_path, audio_format="mp3")
+    assert result.name == "audio.mp3"
+    cmd = mock_run.call_args[0][0]
+    assert cmd[-5:] == ["-c:a", "libmp3lame", "-b:a", "32k", str(tmp_path / "audio.mp3")]
+    assert "16000" in cmd and "1" in cmd
+
+def test_extract_audio_unsupported_format(tmp_path):
+    with pytest.raises(AudioExtractionError) as exc:
+        extract_audio(tmp_path / "video.mp4", output_dir=tmp_path, audio_format="flac")
+    assert "Unsupported audio format" in str(exc.value)
@@ -0,0 +1,22 @@
+from utils.disk_cache import DiskCache
+from unittest.mock import patch
+
+def test_disk_cache_persists_across_instances(tmp_path):
+    cache = DiskCache(tmp_path / "cache")
+    cache.set("key", {"title": "Pancakes"})
+    assert cache.get("key") == {"title": "Pancakes"}
+    cache.close()
+    # A new instance on the same directory sees the entry
+    reopened = DiskCache(tmp_path / "cache")
+    assert reopened.get("key") == {"title": "Pancakes"}
+    assert reopened.get("missing") is None
+    reopened.close()
+
+def test_disk_cache_expires_entries(tmp_path):
+    cache = DiskCache(tmp_path / "cache")
+    with patch("utils.disk_cache.time.time", return_value=1000.0):
+        cache.set("key", "value", expire=10)
+        assert cache.get("key") == "value"
+    with patch("utils.disk_cache.time.time", return_value=1011.0):
+        assert cache.get("key", "default") == "default"
+    cache.close()
@@ -0,0 +1,8 @@
+from utils.frame_extractor import frame_hash, hamming_distance
+
+def test_hamming_distance():
+    assert hamming_distance(0b1010, 0b1010) == 0
+    assert hamming_distance(0b1010, 0b0101) == 4
+
+def test_frame_hash_unreadable_frame(tmp_path):
+    assert frame_hash(tmp_path / "missing.jpg") is None
@@ -0,0 +1,29 @@
+from utils.rate_limiter import SlidingWindowRateLimiter
+from unittest.mock import patch
+
+def _local_limiter(limit):
+    with patch("utils.rate_limiter.redis", None):
+        return SlidingWindowRateLimiter("test:rpm", limit=limit, window_seconds=60)
+
+def test_local_window_waits_for_oldest_call():
+    limiter = _local_limiter(2)
+    assert limiter._reserve(100.0) == 0.0
+    assert limiter._reserve(110.0) == 0.0
+    # Window is full until the first call ages out at 160
+    assert limiter._reserve(130.0) == 30.0
+    assert limiter._reserve(160.0) == 0.0
+
+def test_acquire_sleeps_until_window_has_room():
+    limiter = _local_limiter(1)
+    with patch("utils.rate_limiter.time.time", side_effect=[100.0, 120.0, 160.0]), \
+         patch("utils.rate_limiter.time.sleep") as mock_sleep:
+        limiter.acquire()
+        limiter.acquire()
+    mock_sleep.assert_called_once_with(40.0)
+
+def test_pause_holds_back_callers():
+    limiter = _local_limiter(10)
+    with patch("utils.rate_limiter.time.time", return_value=100.0):
+        limiter.pause(5)
+    assert limiter._reserve(102.0) == 3.0
+    assert limiter._reserve(105.0) == 0.0
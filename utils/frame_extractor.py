@@ -1,8 +1,16 @@
 import subprocess
 from pathlib import Path
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 import re
 
+try:
+    from PIL import Image
+except ImportError:  # Pillow ships with paddleocr; without it frames are never treated as duplicates
+    Image = None
+
+# Side length of the grayscale thumbnail used for perceptual hashing (yields HASH_SIZE**2 bits)
+HASH_SIZE = 8
+
 def extract_frames(
     video_path: Path, output_dir: Path, method: str = "scene", fps: float = 1.0, max_frames: int = 8
 ) -> List[Tuple[Path, float]]:
@@ -73,4 +81,28 @@ def extract_frames(
     print(f"[FrameExtractor] Extracted {len(frame_files)} frames to {output_dir}")
     for f in frame_files:
         print(f"[FrameExtractor] Frame: {f}")
-    return list(zip(frame_files, timestamps)) 
\ No newline at end of file
+    return list(zip(frame_files, timestamps)) 
+
+def frame_hash(frame_path: Path) -> Optional[int]:
+    """
+    Compute a 64-bit difference hash (dHash) of a frame.
+    Visually similar frames get hashes a small Hamming distance apart.
+    Returns None if the image can't be read.
+    """
+    if Image is None:
+        return None
+    try:
+        with Image.open(frame_path) as img:
+            pixels = list(img.convert("L").resize((HASH_SIZE + 1, HASH_SIZE)).getdata())
+    except Exception:
+        return None
+    bits = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            bits = (bits << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return bits
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two hashes"""
+    return (a ^ b).bit_count()
@@ -9,6 +9,10 @@ import re
 class VideoUnavailableError(Exception):
     pass
 
+class VideoNotFoundError(VideoUnavailableError):
+    """The video is private or gone (404); downloading it again won't help"""
+    pass
+
 @contextmanager
 def temp_job_dir(base_dir="/tmp/ingest", job_id=None):
     """
@@ -30,7 +34,8 @@ def download_video(url, output_dir="/tmp/ingest"):
     """
     Download a video from TikTok using yt-dlp.
     Returns a tuple: (video_path, title, thumbnail_url)
-    Raises VideoUnavailableError if the video is private or not found.
+    Raises VideoNotFoundError if the video is private or not found, VideoUnavailableError
+    for any other download failure.
     """
     job_id = os.urandom(8).hex()
     job_dir = Path(output_dir) / job_id
@@ -58,7 +63,7 @@ def download_video(url, output_dir="/tmp/ingest"):
         
     except subprocess.CalledProcessError as e:
         if "This video is private" in e.stderr or "HTTP Error 404" in e.stderr:
-            raise VideoUnavailableError("Video is private or not found")
+            raise VideoNotFoundError("Video is private or not found")
         raise VideoUnavailableError(f"yt-dlp failed: {e.stderr}")
 
 
@@ -0,0 +1,111 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+
+try:
+    import redis
+except ImportError:  # Redis is only needed to share the window between worker processes
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+class SlidingWindowRateLimiter:
+    """
+    Proactive requests-per-window throttle.
+
+    Call timestamps are kept in a Redis sorted set so every Celery worker sharing
+    the broker sees the same window. If Redis is unavailable the limiter falls
+    back to an in-process window for the rest of the process lifetime.
+    The limit is soft: workers checking at the same instant may overshoot it slightly.
+    """
+
+    def __init__(self, key, limit, window_seconds=60.0, redis_url=None):
+        self.key = key
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self._redis_url = redis_url or os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0')
+        self._redis = None
+        self._use_redis = redis is not None
+        self._lock = threading.Lock()
+        self._calls = deque()
+        self._paused_until = 0.0
+
+    def acquire(self):
+        """Block until a call fits in the window, then record it"""
+        while True:
+            wait = self._reserve(time.time())
+            if wait <= 0:
+                return
+            logger.info("Rate limiter %s waiting %.2fs", self.key, wait)
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Hold every caller back for the given number of seconds (e.g. from Retry-After headers)"""
+        if seconds <= 0:
+            return
+        until = time.time() + seconds
+        with self._lock:
+            self._paused_until = max(self._paused_until, until)
+        client = self._client()
+        if client is not None:
+            try:
+                client.set(f"{self.key}:paused", until, px=int(seconds * 1000))
+            except redis.RedisError as e:
+                self._disable_redis(e)
+
+    def _client(self):
+        if not self._use_redis:
+            return None
+        if self._redis is None:
+            self._redis = redis.Redis.from_url(self._redis_url, socket_timeout=1, socket_connect_timeout=1)
+        return self._redis
+
+    def _disable_redis(self, error):
+        logger.warning("Rate limiter %s falling back to in-process window: %s", self.key, error)
+        self._use_redis = False
+
+    def _reserve(self, now):
+        """Record a call if the window has room; otherwise return how long to wait"""
+        with self._lock:
+            paused_wait = self._paused_until - now
+        if paused_wait > 0:
+            return paused_wait
+
+        client = self._client()
+        if client is not None:
+            try:
+                return self._reserve_redis(client, now)
+            except redis.RedisError as e:
+                self._disable_redis(e)
+        return self._reserve_local(now)
+
+    def _reserve_redis(self, client, now):
+        paused_until = client.get(f"{self.key}:paused")
+        if paused_until is not None and float(paused_until) > now:
+            return float(paused_until) - now
+
+        pipe = client.pipeline()
+        pipe.zremrangebyscore(self.key, 0, now - self.window_seconds)
+        pipe.zcard(self.key)
+        pipe.zrange(self.key, 0, 0, withscores=True)
+        _, count, oldest = pipe.execute()
+        if count >= self.limit:
+            return oldest[0][1] + self.window_seconds - now if oldest else self.window_seconds
+
+        pipe = client.pipeline()
+        pipe.zadd(self.key, {f"{now}:{uuid.uuid4().hex}": now})
+        pipe.expire(self.key, int(self.window_seconds) + 1)
+        pipe.execute()
+        return 0.0
+
+    def _reserve_local(self, now):
+        with self._lock:
+            while self._calls and self._calls[0] <= now - self.window_seconds:
+                self._calls.popleft()
+            if len(self._calls) >= self.limit:
+                return self._calls[0] + self.window_seconds - now
+            self._calls.append(now)
+            return 0.0